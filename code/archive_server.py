@@ -0,0 +1,142 @@
+"""
+Local HTTP server and synthetic archives for exercising the repo download
+pipeline without network access.
+
+`serve_archives` serves files from a directory with ETag, If-None-Match,
+Range and If-Range support, the subset of GitHub's archive endpoint that
+`repo_download` relies on, and counts the bytes it sends.
+"""
+
+import hashlib
+import http.server
+import os
+import random
+import re
+import threading
+import zipfile
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+
+def make_repo_archive(
+    zip_path: str,
+    num_files: int = 1000,
+    file_size: int = 2048,
+    top_dir: str = "repo-main",
+    seed: int = 0,
+) -> str:
+    """Writes a GitHub-style zip whose members share one top-level directory.
+
+    Files are spread over nested directories, with a `.env` at the root.
+
+    Args:
+        zip_path: Archive to create.
+        num_files: Number of regular files.
+        file_size: Approximate size of each file in bytes.
+        top_dir: Name of the top-level directory.
+        seed: Seed for the file contents.
+
+    Returns:
+        `zip_path`.
+    """
+    rng = random.Random(seed)
+    words = [f"token{i}" for i in range(512)]
+    os.makedirs(os.path.dirname(os.path.abspath(zip_path)), exist_ok=True)
+    with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr(f"{top_dir}/", "")
+        archive.writestr(f"{top_dir}/.env", "API_KEY=placeholder\n")
+        for i in range(num_files):
+            path = f"{top_dir}/pkg{i % 50}/mod{i % 7}/file{i}.py"
+            body = []
+            size = 0
+            while size < file_size:
+                word = rng.choice(words)
+                body.append(word)
+                size += len(word) + 1
+            archive.writestr(path, " ".join(body))
+    return zip_path
+
+
+class ArchiveRequestHandler(http.server.SimpleHTTPRequestHandler):
+    """Static file handler with ETag, conditional and Range support."""
+
+    server: "ArchiveServer"
+
+    def log_message(self, format, *args) -> None:
+        pass
+
+    def send_head(self):
+        path = self.translate_path(self.path)
+        if not os.path.isfile(path):
+            self.send_error(404)
+            return None
+        stat = os.stat(path)
+        version = f"{stat.st_mtime_ns}-{stat.st_size}".encode()
+        etag = f'"{hashlib.sha1(version).hexdigest()}"'
+        self.server.requests += 1
+
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return None
+
+        start, end = 0, stat.st_size - 1
+        status = 200
+        match = re.fullmatch(r"bytes=(\d+)-", self.headers.get("Range", ""))
+        if_range = self.headers.get("If-Range")
+        if match and (if_range is None or if_range == etag):
+            start = int(match.group(1))
+            if start >= stat.st_size:
+                self.send_response(416)
+                self.send_header("Content-Range", f"bytes */{stat.st_size}")
+                self.end_headers()
+                return None
+            status = 206
+
+        f = open(path, "rb")
+        f.seek(start)
+        self.send_response(status)
+        self.send_header("Content-Type", "application/zip")
+        self.send_header("Content-Length", str(end - start + 1))
+        self.send_header("ETag", etag)
+        self.send_header("Accept-Ranges", "bytes")
+        if status == 206:
+            self.send_header("Content-Range", f"bytes {start}-{end}/{stat.st_size}")
+        self.end_headers()
+        self.server.bytes_sent += end - start + 1
+        return f
+
+
+class ArchiveServer(http.server.ThreadingHTTPServer):
+    """Threaded server that counts requests and body bytes sent."""
+
+    daemon_threads = True
+    requests = 0
+    bytes_sent = 0
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+@contextmanager
+def serve_archives(root: str, port: Optional[int] = 0) -> Iterator[ArchiveServer]:
+    """Serves `root` on localhost for the duration of the block.
+
+    A repo "archive" at `<root>/<owner>/<repo>/archive/refs/heads/main.zip`
+    is fetched by `repo_download.fetch_repo(f"{server.base_url}/owner/repo")`.
+    """
+
+    def handler(*args, **kwargs):
+        return ArchiveRequestHandler(*args, directory=root, **kwargs)
+
+    server = ArchiveServer(("127.0.0.1", port), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
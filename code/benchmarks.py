@@ -0,0 +1,423 @@
+"""
+Micro-benchmarks for the performance-sensitive helpers in this repository.
+
+Run from the `code` directory, optionally naming the benchmarks to run:
+
+    python benchmarks.py prompt_compilation
+
+Each benchmark imports what it measures itself, so one whose optional
+dependencies are missing is skipped without stopping the others.
+"""
+
+import asyncio
+import itertools
+import operator
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import timeit
+import zipfile
+from functools import partial
+from typing import Callable, Dict, List
+
+
+def print_timing(label: str, seconds: float, iterations: int) -> None:
+    """Prints the mean time per iteration of a timed loop."""
+    print(f"  {label:<44} {seconds / iterations * 1e6:10.2f} µs/iter")
+
+
+def benchmark_prompt_compilation(iterations: int = 20_000) -> None:
+    """Compares rebuilding a prompt per call with rendering a compiled one."""
+    from paths import PROMPT_CONFIG_FILE_PATH
+    from prompt_builder import build_prompt_from_config, compile_prompt
+    from utils import load_config
+
+    config = load_config(PROMPT_CONFIG_FILE_PATH)["joke_writer_cfg"]
+
+    def rebuild():
+        build_prompt_from_config(config) + "\n\nThe category is: general"
+
+    def render():
+        compile_prompt(config).render(category="general")
+
+    print("prompt_compilation")
+    rebuild_s = timeit.timeit(rebuild, number=iterations)
+    render_s = timeit.timeit(render, number=iterations)
+    print_timing("build_prompt_from_config per call", rebuild_s, iterations)
+    print_timing("compile_prompt(...).render()", render_s, iterations)
+    print(f"  speedup: {rebuild_s / render_s:.1f}x")
+
+
+def make_fake_extractor(latency: float):
+    """Returns a stand-in structured-output model with a fixed round-trip time."""
+    from langchain_core.runnables import RunnableLambda
+    from lesson_2 import Entities, Entity
+
+    async def extract(prompt: str) -> Entities:
+        await asyncio.sleep(latency)
+        return Entities(entities=[Entity(type="model", name=f"model-{len(prompt)}")])
+
+    return RunnableLambda(extract)
+
+
+def benchmark_chunked_extraction(
+    latency: float = 0.05, concurrency: int = 16
+) -> None:
+    """Wall-clock time of map-reduce extraction for 1 vs 100 publications."""
+    from lesson_2 import aextract_entities, split_document
+    from utils import load_publication
+
+    publication = load_publication()
+    llm = make_fake_extractor(latency)
+    chunks = len(split_document(publication))
+
+    print(f"chunked_extraction ({chunks} chunks/doc, {latency * 1000:.0f} ms/call)")
+    for n_docs in (1, 100):
+        start = time.perf_counter()
+        asyncio.run(
+            aextract_entities([publication] * n_docs, llm, max_concurrency=concurrency)
+        )
+        elapsed = time.perf_counter() - start
+        serial = n_docs * chunks * latency
+        print(f"  {n_docs:>3} docs: {elapsed:6.2f} s  (serial calls: {serial:.2f} s)")
+
+
+def make_fake_chat_model(latency: float, reply: Callable[[], str]):
+    """Returns a stand-in chat model with a fixed round-trip time."""
+    from langchain_core.messages import AIMessage
+    from langchain_core.runnables import RunnableLambda
+
+    def invoke(prompt) -> AIMessage:
+        time.sleep(latency)
+        return AIMessage(content=reply())
+
+    async def ainvoke(prompt) -> AIMessage:
+        await asyncio.sleep(latency)
+        return AIMessage(content=reply())
+
+    return RunnableLambda(invoke, afunc=ainvoke)
+
+
+def benchmark_writer_critic(
+    latency: float = 0.05,
+    approval_rate: float = 0.3,
+    rounds: int = 30,
+    max_attempts: int = 5,
+) -> None:
+    """Latency of the sequential writer–critic loop vs racing K candidates."""
+    from joke_bot_llm2 import (
+        AgenticJokeState,
+        make_critic_node,
+        make_parallel_writer_critic_node,
+        make_writer_node,
+    )
+
+    rng = random.Random(0)
+    writer_llm = make_fake_chat_model(latency, lambda: "Why do devs ...")
+    critic_llm = make_fake_chat_model(
+        latency, lambda: "yes" if rng.random() < approval_rate else "no"
+    )
+    state = AgenticJokeState(category="general")
+
+    writer_node = make_writer_node(writer_llm)
+    critic_node = make_critic_node(critic_llm)
+
+    def sequential() -> None:
+        for _ in range(max_attempts):
+            joke = writer_node(state)["latest_joke"]
+            judged = state.model_copy(update={"latest_joke": joke})
+            if critic_node(judged)["approved"]:
+                return
+
+    def parallel(num_candidates: int) -> Callable[[], None]:
+        node = make_parallel_writer_critic_node(writer_llm, critic_llm, num_candidates)
+
+        def run() -> None:
+            attempts = 0
+            while attempts < max_attempts:
+                result = node.invoke(state)
+                attempts += num_candidates
+                if result["approved"]:
+                    return
+
+        return run
+
+    print(
+        f"writer_critic ({latency * 1000:.0f} ms/call, "
+        f"{approval_rate:.0%} approval, {rounds} jokes)"
+    )
+    variants = [("sequential loop", sequential)] + [
+        (f"parallel, {k} candidates", parallel(k)) for k in (3, max_attempts)
+    ]
+    for label, run in variants:
+        timings = []
+        for _ in range(rounds):
+            start = time.perf_counter()
+            run()
+            timings.append(time.perf_counter() - start)
+        p95 = statistics.quantiles(timings, n=20)[-1]
+        print(
+            f"  {label:<28} mean {statistics.mean(timings) * 1000:7.1f} ms"
+            f"   p95 {p95 * 1000:7.1f} ms"
+        )
+
+
+def benchmark_joke_history(iterations: int = 100_000) -> None:
+    """Joke-history append cost, and a long scripted joke_bot session."""
+    import joke_bot
+    from joke_history import Joke, JokeHistory, add_jokes
+    from session_io import ScriptedIO
+
+    joke = Joke(text="Why do devs ...", category="neutral")
+    print("joke_history")
+    for n in (1_000, 10_000):
+
+        def list_add():
+            jokes = []
+            for _ in range(n):
+                jokes = operator.add(jokes, [joke])
+
+        def history_add():
+            jokes = JokeHistory()
+            for _ in range(n):
+                jokes = add_jokes(jokes, [joke])
+
+        list_s = timeit.timeit(list_add, number=1)
+        history_s = timeit.timeit(history_add, number=1)
+        print_timing(f"{n:>6} appends, List + operator.add", list_s, n)
+        print_timing(f"{n:>6} appends, add_jokes", history_s, n)
+
+    # Scripted menu: mostly "next joke", with a category change now and then
+    script = iter(
+        (["c", "1"] if i % 1000 == 999 else ["n"]) for i in range(iterations)
+    )
+    answers = itertools.chain.from_iterable(script)
+    graph = joke_bot.build_joke_graph()
+    config = {
+        "configurable": {"io": ScriptedIO(answers)},
+        "recursion_limit": 3 * iterations,
+    }
+    start = time.perf_counter()
+    state = graph.invoke(joke_bot.JokeState(), config=config)
+    elapsed = time.perf_counter() - start
+    print(
+        f"  {iterations} menu iterations through build_joke_graph: {elapsed:.1f} s "
+        f"({iterations / elapsed:,.0f} it/s, {len(state['jokes'])} jokes)"
+    )
+
+
+def benchmark_joke_sessions(num_sessions: int = 200) -> None:
+    """Concurrent scripted sessions against one checkpointed joke graph."""
+    from load_test import run_sessions
+
+    print("joke_sessions")
+    run_sessions(num_sessions).print_summary()
+
+
+def benchmark_joke_store(iterations: int = 100_000, draws: int = 100) -> None:
+    """pyjokes.get_joke vs the pre-indexed store: speed and repeats."""
+    from pyjokes import get_joke
+
+    from joke_store import JokeStore
+
+    store = JokeStore(seed=0)
+    print("joke_store")
+    pyjokes_s = timeit.timeit(lambda: get_joke("en", "all"), number=iterations)
+    store_s = timeit.timeit(lambda: store.get_joke("en", "all"), number=iterations)
+    print_timing("pyjokes.get_joke", pyjokes_s, iterations)
+    print_timing("JokeStore.get_joke", store_s, iterations)
+    for label, source in (("pyjokes", get_joke), ("store", JokeStore().get_joke)):
+        jokes = [source(language="en", category="neutral") for _ in range(draws)]
+        print(f"  {label:<8} repeats in {draws} draws: {draws - len(set(jokes))}")
+
+
+def benchmark_tool_binding(iterations: int = 500) -> None:
+    """Per-step tool setup: rebuilding it every step vs a cached ToolSet."""
+    from langchain_openai import ChatOpenAI
+
+    from custom_tools import get_all_tools
+    from toolset import get_toolset
+
+    # Binding never contacts the API, so a placeholder key is enough
+    llm = ChatOpenAI(model="gpt-4o-mini", api_key="unused")
+
+    def per_step_rebuild():
+        llm.bind_tools(get_all_tools())
+        {tool.name: tool for tool in get_all_tools()}
+
+    def cached_toolset():
+        toolset = get_toolset(get_all_tools())
+        toolset.bind(llm)
+        toolset.registry
+
+    print("tool_binding")
+    rebuild_s = timeit.timeit(per_step_rebuild, number=iterations)
+    cached_s = timeit.timeit(cached_toolset, number=iterations)
+    print_timing("bind_tools + registry per step", rebuild_s, iterations)
+    print_timing("get_toolset(...).bind(llm)", cached_s, iterations)
+    print(f"  speedup: {rebuild_s / cached_s:.0f}x")
+
+
+def benchmark_repo_download(num_files: int = 5000) -> None:
+    """Repo fetch from a local server, and a resumed half-finished download."""
+    from archive_server import make_repo_archive, serve_archives
+    from repo_download import archive_url, download_file, fetch_repo, get_http_session
+
+    root = tempfile.mkdtemp()
+    try:
+        zip_path = make_repo_archive(
+            os.path.join(root, "srv", "owner/repo/archive/refs/heads/main.zip"),
+            num_files=num_files,
+        )
+        size = os.path.getsize(zip_path)
+        with serve_archives(os.path.join(root, "srv")) as server:
+            repo_url = f"{server.base_url}/owner/repo"
+            print(f"repo_download ({num_files} files, {size / 1e6:.1f} MB archive)")
+            start = time.perf_counter()
+            fetch_repo(repo_url, os.path.join(root, "repo"))
+            print(f"  fetch_repo: {time.perf_counter() - start:.2f} s")
+
+            # Leave the first half of the archive behind as an interrupted download
+            url = archive_url(repo_url, "main")
+            part_path = os.path.join(root, "downloads", "main.zip.part")
+            os.makedirs(os.path.dirname(part_path))
+            with open(zip_path, "rb") as src, open(part_path, "wb") as dst:
+                dst.write(src.read(size // 2))
+            with open(part_path + ".etag", "w") as f:
+                f.write(get_http_session().head(url).headers["ETag"])
+            sent = server.bytes_sent
+            download_file(url, part_path[: -len(".part")])
+            print(f"  resumed download fetched {server.bytes_sent - sent:,} of {size:,} bytes")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def benchmark_repo_cache(num_files: int = 5000) -> None:
+    """Cold download vs a fresh cache hit vs a 304 revalidation."""
+    from archive_server import make_repo_archive, serve_archives
+    from repo_cache import RepoCache
+
+    root = tempfile.mkdtemp()
+    try:
+        make_repo_archive(
+            os.path.join(root, "srv", "owner/repo/archive/refs/heads/main.zip"),
+            num_files=num_files,
+        )
+        with serve_archives(os.path.join(root, "srv")) as server:
+            repo_url = f"{server.base_url}/owner/repo"
+            cache = RepoCache(os.path.join(root, "cache"))
+            print(f"repo_cache ({num_files} files)")
+            for label, revalidate_after in (
+                ("cold download", 300),
+                ("fresh hit", 300),
+                ("revalidated (304)", 0),
+            ):
+                cache.revalidate_after = revalidate_after
+                start = time.perf_counter()
+                cache.get(repo_url)
+                elapsed = time.perf_counter() - start
+                print(f"  {label:<20} {elapsed * 1000:10.2f} ms")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def benchmark_zip_extraction(num_files: int = 50_000) -> None:
+    """extractall + copytree (the old tool) vs extract_zip, serial and pooled."""
+    from archive_server import make_repo_archive
+    from zip_extract import DEFAULT_WORKERS, extract_zip
+
+    root = tempfile.mkdtemp()
+    try:
+        zip_path = make_repo_archive(
+            os.path.join(root, "repo.zip"), num_files=num_files, file_size=512
+        )
+        print(f"zip_extraction ({num_files:,} files, {DEFAULT_WORKERS} workers)")
+
+        def extractall_copytree(dest):
+            temp = os.path.join(root, "temp")
+            zipfile.ZipFile(zip_path).extractall(temp)
+            shutil.copytree(os.path.join(temp, "repo-main"), dest)
+            shutil.rmtree(temp)
+
+        for label, extract in (
+            ("extractall + copytree", extractall_copytree),
+            ("extract_zip, 1 worker", partial(extract_zip, zip_path, workers=1)),
+            ("extract_zip, pooled", partial(extract_zip, zip_path)),
+        ):
+            dest = os.path.join(root, "out")
+            start = time.perf_counter()
+            extract(dest)
+            print(f"  {label:<24} {time.perf_counter() - start:6.2f} s")
+            shutil.rmtree(dest)
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def benchmark_file_index(num_files: int = 50_000, lookups: int = 20) -> None:
+    """Full os.walk per lookup vs the shared, mtime-validated index."""
+    from archive_server import make_repo_archive
+    from file_index import get_index
+    from zip_extract import extract_zip
+
+    root = tempfile.mkdtemp()
+    try:
+        repo = os.path.join(root, "repo")
+        extract_zip(
+            make_repo_archive(os.path.join(root, "repo.zip"), num_files, file_size=64),
+            repo,
+        )
+
+        def walk_lookup():
+            # A name that isn't there, so the walk can't stop early
+            for _, _, files in os.walk(repo):
+                if "missing.txt" in files:
+                    return
+
+        def index_lookup():
+            get_index(repo).find_name("missing.txt")
+
+        print(f"file_index ({num_files:,} files)")
+        start = time.perf_counter()
+        get_index(repo)
+        print(f"  {'index build':<44} {(time.perf_counter() - start) * 1e3:10.2f} ms")
+        walk_s = timeit.timeit(walk_lookup, number=lookups)
+        index_s = timeit.timeit(index_lookup, number=lookups)
+        print_timing("os.walk per lookup", walk_s, lookups)
+        print_timing("get_index(...).find_name()", index_s, lookups)
+        print(f"  speedup: {walk_s / index_s:.0f}x")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+BENCHMARKS: Dict[str, Callable[[], None]] = {
+    "prompt_compilation": benchmark_prompt_compilation,
+    "chunked_extraction": benchmark_chunked_extraction,
+    "writer_critic": benchmark_writer_critic,
+    "joke_history": benchmark_joke_history,
+    "joke_sessions": benchmark_joke_sessions,
+    "joke_store": benchmark_joke_store,
+    "tool_binding": benchmark_tool_binding,
+    "repo_download": benchmark_repo_download,
+    "repo_cache": benchmark_repo_cache,
+    "zip_extraction": benchmark_zip_extraction,
+    "file_index": benchmark_file_index,
+}
+
+
+def main(names: List[str]) -> None:
+    for name in names or BENCHMARKS:
+        if name not in BENCHMARKS:
+            print(f"Unknown benchmark '{name}'. Available: {', '.join(BENCHMARKS)}")
+            continue
+        try:
+            BENCHMARKS[name]()
+        except ImportError as e:
+            print(f"Skipping benchmark '{name}': {e}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
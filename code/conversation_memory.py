@@ -0,0 +1,285 @@
+"""
+Bounded conversation memory for the tool chatbot's message state.
+
+`add_messages` keeps every message forever, so each turn resends the whole
+history, tool outputs included. `ConversationMemory.compact`, run from a
+graph node before each model call, returns the state updates that:
+
+1. truncate tool results from older turns,
+2. remove the oldest turns once the history exceeds a token window, and
+3. fold the removed turns into a rolling summary kept as a system message.
+
+The `messages` channel uses `merge_messages`, a pure reducer that applies
+those updates and keeps the summary right after the system prompt; the
+summarizer's model call happens in the node, never inside the reducer.
+
+A turn starts at a human message and runs up to the next one, so an AI
+message is never separated from the tool results answering its calls.
+"""
+
+import json
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from langchain_core.messages import (
+    AIMessage,
+    BaseMessage,
+    HumanMessage,
+    RemoveMessage,
+    SystemMessage,
+    ToolMessage,
+)
+from langchain_core.runnables import Runnable
+from langgraph.graph.message import add_messages
+
+from tokens import count_tokens, truncate_to_tokens
+
+SUMMARY_MESSAGE_ID = "conversation-summary"
+SUMMARY_PREFIX = "Summary of the earlier conversation:\n"
+
+# Tokens a chat API adds around each message for its role and separators.
+MESSAGE_OVERHEAD_TOKENS = 4
+
+SUMMARIZE_PROMPT = """You maintain a running summary of a conversation between a user and an AI assistant that uses tools.
+
+Current summary:
+{summary}
+
+Messages to fold into the summary:
+{transcript}
+
+Write the updated summary in at most {max_words} words. Keep facts, decisions, file paths, URLs and open questions; drop pleasantries and raw tool output."""
+
+Summarizer = Callable[[str, Sequence[BaseMessage]], str]
+
+
+@dataclass(frozen=True)
+class MemoryPolicy:
+    """How much conversation history is kept in the graph state.
+
+    Args:
+        max_tokens: Token window for the whole history; the oldest turns are
+            evicted beyond it. None keeps every turn.
+        min_recent_turns: Turns that are never evicted, however long.
+        tool_result_max_tokens: Tool results in older turns are truncated to
+            this many tokens. None leaves them intact.
+        full_tool_result_turns: Most recent turns whose tool results are kept
+            intact.
+        summarize: Fold evicted turns into a rolling summary instead of
+            dropping them outright.
+        summary_max_tokens: Token cap on the rolling summary.
+    """
+
+    max_tokens: Optional[int] = 8000
+    min_recent_turns: int = 1
+    tool_result_max_tokens: Optional[int] = 500
+    full_tool_result_turns: int = 1
+    summarize: bool = True
+    summary_max_tokens: int = 500
+
+
+def format_transcript(messages: Sequence[BaseMessage]) -> str:
+    """Renders messages as "role: content" lines for the summarizer."""
+    lines = []
+    for message in messages:
+        if isinstance(message, AIMessage) and message.tool_calls:
+            calls = ", ".join(
+                f"{call['name']}({json.dumps(call['args'], default=str)})"
+                for call in message.tool_calls
+            )
+            lines.append(f"assistant called: {calls}")
+        if message.content:
+            lines.append(f"{message.type}: {message.content}")
+    return "\n".join(lines)
+
+
+def make_llm_summarizer(llm: Runnable, max_tokens: int = 500) -> Summarizer:
+    """Returns a summarizer that asks `llm` to update the running summary."""
+
+    def summarize(summary: str, messages: Sequence[BaseMessage]) -> str:
+        prompt = SUMMARIZE_PROMPT.format(
+            summary=summary or "(none yet)",
+            transcript=format_transcript(messages),
+            # ~0.75 words per token
+            max_words=max_tokens * 3 // 4,
+        )
+        return llm.invoke(prompt).content
+
+    return summarize
+
+
+def merge_messages(left: Any, right: Any) -> List[BaseMessage]:
+    """`messages` reducer: `add_messages`, with the summary after pinned messages.
+
+    A new summary message is appended by `add_messages`; this moves it in
+    front of the turns it summarizes. Use it in place of `add_messages`:
+
+        messages: Annotated[list, merge_messages]
+    """
+    merged = add_messages(left, right)
+    pinned, summary, turns = split_turns(merged)
+    if summary is None:
+        return merged
+    return pinned + [summary] + [message for turn in turns for message in turn]
+
+
+class ConversationMemory:
+    """Applies a `MemoryPolicy` to a history held in a `merge_messages` channel.
+
+    Build one per graph and return `compact(state["messages"])` as the
+    `messages` update of a node that runs before the model is called.
+
+    Args:
+        policy: What to keep.
+        summarizer: Folds evicted messages into the summary; without one,
+            evicted turns are dropped.
+    """
+
+    def __init__(
+        self,
+        policy: Optional[MemoryPolicy] = None,
+        summarizer: Optional[Summarizer] = None,
+    ):
+        self.policy = policy or MemoryPolicy()
+        self.summarizer = summarizer if self.policy.summarize else None
+        self.context_tokens = 0
+        self.evicted_turns = 0
+        self._lock = threading.Lock()
+        # message id -> (content length, tokens); pruned to the live history
+        self._token_counts: Dict[str, Tuple[int, int]] = {}
+
+    def count_message(self, message: BaseMessage) -> int:
+        """Tokens a message adds to the prompt, memoized by message id."""
+        content = message.content
+        if not isinstance(content, str):
+            content = str(content)
+        if isinstance(message, AIMessage) and message.tool_calls:
+            content += json.dumps(message.tool_calls, default=str)
+        cached = self._token_counts.get(message.id) if message.id else None
+        if cached is not None and cached[0] == len(content):
+            return cached[1]
+        tokens = count_tokens(content) + MESSAGE_OVERHEAD_TOKENS
+        if message.id:
+            self._token_counts[message.id] = (len(content), tokens)
+        return tokens
+
+    def count_messages(self, messages: Sequence[BaseMessage]) -> int:
+        """Tokens the messages add to the prompt."""
+        return sum(self.count_message(message) for message in messages)
+
+    def compact(self, messages: Sequence[BaseMessage]) -> List[BaseMessage]:
+        """Returns the updates that bring a history within the policy.
+
+        Args:
+            messages: The current history; every message must have an id, as
+                messages merged by `merge_messages` do.
+
+        Returns:
+            Truncated copies of older tool results, a `RemoveMessage` for each
+            evicted message and the updated summary, for `merge_messages`.
+            Empty when the history already fits.
+        """
+        pinned, summary, turns = split_turns(messages)
+        policy = self.policy
+        updates: List[BaseMessage] = []
+
+        if policy.tool_result_max_tokens is not None:
+            older = len(turns) - policy.full_tool_result_turns
+            for turn in turns[: max(0, older)]:
+                for i, message in enumerate(turn):
+                    if isinstance(message, ToolMessage):
+                        truncated = self._truncate_tool_result(message)
+                        if truncated is not message:
+                            turn[i] = truncated
+                            updates.append(truncated)
+
+        with self._lock:
+            turn_tokens = [self.count_messages(turn) for turn in turns]
+            total = self.count_messages(pinned) + sum(turn_tokens)
+            if summary is not None:
+                total += self.count_message(summary)
+
+        evicted: List[BaseMessage] = []
+        evicted_turns = 0
+        if policy.max_tokens is not None:
+            while total > policy.max_tokens and len(turns) > policy.min_recent_turns:
+                evicted.extend(turns.pop(0))
+                total -= turn_tokens.pop(0)
+                evicted_turns += 1
+        if evicted:
+            evicted_ids = {message.id for message in evicted}
+            updates = [m for m in updates if m.id not in evicted_ids]
+            updates.extend(RemoveMessage(id=message.id) for message in evicted)
+
+        if evicted and self.summarizer is not None:
+            previous = summary.content[len(SUMMARY_PREFIX):] if summary is not None else ""
+            try:
+                text = truncate_to_tokens(
+                    self.summarizer(previous, evicted), policy.summary_max_tokens
+                )
+            except Exception as e:
+                # Keep the old summary; the evicted turns are simply dropped
+                print(f"Failed to summarize evicted turns: {e}")
+            else:
+                new_summary = SystemMessage(
+                    content=SUMMARY_PREFIX + text, id=SUMMARY_MESSAGE_ID
+                )
+                with self._lock:
+                    if summary is not None:
+                        total -= self.count_message(summary)
+                    total += self.count_message(new_summary)
+                updates.append(new_summary)
+
+        with self._lock:
+            self.context_tokens = total
+            self.evicted_turns += evicted_turns
+            live_ids = {message.id for message in pinned}
+            live_ids.update(message.id for turn in turns for message in turn)
+            live_ids.add(SUMMARY_MESSAGE_ID)
+            for message_id in list(self._token_counts):
+                if message_id not in live_ids:
+                    del self._token_counts[message_id]
+        return updates
+
+    def _truncate_tool_result(self, message: ToolMessage) -> ToolMessage:
+        if not isinstance(message.content, str):
+            return message
+        limit = self.policy.tool_result_max_tokens
+        truncated = truncate_to_tokens(message.content, limit)
+        if truncated is message.content:
+            return message
+        return message.model_copy(update={"content": truncated})
+
+    def stats(self) -> Dict[str, Any]:
+        """Token size of the history after the last compaction, and turns evicted."""
+        with self._lock:
+            return {
+                "context_tokens": self.context_tokens,
+                "evicted_turns": self.evicted_turns,
+            }
+
+
+def split_turns(
+    messages: Sequence[BaseMessage],
+) -> Tuple[List[BaseMessage], Optional[BaseMessage], List[List[BaseMessage]]]:
+    """Splits a history into pinned leading messages, the summary and turns.
+
+    Returns:
+        The messages before the first human message (e.g. the system
+        prompt), the rolling summary message if present, and the turns, each
+        starting at a human message.
+    """
+    pinned: List[BaseMessage] = []
+    summary: Optional[BaseMessage] = None
+    turns: List[List[BaseMessage]] = []
+    for message in messages:
+        if message.id == SUMMARY_MESSAGE_ID:
+            summary = message
+        elif isinstance(message, HumanMessage):
+            turns.append([message])
+        elif turns:
+            turns[-1].append(message)
+        else:
+            pinned.append(message)
+    return pinned, summary, turns
@@ -0,0 +1,234 @@
+"""
+Batch runner that applies prompt configs to a whole directory of documents.
+
+Each (document, prompt config) pair is one task. Tasks run on a bounded
+thread pool, outputs are written as soon as each task finishes, and finished
+pairs are appended to a JSONL manifest so an interrupted run can be resumed.
+"""
+
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple, Union
+
+from langchain_core.messages import BaseMessage, HumanMessage
+from langchain_core.runnables import Runnable
+
+from llm import get_llm
+from paths import CONFIG_FILE_PATH, OUTPUTS_DIR, PROMPT_CONFIG_FILE_PATH
+from prompt_builder import build_prompt_within_budget, compile_prompt
+from tokens import count_tokens
+from utils import load_yaml_config, save_text_to_file
+
+CORPUS_OUTPUTS_DIR = os.path.join(OUTPUTS_DIR, "corpus")
+MANIFEST_FILENAME = "manifest.jsonl"
+
+
+@dataclass
+class CorpusReport:
+    """Summary of a corpus run."""
+
+    completed: int
+    skipped: int
+    failed: int
+    elapsed_seconds: float
+    input_tokens: int
+    output_tokens: int
+    configs: int
+
+    @property
+    def docs_per_minute(self) -> float:
+        minutes = self.elapsed_seconds / 60
+        return self.completed / max(self.configs, 1) / minutes if minutes else 0.0
+
+    @property
+    def tokens_per_minute(self) -> float:
+        minutes = self.elapsed_seconds / 60
+        total = self.input_tokens + self.output_tokens
+        return total / minutes if minutes else 0.0
+
+    def print_summary(self) -> None:
+        print("=" * 60)
+        print(
+            f"Completed {self.completed}, skipped {self.skipped} (already done), "
+            f"failed {self.failed} in {self.elapsed_seconds:.1f}s"
+        )
+        print(
+            f"Throughput: {self.docs_per_minute:.1f} docs/min, "
+            f"{self.tokens_per_minute:.0f} tokens/min "
+            f"({self.input_tokens} in / {self.output_tokens} out)"
+        )
+        print("=" * 60)
+
+
+def load_manifest(manifest_path: Union[str, Path]) -> Set[Tuple[str, str]]:
+    """Returns the (document, config key) pairs recorded as finished."""
+    done = set()
+    if not os.path.exists(manifest_path):
+        return done
+    with open(manifest_path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue  # a torn final line from an interrupted run
+            done.add((entry["doc"], entry["config"]))
+    return done
+
+
+def build_llm_input(
+    prompt_config: Dict[str, Any], content: str, app_config: Dict[str, Any]
+) -> Union[str, List[BaseMessage]]:
+    """Builds the model input the same way the single-document runner does."""
+    if token_budget := app_config.get("prompt_token_budget"):
+        budgeted = build_prompt_within_budget(
+            prompt_config, content, app_config, token_budget
+        )
+        prompt, messages = budgeted.prompt, budgeted.messages
+    else:
+        compiled = compile_prompt(prompt_config, app_config)
+        prompt = compiled.render(input_data=content)
+        messages = compiled.render_messages(input_data=content)
+    return messages if app_config.get("prompt_cache_layout") else prompt
+
+
+def _count_usage(messages: List[BaseMessage], response: Any) -> Tuple[int, int]:
+    """Returns (input, output) tokens, estimating when the model reports none."""
+    usage = getattr(response, "usage_metadata", None)
+    if usage:
+        return usage.get("input_tokens", 0), usage.get("output_tokens", 0)
+    input_text = "\n\n".join(str(m.content) for m in messages)
+    return count_tokens(input_text), count_tokens(str(response.content))
+
+
+def run_corpus(
+    corpus_dir: Union[str, Path],
+    prompt_config_keys: Optional[List[str]] = None,
+    output_dir: Union[str, Path] = CORPUS_OUTPUTS_DIR,
+    max_workers: int = 8,
+    pattern: str = "*.md",
+    llm: Optional[Runnable] = None,
+    app_config: Optional[Dict[str, Any]] = None,
+) -> CorpusReport:
+    """Runs every selected prompt config against every document in a directory.
+
+    Args:
+        corpus_dir: Directory searched recursively for documents.
+        prompt_config_keys: Keys from prompt_config.yaml; all keys when None.
+        output_dir: Where responses and the progress manifest are written.
+        max_workers: Maximum number of concurrent LLM calls.
+        pattern: Glob pattern selecting documents.
+        llm: Chat model to use; built from the app config's `llm` when None.
+        app_config: Application config; loaded from config.yaml when None.
+
+    Returns:
+        A `CorpusReport` with counts and throughput.
+
+    Raises:
+        ValueError: If a requested prompt config key does not exist.
+    """
+    corpus_dir = Path(corpus_dir)
+    output_dir = Path(output_dir)
+    if app_config is None:
+        app_config = load_yaml_config(CONFIG_FILE_PATH)
+    all_prompts_config = load_yaml_config(PROMPT_CONFIG_FILE_PATH)
+    prompt_config_keys = prompt_config_keys or list(all_prompts_config)
+    missing = [key for key in prompt_config_keys if key not in all_prompts_config]
+    if missing:
+        raise ValueError(f"Unknown prompt config keys: {missing}")
+    if llm is None:
+        llm = get_llm(app_config["llm"], temperature=0.0)
+
+    manifest_path = output_dir / MANIFEST_FILENAME
+    done = load_manifest(manifest_path)
+    documents = sorted(p for p in corpus_dir.rglob(pattern) if p.is_file())
+    tasks = [
+        (doc, key)
+        for doc in documents
+        for key in prompt_config_keys
+        if (doc.relative_to(corpus_dir).as_posix(), key) not in done
+    ]
+    skipped = len(documents) * len(prompt_config_keys) - len(tasks)
+    print(
+        f"{len(documents)} documents x {len(prompt_config_keys)} configs: "
+        f"{len(tasks)} to run, {skipped} already done"
+    )
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+    totals = {"completed": 0, "failed": 0, "input_tokens": 0, "output_tokens": 0}
+
+    def run_task(doc: Path, key: str) -> Dict[str, Any]:
+        started = time.perf_counter()
+        content = doc.read_text(encoding="utf-8")
+        llm_input = build_llm_input(all_prompts_config[key], content, app_config)
+        if isinstance(llm_input, str):
+            llm_input = [HumanMessage(content=llm_input)]
+        response = llm.invoke(llm_input)
+        input_tokens, output_tokens = _count_usage(llm_input, response)
+
+        rel_doc = doc.relative_to(corpus_dir).as_posix()
+        output_path = output_dir / key / f"{rel_doc}.response.md"
+        save_text_to_file(
+            str(response.content), output_path, header=f"{key} response for {rel_doc}"
+        )
+        return {
+            "doc": rel_doc,
+            "config": key,
+            "output": output_path.relative_to(output_dir).as_posix(),
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "seconds": round(time.perf_counter() - started, 3),
+        }
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max_workers) as executor, open(
+        manifest_path, "a", encoding="utf-8"
+    ) as manifest:
+        futures = {
+            executor.submit(run_task, doc, key): (doc, key) for doc, key in tasks
+        }
+        for future in as_completed(futures):
+            doc, key = futures[future]
+            try:
+                entry = future.result()
+            except Exception as e:
+                totals["failed"] += 1
+                print(f"✗ {doc} [{key}]: {e}")
+                continue
+            # Only this thread writes the manifest; flush so a crash keeps it
+            manifest.write(json.dumps(entry) + "\n")
+            manifest.flush()
+            totals["completed"] += 1
+            totals["input_tokens"] += entry["input_tokens"]
+            totals["output_tokens"] += entry["output_tokens"]
+
+    return CorpusReport(
+        completed=totals["completed"],
+        skipped=skipped,
+        failed=totals["failed"],
+        elapsed_seconds=time.perf_counter() - start,
+        input_tokens=totals["input_tokens"],
+        output_tokens=totals["output_tokens"],
+        configs=len(prompt_config_keys),
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("corpus_dir", help="Directory of markdown documents")
+    parser.add_argument("--configs", nargs="*", help="Prompt config keys (default all)")
+    parser.add_argument("--output-dir", default=CORPUS_OUTPUTS_DIR)
+    parser.add_argument("--workers", type=int, default=8)
+    args = parser.parse_args()
+
+    report = run_corpus(
+        args.corpus_dir,
+        prompt_config_keys=args.configs,
+        output_dir=args.output_dir,
+        max_workers=args.workers,
+    )
+    report.print_summary()
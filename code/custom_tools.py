@@ -1,19 +1,41 @@
 import os
-import shutil
 import zipfile
 import requests
-from typing import List
-from paths import DATA_DIR
+from typing import Any, Dict, List
+from file_index import get_index
+from file_reads import DEFAULT_MAX_READ_BYTES, read_file_slice
 from langchain_core.tools import tool
+from repo_cache import get_repo_cache
+from repo_download import RepoNotFound, normalize_repo_url
+from tool_cache import cache_policy
+from zip_extract import ArchiveTooLarge
 
+
+# Upper bound on `limit` for file-reading tools, whatever the model asks for.
+MAX_READ_BYTES = 64 * 1024
+
+
+def _normalize_repo_url(args: Dict[str, Any]) -> str:
+    """Cache key for a repo download: the URL without `.git` or trailing `/`."""
+    return normalize_repo_url(args["repo_url"]).lower()
+
+
+def _extracted_dir_exists(args: Dict[str, Any], result: Any) -> bool:
+    """A cached download is reusable until its repo is evicted from disk."""
+    return bool(result) and os.path.isdir(result)
+
+
+# Short TTL so the repo cache still revalidates against the server
+@cache_policy(ttl_seconds=300, key=_normalize_repo_url, validate=_extracted_dir_exists)
 @tool
 def download_and_extract_repo(repo_url: str) -> str:
     """Download a Git repository and extract it to a local directory.
 
     This tool downloads a Git repository as a ZIP file from GitHub or similar
-    platforms and extracts it to a './data/repo' directory. It handles both 'main'
-    and 'master' branch repositories automatically. If the repo directory
-    already exists, it will be removed and replaced with the new download.
+    platforms and extracts it to its own directory in a local repository
+    cache. It handles both 'main' and 'master' branch repositories
+    automatically. A repository that is already cached and unchanged on the
+    server is not downloaded again.
 
     Args:
         repo_url: The complete URL of the Git repository (e.g., https://github.com/user/repo)
@@ -21,116 +43,57 @@ def download_and_extract_repo(repo_url: str) -> str:
     Returns:
         The path to the extracted repository directory if successful, or False if failed
     """
-    output_dir = os.path.join(DATA_DIR, "repo")
     try:
-        if os.path.exists(output_dir):
-            print(f"Repository already exists in {output_dir}, removing it")
-            shutil.rmtree(output_dir)
-
-        # Create target directory
-        os.makedirs(output_dir, exist_ok=True)
-
-        # Convert repo URL to zip download URL
-        if repo_url.endswith(".git"):
-            repo_url = repo_url[:-4]
-        if repo_url.endswith("/"):
-            repo_url = repo_url[:-1]
-
-        download_url = f"{repo_url}/archive/refs/heads/main.zip"
-
-        print(f"Downloading repository from {download_url}")
-
-        retires = 3
-        i = 0
-        while i < retires:
-            response = requests.get(download_url, stream=True)
-            if response.status_code == 404:
-                download_url = f"{repo_url}/archive/refs/heads/master.zip"
-                response = requests.get(download_url, stream=True)
-
-            if response.status_code != 200:
-                print(f"Failed to download repository: {response.status_code}")
-                i += 1
-                continue
-
-            response.raise_for_status()
-            break
-
-        temp_dir = os.path.join(output_dir, "_temp_extract")
-        os.makedirs(temp_dir, exist_ok=True)
-
-        temp_zip = os.path.join(temp_dir, "repo.zip")
-        with open(temp_zip, "wb") as f:
-            for chunk in response.iter_content(chunk_size=8192):
-                f.write(chunk)
-
-        with zipfile.ZipFile(temp_zip, "r") as zip_ref:
-            zip_ref.extractall(temp_dir)
-
-        # Find the nested directory (it's usually named 'repo-name-main')
-        nested_dirs = [
-            d for d in os.listdir(temp_dir) if os.path.isdir(os.path.join(temp_dir, d))
-        ]
-        if nested_dirs:
-            nested_dir = os.path.join(temp_dir, nested_dirs[0])
-
-            for item in os.listdir(nested_dir):
-                source = os.path.join(nested_dir, item)
-                destination = os.path.join(output_dir, item)
-                if os.path.isdir(source):
-                    shutil.copytree(source, destination)
-                else:
-                    shutil.copy2(source, destination)
-
-        shutil.rmtree(temp_dir)
-
-        return output_dir
-
-    except requests.exceptions.RequestException as e:
+        return get_repo_cache().get(repo_url)
+
+    except (RepoNotFound, requests.exceptions.RequestException) as e:
         print(f"Failed to download repository: {str(e)}")
-        if os.path.exists(output_dir):
-            shutil.rmtree(output_dir)
         return False
 
     except zipfile.BadZipFile as e:
         print(f"Invalid zip file: {str(e)}")
-        if os.path.exists(output_dir):
-            shutil.rmtree(output_dir)
+        return False
+
+    except ArchiveTooLarge as e:
+        print(f"Repository too large: {str(e)}")
         return False
 
     except OSError as e:
         print(f"OS error occurred: {str(e)}")
-        if os.path.exists(output_dir):
-            shutil.rmtree(output_dir)
         return False
 
     except Exception as e:
         print(f"Unexpected error occurred: {str(e)}")
-        if os.path.exists(output_dir):
-            shutil.rmtree(output_dir)
         return False
-    
 
 
+# Returns file contents (secrets): never cached, so never written to disk
+@cache_policy(cacheable=False)
 @tool
-def env_content(dir_path: str) -> str:
+def env_content(
+    dir_path: str, offset: int = 0, limit: int = DEFAULT_MAX_READ_BYTES
+) -> str:
     """Read and return the content of a .env file from a specified directory.
 
     This tool searches through the given directory path and its subdirectories
-    to find a .env file and returns its complete content. Useful for examining
-    environment variables and configuration settings.
+    (skipping folders such as .git and node_modules) to find a .env file and
+    returns its content. Useful for examining environment variables and
+    configuration settings. Large files are returned a page at a time; a
+    truncated page ends with a note giving the offset to continue from.
 
     Args:
         dir_path: The directory path to search for .env file (must be a local path, not URL)
+        offset: Byte offset to start reading from (0 for the beginning)
+        limit: Maximum number of bytes to return
 
     Returns:
-        The complete content of the .env file as a string, or None if not found
+        The content of the .env file as a string, or None if not found
     """
-    for dir, _, files in os.walk(dir_path):
-        for file in files:
-            if file == ".env":
-                with open(os.path.join(dir, file), "r") as f:
-                    return f.read()
+    limit = min(max(1, limit), MAX_READ_BYTES)
+    # The shared index is only rebuilt when the tree has changed
+    index = get_index(dir_path)
+    for path in index.find_name(".env"):
+        return read_file_slice(index.absolute(path), offset, limit).with_marker()
     return None
 
 
@@ -0,0 +1,52 @@
+"""
+One long-lived event loop for running async LLM code from synchronous code.
+
+The async HTTP clients shared by every chat model (see
+`llm.get_async_http_client`) keep pooled keep-alive connections bound to the
+event loop they were first used on. `asyncio.run` creates and closes a fresh
+loop per call, so the second call would reuse connections of a closed loop
+("Event loop is closed"). `run_sync` instead runs every coroutine on the same
+background loop, which lives for the whole process.
+"""
+
+import asyncio
+import threading
+from typing import Awaitable, Optional, TypeVar
+
+T = TypeVar("T")
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_thread: Optional[threading.Thread] = None
+_loop_lock = threading.Lock()
+
+
+def get_event_loop() -> asyncio.AbstractEventLoop:
+    """Returns the shared background loop, starting its thread on first use."""
+    global _loop, _loop_thread
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            _loop_thread = threading.Thread(
+                target=_loop.run_forever, name="async-llm", daemon=True
+            )
+            _loop_thread.start()
+        return _loop
+
+
+def run_sync(coro: Awaitable[T]) -> T:
+    """Runs a coroutine on the shared loop and blocks until it finishes.
+
+    Args:
+        coro: Coroutine to run.
+
+    Returns:
+        The coroutine's result.
+
+    Raises:
+        RuntimeError: If called from the shared loop's own thread, which
+            would deadlock; await the coroutine there instead.
+    """
+    loop = get_event_loop()
+    if threading.current_thread() is _loop_thread:
+        raise RuntimeError("run_sync() called from the shared event loop thread")
+    return asyncio.run_coroutine_threadsafe(coro, loop).result()
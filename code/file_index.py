@@ -0,0 +1,170 @@
+"""
+Cached directory index shared by the file-oriented tools.
+
+`DirectoryIndex` walks a tree once with `os.scandir` and indexes every file
+by name and extension, so lookups are dictionary hits instead of a fresh
+`os.walk` per tool call. It records the mtime of every directory it indexed;
+creating, deleting or renaming a file changes its parent's mtime, so
+`get_index` can tell a stale index apart with one `stat` per directory and
+rebuild it only then. Heavy directories such as `.git` and `node_modules`
+are skipped by default.
+"""
+
+import bisect
+import fnmatch
+import os
+import threading
+from collections import OrderedDict, defaultdict
+from typing import Collection, Dict, List, Optional, Tuple
+
+DEFAULT_SKIP_DIRS = frozenset(
+    {
+        ".git", ".hg", ".svn", "node_modules", "__pycache__", ".venv", "venv",
+        ".tox", ".nox", ".mypy_cache", ".pytest_cache", ".ruff_cache",
+    }
+)
+
+# Distinct directory trees kept indexed at once.
+MAX_CACHED_INDEXES = 16
+
+_GLOB_CHARS = frozenset("*?[")
+
+
+def _depth_order(path: str) -> Tuple[int, str]:
+    """Sorts shallower paths first, as a top-down walk would find them."""
+    return path.count(os.sep), path
+
+
+class DirectoryIndex:
+    """Files under a directory, indexed by name and extension.
+
+    Paths are relative to `root` and use the platform separator.
+
+    Args:
+        root: Directory to index.
+        skip_dirs: Directory names that are not descended into.
+    """
+
+    def __init__(self, root: str, skip_dirs: Collection[str] = DEFAULT_SKIP_DIRS):
+        self.root = os.path.abspath(root)
+        self.skip_dirs = frozenset(skip_dirs)
+        self.paths: List[str] = []
+        self.by_name: Dict[str, List[str]] = defaultdict(list)
+        self.by_extension: Dict[str, List[str]] = defaultdict(list)
+        # absolute directory path -> mtime_ns when indexed
+        self.dir_mtimes: Dict[str, int] = {}
+        self._build()
+
+    def _build(self) -> None:
+        stack = [self.root]
+        while stack:
+            directory = stack.pop()
+            try:
+                self.dir_mtimes[directory] = os.stat(directory).st_mtime_ns
+                entries = os.scandir(directory)
+            except OSError:
+                continue
+            with entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if entry.name not in self.skip_dirs:
+                                stack.append(entry.path)
+                        elif entry.is_file():
+                            relative = entry.path[len(self.root) + 1 :]
+                            self.paths.append(relative)
+                            self.by_name[entry.name].append(relative)
+                            extension = os.path.splitext(entry.name)[1].lower()
+                            self.by_extension[extension].append(relative)
+                    except OSError:
+                        continue
+        self.paths.sort()
+        for groups in (self.by_name, self.by_extension):
+            for group in groups.values():
+                group.sort(key=_depth_order)
+        self.by_name = dict(self.by_name)
+        self.by_extension = dict(self.by_extension)
+
+    def __len__(self) -> int:
+        return len(self.paths)
+
+    def is_stale(self) -> bool:
+        """Whether any indexed directory changed or disappeared since indexing."""
+        for directory, mtime in self.dir_mtimes.items():
+            try:
+                if os.stat(directory).st_mtime_ns != mtime:
+                    return True
+            except OSError:
+                return True
+        return False
+
+    def find_name(self, name: str) -> List[str]:
+        """Files with exactly this name, shallowest first."""
+        return list(self.by_name.get(name, ()))
+
+    def find_extension(self, extension: str) -> List[str]:
+        """Files with this extension (e.g. ".py"), shallowest first."""
+        if extension and not extension.startswith("."):
+            extension = "." + extension
+        return list(self.by_extension.get(extension.lower(), ()))
+
+    def find_prefix(self, prefix: str) -> List[str]:
+        """Files under a relative directory, in path order."""
+        prefix = prefix.rstrip(os.sep) + os.sep if prefix else ""
+        start = bisect.bisect_left(self.paths, prefix)
+        end = bisect.bisect_left(self.paths, prefix + "\U0010ffff")
+        return self.paths[start:end]
+
+    def glob(self, pattern: str) -> List[str]:
+        """Files whose name matches a glob pattern, shallowest first.
+
+        A plain name or a `*.ext` pattern is a dictionary lookup; other
+        patterns are matched against the distinct file names only.
+        """
+        if not _GLOB_CHARS.intersection(pattern):
+            return self.find_name(pattern)
+        stem, extension = os.path.splitext(pattern)
+        if stem == "*" and not _GLOB_CHARS.intersection(extension):
+            return self.find_extension(extension)
+        matches = []
+        for name, group in self.by_name.items():
+            if fnmatch.fnmatch(name, pattern):
+                matches.extend(group)
+        matches.sort(key=_depth_order)
+        return matches
+
+    def absolute(self, relative_path: str) -> str:
+        return os.path.join(self.root, relative_path)
+
+
+_indexes: "OrderedDict[Tuple[str, frozenset], DirectoryIndex]" = OrderedDict()
+_indexes_lock = threading.Lock()
+
+
+def get_index(
+    root: str, skip_dirs: Optional[Collection[str]] = None
+) -> DirectoryIndex:
+    """Returns the shared index of a directory, rebuilding it if stale.
+
+    Args:
+        root: Directory to index.
+        skip_dirs: Directory names not descended into; `DEFAULT_SKIP_DIRS`
+            when None.
+
+    Returns:
+        An up-to-date `DirectoryIndex`.
+    """
+    key = (os.path.abspath(root), frozenset(skip_dirs or DEFAULT_SKIP_DIRS))
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is not None:
+            _indexes.move_to_end(key)
+    if index is not None and not index.is_stale():
+        return index
+    index = DirectoryIndex(*key)
+    with _indexes_lock:
+        _indexes[key] = index
+        _indexes.move_to_end(key)
+        while len(_indexes) > MAX_CACHED_INDEXES:
+            _indexes.popitem(last=False)
+    return index
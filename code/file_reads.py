@@ -0,0 +1,107 @@
+"""
+Bounded, paged reads of text files for tools that return file contents.
+
+A tool result ends up verbatim in the model's context, so file-returning
+tools read at most a byte budget per call through an `mmap` (only the
+requested pages are faulted in, however large the file) and end a cut-off
+read with a marker telling the model which `offset` continues it.
+`iter_file_chunks` streams a whole file for callers that process it rather
+than return it.
+"""
+
+import mmap
+import os
+from typing import Iterator, NamedTuple
+
+# Default byte budget for one tool read.
+DEFAULT_MAX_READ_BYTES = 16 * 1024
+
+DEFAULT_CHUNK_BYTES = 1 << 20
+
+CONTINUATION_MARKER = (
+    "\n[... truncated {remaining} of {size} bytes;"
+    " read on with offset={next_offset} ...]"
+)
+
+
+class FileSlice(NamedTuple):
+    """A window of a file, decoded as UTF-8."""
+
+    text: str
+    offset: int
+    # Offset just past the returned bytes; equals `size` at end of file
+    next_offset: int
+    size: int
+
+    @property
+    def truncated(self) -> bool:
+        return self.next_offset < self.size
+
+    def with_marker(self) -> str:
+        """The text, plus a continuation marker if the file goes on."""
+        if not self.truncated:
+            return self.text
+        return self.text + CONTINUATION_MARKER.format(
+            remaining=self.size - self.next_offset,
+            size=self.size,
+            next_offset=self.next_offset,
+        )
+
+
+def _char_boundary(data, end: int, start: int) -> int:
+    """Moves `end` back off UTF-8 continuation bytes so no character is split.
+
+    Returns 0 if that would leave nothing after `start`.
+    """
+    while end < len(data) and data[end] & 0xC0 == 0x80:
+        end -= 1
+        if end <= start:
+            return 0
+    return end
+
+
+def read_file_slice(
+    path: str, offset: int = 0, limit: int = DEFAULT_MAX_READ_BYTES
+) -> FileSlice:
+    """Reads at most `limit` bytes of a file starting at `offset`.
+
+    The file is memory-mapped, so only the pages in the window are read. The
+    window is shortened to end on a UTF-8 character boundary, and invalid
+    bytes are replaced rather than raising.
+
+    Args:
+        path: File to read.
+        offset: Byte offset to start at; clamped to the file size.
+        limit: Maximum bytes to return.
+
+    Returns:
+        The decoded window and where the next one starts.
+    """
+    size = os.path.getsize(path)
+    offset = min(max(0, offset), size)
+    end = min(size, offset + max(0, limit))
+    if offset == end:
+        # mmap can't map an empty file
+        return FileSlice("", offset, end, size)
+    with open(path, "rb") as f:
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    with data:
+        # A window too small for one character is returned as is
+        end = _char_boundary(data, end, offset) or end
+        text = data[offset:end].decode("utf-8", errors="replace")
+    return FileSlice(text, offset, end, size)
+
+
+def iter_file_chunks(
+    path: str, chunk_bytes: int = DEFAULT_CHUNK_BYTES, offset: int = 0
+) -> Iterator[FileSlice]:
+    """Yields a file as consecutive decoded slices of about `chunk_bytes`.
+
+    Holds at most one chunk in memory, whatever the file size.
+    """
+    while True:
+        chunk = read_file_slice(path, offset, chunk_bytes)
+        if chunk.next_offset == chunk.offset:
+            return
+        yield chunk
+        offset = chunk.next_offset
@@ -1,9 +1,13 @@
-from typing import Annotated, List, Literal
-from operator import add
-from pydantic import BaseModel
+from typing import Annotated, Callable, Literal, Optional
+from pydantic import BaseModel, Field
 from pyjokes import get_joke
 from langgraph.graph import StateGraph, START, END
 from langgraph.graph.state import CompiledStateGraph
+from langchain_core.runnables import RunnableConfig
+from langgraph.types import Checkpointer
+from joke_history import Joke, JokeHistory, add_jokes
+from joke_store import get_joke_store
+from session_io import CONSOLE_IO, SessionIO, get_session_io
 
 
 
@@ -11,15 +15,12 @@ from langgraph.graph.state import CompiledStateGraph
 # Define State
 # ===================
 
-class Joke(BaseModel):
-    text: str
-    category: str
-
 class JokeState(BaseModel):
     """
     Represents the evolving state of the joke bot.
     """
-    jokes: Annotated[List[Joke], add] = []
+    # Appended in place by add_jokes, so each new joke is O(1)
+    jokes: Annotated[JokeHistory, add_jokes] = Field(default_factory=JokeHistory)
     jokes_choice: Literal["n", "c", "q"] = "n" # next joke, change category, or quit
     category: str = "neutral"
     language: str = "en"
@@ -30,77 +31,93 @@ class JokeState(BaseModel):
 # Utilities
 # ===================
 
-def get_user_input(prompt: str) -> str:
-    return input(prompt).strip().lower()
+def get_user_input(prompt: str, io: SessionIO = CONSOLE_IO) -> str:
+    return io.read(prompt).strip().lower()
 
-def print_joke(joke: Joke):
+def print_joke(joke: Joke, io: SessionIO = CONSOLE_IO):
     """Print a joke with nice formatting."""
     # print(f"\n📂 CATEGORY: {joke.category.upper()}\n")
-    print(f"\n😂 {joke.text}\n")
-    print("=" * 60)
+    io.write(f"\n😂 {joke.text}\n")
+    io.write("=" * 60)
 
-def print_menu_header(category: str, total_jokes: int):
+def print_menu_header(category: str, total_jokes: int, io: SessionIO = CONSOLE_IO):
     """Print a compact menu header."""
-    print(f"🎭 Menu | Category: {category.upper()} | Jokes: {total_jokes}")
-    print("-" * 50)
+    io.write(f"🎭 Menu | Category: {category.upper()} | Jokes: {total_jokes}")
+    io.write("-" * 50)
 
-def print_category_menu():
+def print_category_menu(io: SessionIO = CONSOLE_IO):
     """Print a nicely formatted category selection menu."""
-    print("📂" + "=" * 58 + "📂")
-    print("    CATEGORY SELECTION")
-    print("=" * 60)
+    io.write("📂" + "=" * 58 + "📂")
+    io.write("    CATEGORY SELECTION")
+    io.write("=" * 60)
 
 
 # ===================
 # Define Nodes
 # ===================
 
-def show_menu(state: JokeState) -> dict:
-    print_menu_header(state.category, len(state.jokes))
-    print("Pick an option:")
-    user_input = get_user_input("[n] 🎭 Next Joke  [c] 📂 Change Category  [q] 🚪 Quit\nUser Input: ")
+# Nodes take the run config so input/output can be injected per session
+# through config["configurable"]["io"] (see session_io.py).
+
+def show_menu(state: JokeState, config: Optional[RunnableConfig] = None) -> dict:
+    io = get_session_io(config)
+    print_menu_header(state.category, len(state.jokes), io)
+    io.write("Pick an option:")
+    user_input = get_user_input("[n] 🎭 Next Joke  [c] 📂 Change Category  [q] 🚪 Quit\nUser Input: ", io)
     while user_input not in ["n", "c", "q"]:
-        print("❌ Invalid input. Please try again.")
-        user_input = get_user_input("[n] 🎭 Next Joke  [c] 📂 Change Category  [q] 🚪 Quit\nUser Input: ")
+        io.write("❌ Invalid input. Please try again.")
+        user_input = get_user_input("[n] 🎭 Next Joke  [c] 📂 Change Category  [q] 🚪 Quit\nUser Input: ", io)
     return {"jokes_choice": user_input}
 
 
-def fetch_joke(state: JokeState) -> dict:
-    joke_text = get_joke(language=state.language, category=state.category)
-    new_joke = Joke(text=joke_text, category=state.category)
-    print(new_joke)
-    return {"jokes": [new_joke]} # LangGraph will use the add reducer to append this
+def make_fetch_joke(joke_source: Callable[..., str] = get_joke):
+    """
+    Returns a fetch_joke node drawing from joke_source, any function with
+    the signature of pyjokes.get_joke (e.g. JokeStore.get_joke).
+    """
+    def fetch_joke(state: JokeState, config: Optional[RunnableConfig] = None) -> dict:
+        joke_text = joke_source(language=state.language, category=state.category)
+        new_joke = Joke(text=joke_text, category=state.category)
+        get_session_io(config).write(str(new_joke))
+        return {"jokes": [new_joke]} # LangGraph will use the add_jokes reducer to append this
+
+    return fetch_joke
+
+
+fetch_joke = make_fetch_joke()
 
 
-def update_category(state: JokeState) -> dict:
+def update_category(state: JokeState, config: Optional[RunnableConfig] = None) -> dict:
+    io = get_session_io(config)
     categories = ["neutral", "chuck", "all"]
-    print_category_menu()
+    print_category_menu(io)
 
     for i, cat in enumerate(categories):
         emoji = "🎯" if cat == "neutral" else "🥋" if cat == "chuck" else "🌟"
-        print(f" {i}.{emoji} {cat.upper()}")
+        io.write(f" {i}.{emoji} {cat.upper()}")
     
-    print("=" * 60)
+    io.write("=" * 60)
 
     try:
-        selection = int(get_user_input("     Enter category number: "))
+        selection = int(get_user_input("     Enter category number: ", io))
         if 0 <= selection < len(categories):
             selected_category = categories[selection]
-            print(f"    ✅ Category changed to: {selected_category.upper()}")
+            io.write(f"    ✅ Category changed to: {selected_category.upper()}")
             return {"category": selected_category}
         else:
-            print("    ❌ Invalid choice. Keeping current category.")
+            io.write("    ❌ Invalid choice. Keeping current category.")
             return {}
     except ValueError:
-        print("    ❌ Please enter a valid number. Keeping current category.")
+        io.write("    ❌ Please enter a valid number. Keeping current category.")
         return {}
     
 
 
-def exit_bot(state: JokeState) -> dict:
-    print("\n" + "🚪" + "=" * 58 + "🚪")
-    print("    GOODBYE!")
-    print("=" * 60)
+def exit_bot(state: JokeState, config: Optional[RunnableConfig] = None) -> dict:
+    io = get_session_io(config)
+    io.write("\n" + "🚪" + "=" * 58 + "🚪")
+    io.write("    GOODBYE!")
+    io.write("=" * 60)
     return {"quit": True}
 
 
@@ -125,11 +142,22 @@ def route_choice(state: JokeState) -> str:
 # Build Graph
 # ===================
 
-def build_joke_graph() -> CompiledStateGraph:
+def build_joke_graph(
+    checkpointer: Checkpointer = None,
+    joke_source: Optional[Callable[..., str]] = None,
+) -> CompiledStateGraph:
+    """
+    Builds the joke bot graph. Pass a checkpointer to run several sessions
+    against one compiled graph, each with its own thread_id. joke_source
+    replaces pyjokes.get_joke, e.g. with the non-repeating
+    get_joke_store().get_joke.
+    """
     workflow = StateGraph(JokeState)
 
     workflow.add_node("show_menu", show_menu)
-    workflow.add_node("fetch_joke", fetch_joke)
+    workflow.add_node(
+        "fetch_joke", make_fetch_joke(joke_source) if joke_source else fetch_joke
+    )
     workflow.add_node("update_category", update_category)
     workflow.add_node("exit_bot", exit_bot)
 
@@ -149,7 +177,7 @@ def build_joke_graph() -> CompiledStateGraph:
     workflow.add_edge("update_category", "show_menu")
     workflow.add_edge("exit_bot", END)
 
-    return workflow.compile()
+    return workflow.compile(checkpointer=checkpointer)
 
 
 # ===================
@@ -162,7 +190,7 @@ def main():
     print("    This example demonstrates agentic state flow without LLMs")
     print("=" * 60 + "\n")
 
-    graph = build_joke_graph()
+    graph = build_joke_graph(joke_source=get_joke_store().get_joke)
 
     # print("\n📊 === MERMAID DIAGRAM ===")
     # print(graph.get_graph().draw_mermaid())
@@ -1,26 +1,29 @@
-from typing import Annotated, List, Literal, Optional
-from operator import add
-from pydantic import BaseModel
+from typing import Annotated, Literal, Optional
+from pydantic import BaseModel, Field
 from pyjokes import get_joke
 from langgraph.graph import StateGraph, START, END
 from langgraph.graph.state import CompiledStateGraph
+from langgraph.types import Checkpointer
 from langchain_core.prompts import PromptTemplate
-from langchain_groq import ChatGroq
+from langchain_core.runnables import RunnableConfig
 from dotenv import load_dotenv
+from joke_history import Joke, JokeHistory, add_jokes
+from llm import get_llm
+from session_io import get_session_io
+from streaming import stream_graph
+from writer_critic import make_parallel_node, race_candidates
 load_dotenv()
 
 
-llm_writer = ChatGroq(model="openai/gpt-oss-20b", temperature=0.7)
-llm_critic = ChatGroq(model="openai/gpt-oss-20b", temperature=0.0)
+llm_writer = get_llm("openai/gpt-oss-20b", temperature=0.7)
+# Deterministic, so repeated verdicts are served from the response cache
+llm_critic = get_llm("openai/gpt-oss-20b", temperature=0.0)
 
 
-class Joke(BaseModel):
-    text: str
-    category: str
-
 class JokeState(BaseModel):
     # existing
-    jokes: Annotated[List[Joke], add] = []
+    # Appended in place by add_jokes, so each new joke is O(1)
+    jokes: Annotated[JokeHistory, add_jokes] = Field(default_factory=JokeHistory)
     jokes_choice: Literal["n", "c", "q"] = "n"  # next joke, change category, or quit
     category: str = "neutral"
     language: str = "en"
@@ -33,8 +36,9 @@ class JokeState(BaseModel):
     max_retries: int = 5
 
 
-def show_menu(state: JokeState) -> dict:
-    user_input = input("[n] Next  [c] Category  [q] Quit\n> ").strip().lower()
+def show_menu(state: JokeState, config: Optional[RunnableConfig] = None) -> dict:
+    io = get_session_io(config)
+    user_input = io.read("[n] Next  [c] Category  [q] Quit\n> ").strip().lower()
     return {"jokes_choice": user_input}
 
 
@@ -57,27 +61,67 @@ def critic(state: JokeState) -> dict:
     if not state.latest_joke:
         return {"approved": False}
 
-    critic_prompt = (
-        build_prompt("critic", state.category, state.language)
+    critic_prompt = build_critic_prompt(
+        state.latest_joke, state.category, state.language
+    )
+    response = llm_critic.invoke(critic_prompt)
+    return {"approved": parse_verdict(response.content)}
+
+
+def build_critic_prompt(joke: str, category: str, language: str) -> str:
+    return (
+        build_prompt("critic", category, language)
         + "\n\nJOKE:\n"
-        + state.latest_joke
+        + joke
         + "\n\nAnswer with APPROVE or REJECT only."
     )
-    response = llm_critic.invoke(critic_prompt)
-    verdict = (response.content or "").strip().upper()
+
+
+def parse_verdict(content: Optional[str]) -> bool:
+    verdict = (content or "").strip().upper()
     # Be defensive: normalize any extra text
     if "APPROVE" in verdict and "REJECT" not in verdict:
-        return {"approved": True}
-    if "REJECT" in verdict and "APPROVE" not in verdict:
-        return {"approved": False}
-    # Fallback: if unclear, treat as reject
-    return {"approved": False}
+        return True
+    # Rejected or unclear: treat as reject
+    return False
+
+
+async def parallel_writer_critic(state: JokeState, num_candidates: int) -> dict:
+    """
+    Writes num_candidates jokes concurrently and has the critic judge each one
+    as soon as it arrives. The first approved joke wins and the remaining
+    calls are cancelled. A round uses up num_candidates retries.
+    """
+    writer_prompt = build_prompt("writer", state.category, state.language)
+
+    async def write() -> str:
+        return ((await llm_writer.ainvoke(writer_prompt)).content or "").strip()
+
+    async def judge(joke: str) -> bool:
+        if not joke:
+            return False
+        critic_prompt = build_critic_prompt(joke, state.category, state.language)
+        return parse_verdict((await llm_critic.ainvoke(critic_prompt)).content)
+
+    joke, approved = await race_candidates(write, judge, num_candidates)
+    return {
+        "latest_joke": joke,
+        "approved": approved,
+        "retries": state.retries + num_candidates,
+    }
+
+
+def make_parallel_writer_critic(num_candidates: int):
+    async def parallel_writer(state: JokeState) -> dict:
+        return await parallel_writer_critic(state, num_candidates)
+
+    return make_parallel_node(parallel_writer)
 
 def retry_writer(state: JokeState) -> dict:
     # increment retry counter before looping back to writer
     return {"retries": state.retries + 1}
 
-def show_final_joke(state: JokeState) -> dict:
+def show_final_joke(state: JokeState, config: Optional[RunnableConfig] = None) -> dict:
     """
     Prints the approved joke (or fallback after max retries), appends to history,
     then resets evaluation fields.
@@ -87,7 +131,7 @@ def show_final_joke(state: JokeState) -> dict:
     else:
         final = state.latest_joke or "Couldn't craft a good one right now—try again!"
     new_joke = Joke(text=final, category=state.category)
-    print(new_joke)
+    get_session_io(config).write(str(new_joke))
 
     # Reset evaluation state for next cycle
     return {
@@ -98,16 +142,17 @@ def show_final_joke(state: JokeState) -> dict:
     }
 
 
-def fetch_joke(state: JokeState) -> dict:
+def fetch_joke(state: JokeState, config: Optional[RunnableConfig] = None) -> dict:
     joke_text = get_joke(language=state.language, category=state.category)
     new_joke = Joke(text=joke_text, category=state.category)
-    print(new_joke)
+    get_session_io(config).write(str(new_joke))
     return {"jokes": [new_joke]}
 
 
-def update_category(state: JokeState) -> dict:
+def update_category(state: JokeState, config: Optional[RunnableConfig] = None) -> dict:
     categories = ["neutral", "chuck", "all"]
-    selection = int(input("Select category [0=neutral, 1=chuck, 2=all]: ").strip())
+    io = get_session_io(config)
+    selection = int(io.read("Select category [0=neutral, 1=chuck, 2=all]: ").strip())
     return {
         "category": categories[selection],
         "latest_joke": None,
@@ -140,6 +185,15 @@ def route_critic_next(state: JokeState) -> str:
     return "show_final_joke"
 
 
+def route_parallel_next(state: JokeState) -> str:
+    """
+    Like route_critic_next, but the parallel node already counted its retries.
+    """
+    if state.approved or state.retries >= state.max_retries:
+        return "show_final_joke"
+    return "writer"
+
+
 def route_choice(state: JokeState) -> str:
     if state.jokes_choice == "n":
         # now routes to writer (not direct joke function)
@@ -152,7 +206,15 @@ def route_choice(state: JokeState) -> str:
 
 
 
-def build_joke_graph() -> CompiledStateGraph:
+def build_joke_graph(
+    num_candidates: int = 1, checkpointer: Checkpointer = None
+) -> CompiledStateGraph:
+    """
+    Builds the joke graph. With num_candidates > 1 the writer and critic run
+    as one parallel node that races num_candidates jokes per round instead of
+    the sequential writer -> critic loop. Pass a checkpointer to run several
+    sessions, each with its own thread_id, against one compiled graph.
+    """
     workflow = StateGraph(JokeState)
 
     # existing nodes
@@ -161,9 +223,12 @@ def build_joke_graph() -> CompiledStateGraph:
     workflow.add_node("exit_bot", exit_bot)
 
     # new nodes
-    workflow.add_node("writer", writer)
-    workflow.add_node("critic", critic)
     workflow.add_node("show_final_joke", show_final_joke)
+    if num_candidates > 1:
+        workflow.add_node("writer", make_parallel_writer_critic(num_candidates))
+    else:
+        workflow.add_node("writer", writer)
+        workflow.add_node("critic", critic)
 
     workflow.set_entry_point("show_menu")
 
@@ -178,22 +243,33 @@ def build_joke_graph() -> CompiledStateGraph:
         }
     )
 
-    # writer -> critic (always)
-    workflow.add_conditional_edges(
-        "writer",
-        route_writer_to_critic,
-        {"critic": "critic"}
-    )
+    if num_candidates > 1:
+        # parallel round -> another round or -> show_final_joke
+        workflow.add_conditional_edges(
+            "writer",
+            route_parallel_next,
+            {
+                "writer": "writer",
+                "show_final_joke": "show_final_joke"
+            }
+        )
+    else:
+        # writer -> critic (always)
+        workflow.add_conditional_edges(
+            "writer",
+            route_writer_to_critic,
+            {"critic": "critic"}
+        )
 
-    # critic -> writer (retry) or -> show_final_joke (approved or cap)
-    workflow.add_conditional_edges(
-        "critic",
-        route_critic_next,
-        {
-            "writer": "writer",
-            "show_final_joke": "show_final_joke"
-        }
-    )
+        # critic -> writer (retry) or -> show_final_joke (approved or cap)
+        workflow.add_conditional_edges(
+            "critic",
+            route_critic_next,
+            {
+                "writer": "writer",
+                "show_final_joke": "show_final_joke"
+            }
+        )
 
     # after showing a final joke, go back to menu
     workflow.add_edge("show_final_joke", "show_menu")
@@ -204,7 +280,7 @@ def build_joke_graph() -> CompiledStateGraph:
     # exit
     workflow.add_edge("exit_bot", END)
 
-    return workflow.compile()
+    return workflow.compile(checkpointer=checkpointer)
 
 
 def build_prompt(role: str, category: str, language: str) -> str:
@@ -223,9 +299,14 @@ def build_prompt(role: str, category: str, language: str) -> str:
     return ""
 
 
-def main():
-    graph = build_joke_graph()
-    final_state = graph.invoke(JokeState(), config={"recursion_limit": 200})
+def main(stream: bool = False, num_candidates: int = 1):
+    graph = build_joke_graph(num_candidates)
+    config = {"recursion_limit": 200}
+    if stream:
+        # Show writer drafts as they are generated, before the critic's verdict
+        final_state = stream_graph(graph, JokeState(), config, nodes={"writer"})
+    else:
+        final_state = graph.invoke(JokeState(), config=config)
     # print(final_state)
 
 
@@ -1,6 +1,9 @@
-from typing import Literal
+import threading
+from typing import Any, Callable, Dict, Literal, Optional
+from langchain_core.runnables import RunnableConfig
 from langgraph.graph import StateGraph, END
 from langgraph.graph.state import CompiledStateGraph
+from langgraph.types import Checkpointer
 
 from joke_bot import (
     Joke,
@@ -9,14 +12,21 @@ from joke_bot import (
     exit_bot,
     route_choice,
     print_joke,
+    print_category_menu,
+    get_user_input,
 )
 
 # import sys
 # sys.path.insert(0, '..')
-from prompt_builder import build_prompt_from_config
+from prompt_builder import compile_prompt
 from utils import load_config
 from llm import get_llm
+from llm_router import get_routed_llm
 from paths import PROMPT_CONFIG_FILE_PATH
+from joke_prefetch import JokePrefetcher
+from session_io import get_session_io
+from streaming import stream_graph
+from writer_critic import make_parallel_node, race_candidates
 
 
 
@@ -36,31 +46,147 @@ prompt_cfg = load_config(PROMPT_CONFIG_FILE_PATH)
 
 
 def make_writer_node(writer_llm):
+    # Static sections are built once; retries only render the category
+    writer_prompt = compile_prompt(prompt_cfg["joke_writer_cfg"])
+
     def writer_node(state: AgenticJokeState) -> dict:
-        config = prompt_cfg["joke_writer_cfg"]
-        prompt = build_prompt_from_config(config, input_data="", app_config=None)
-        prompt += f"\\n\\nThe category is: {state.category}"
+        prompt = writer_prompt.render(category=state.category)
         response = writer_llm.invoke(prompt)
         return {"latest_joke": response.content}
 
     return writer_node
 
+def is_approved(decision: str) -> bool:
+    return "yes" in decision.strip().lower()
+
+
 def make_critic_node(critic_llm):
+    critic_prompt = compile_prompt(prompt_cfg["joke_critic_cfg"])
+
     def critic_node(state: AgenticJokeState) -> dict:
-        config = prompt_cfg["joke_critic_cfg"]
-        prompt = build_prompt_from_config(
-            config, input_data=state.latest_joke, app_config=None
-        )
-        decision = critic_llm.invoke(prompt).content.strip().lower()
-        approved = "yes" in decision
+        prompt = critic_prompt.render(input_data=state.latest_joke)
+        approved = is_approved(critic_llm.invoke(prompt).content)
         return {"approved": approved, "retry_count": state.retry_count + 1}
 
     return critic_node
 
 
-def show_final_joke(state: AgenticJokeState) -> dict:
+def make_parallel_writer_critic_node(writer_llm, critic_llm, num_candidates: int):
+    """Writes `num_candidates` jokes at once; the first approved one wins.
+
+    Each candidate is judged as soon as it is written, and the remaining
+    writer/critic calls are cancelled once one is approved. A round counts
+    as `num_candidates` attempts towards the retry limit.
+    """
+    writer_prompt = compile_prompt(prompt_cfg["joke_writer_cfg"])
+    critic_prompt = compile_prompt(prompt_cfg["joke_critic_cfg"])
+
+    async def parallel_writer_critic(state: AgenticJokeState) -> dict:
+        prompt = writer_prompt.render(category=state.category)
+
+        async def write() -> str:
+            return (await writer_llm.ainvoke(prompt)).content
+
+        async def judge(joke: str) -> bool:
+            response = await critic_llm.ainvoke(critic_prompt.render(input_data=joke))
+            return is_approved(response.content)
+
+        joke, approved = await race_candidates(write, judge, num_candidates)
+        return {
+            "latest_joke": joke or "",
+            "approved": approved,
+            "retry_count": state.retry_count + num_candidates,
+        }
+
+    return make_parallel_node(parallel_writer_critic)
+
+
+def make_joke_producer(
+    writer_llm, critic_llm, max_attempts: int = 5
+) -> Callable[[str], Optional[str]]:
+    """Returns a function running a full writer–critic cycle for a category.
+
+    Used by the prefetcher; returns None if no joke is approved within
+    `max_attempts`.
+    """
+    writer_node = make_writer_node(writer_llm)
+    critic_node = make_critic_node(critic_llm)
+
+    def produce(category: str) -> Optional[str]:
+        state = AgenticJokeState(category=category)
+        for _ in range(max_attempts):
+            joke = writer_node(state)["latest_joke"]
+            state = state.model_copy(update={"latest_joke": joke})
+            if critic_node(state)["approved"]:
+                return joke
+        return None
+
+    return produce
+
+
+def make_prefetch_nodes(new_prefetcher: Callable[[], JokePrefetcher]) -> dict:
+    """Wraps the menu nodes so they serve from and steer a prefetcher.
+
+    Each session (`thread_id`) gets its own prefetcher on first use, and only
+    that one is closed when the session exits, so sessions sharing the
+    compiled graph keep their buffers warm.
+    """
+    prefetchers: Dict[Any, JokePrefetcher] = {}
+    lock = threading.Lock()
+
+    def session_key(config: Optional[RunnableConfig]) -> Any:
+        return ((config or {}).get("configurable") or {}).get("thread_id")
+
+    def session_prefetcher(config: Optional[RunnableConfig]) -> JokePrefetcher:
+        key = session_key(config)
+        with lock:
+            prefetcher = prefetchers.get(key)
+            if prefetcher is None:
+                prefetcher = prefetchers[key] = new_prefetcher()
+            return prefetcher
+
+    def menu_node(state: AgenticJokeState, config: RunnableConfig) -> dict:
+        # Start warming the current category while the user reads the menu
+        session_prefetcher(config).set_category(state.category)
+        return show_menu(state, config)
+
+    def prefetched_joke(state: AgenticJokeState, config: RunnableConfig) -> dict:
+        joke = session_prefetcher(config).get(state.category)
+        if joke is None:
+            return {"approved": False}
+        return {"latest_joke": joke, "approved": True}
+
+    def category_node(state: AgenticJokeState, config: RunnableConfig) -> dict:
+        update = update_category(state, config)
+        if "category" in update:
+            session_prefetcher(config).set_category(update["category"])
+        return update
+
+    def exit_node(state: AgenticJokeState, config: RunnableConfig) -> dict:
+        with lock:
+            prefetcher = prefetchers.pop(session_key(config), None)
+        if prefetcher is not None:
+            prefetcher.print_stats(get_session_io(config).write)
+            prefetcher.close()
+        return exit_bot(state, config)
+
+    return {
+        "show_menu": menu_node,
+        "prefetched_joke": prefetched_joke,
+        "update_category": category_node,
+        "exit_bot": exit_node,
+    }
+
+
+def prefetch_router(state: AgenticJokeState) -> str:
+    return "show_final_joke" if state.approved else "writer"
+
+
+def show_final_joke(
+    state: AgenticJokeState, config: Optional[RunnableConfig] = None
+) -> dict:
     joke = Joke(text=state.latest_joke, category=state.category)
-    print_joke(joke)
+    print_joke(joke, get_session_io(config))
     return {"jokes": [joke], "retry_count": 0, "approved": False, "latest_joke": ""}
 
 
@@ -70,7 +196,10 @@ def writer_critic_router(state: AgenticJokeState) -> str:
     return "writer"
 
 
-def update_category(state: AgenticJokeState) -> dict:
+def update_category(
+    state: AgenticJokeState, config: Optional[RunnableConfig] = None
+) -> dict:
+    io = get_session_io(config)
     categories = ["dad developer", "chuck norris developer", "general"]
     emoji_map = {
         "knock-knock": "🚪",
@@ -79,27 +208,25 @@ def update_category(state: AgenticJokeState) -> dict:
         "general": "🎯",
     }
 
-    print("📂" + "=" * 58 + "📂")
-    print("    CATEGORY SELECTION")
-    print("=" * 60)
+    print_category_menu(io)
 
     for i, cat in enumerate(categories):
         emoji = emoji_map.get(cat, "📂")
-        print(f"    {i}. {emoji} {cat.upper()}")
+        io.write(f"    {i}. {emoji} {cat.upper()}")
 
-    print("=" * 60)
+    io.write("=" * 60)
 
     try:
-        selection = int(input("    Enter category number: ").strip())
+        selection = int(get_user_input("    Enter category number: ", io))
         if 0 <= selection < len(categories):
             selected_category = categories[selection]
-            print(f"    ✅ Category changed to: {selected_category.upper()}")
+            io.write(f"    ✅ Category changed to: {selected_category.upper()}")
             return {"category": selected_category}
         else:
-            print("    ❌ Invalid choice. Keeping current category.")
+            io.write("    ❌ Invalid choice. Keeping current category.")
             return {}
     except ValueError:
-        print("    ❌ Please enter a valid number. Keeping current category.")
+        io.write("    ❌ Please enter a valid number. Keeping current category.")
         return {}
 
 
@@ -111,18 +238,72 @@ def build_joke_graph(
     critic_model: str = "openai/gpt-oss-20b",
     writer_temp: float = 0.95,
     critic_temp: float = 0.1,
+    writer_route: Optional[str] = None,
+    num_candidates: int = 1,
+    prefetch_depth: int = 0,
+    prefetch_refill_interval: float = 0.0,
+    checkpointer: Checkpointer = None,
 ) -> CompiledStateGraph:
-
-    writer_llm = get_llm(writer_model, writer_temp)
+    """Builds the writer–critic joke graph.
+
+    Args:
+        writer_model: Model used to write jokes.
+        critic_model: Model used to judge jokes.
+        writer_temp: Writer sampling temperature.
+        critic_temp: Critic sampling temperature.
+        writer_route: Name of an `llm_routes` entry to use for the writer
+            instead of `writer_model`.
+        num_candidates: Jokes written concurrently per round. 1 keeps the
+            sequential writer → critic loop; more races candidates and stops
+            at the first approved one.
+        prefetch_depth: Approved jokes to keep buffered per category by a
+            background thread per session; 0 disables prefetching. "Next joke" is served
+            from the buffer when it has one, otherwise by the normal loop.
+        prefetch_refill_interval: Minimum seconds between two background
+            jokes, to cap the prefetch request rate.
+        checkpointer: Checkpointer for running many sessions, each with its
+            own thread_id, against the compiled graph.
+
+    Returns:
+        The compiled graph.
+    """
+
+    # A configured route adds provider failover and hedging on the writer
+    if writer_route:
+        writer_llm = get_routed_llm(writer_route, writer_temp)
+    else:
+        writer_llm = get_llm(writer_model, writer_temp)
     critic_llm = get_llm(critic_model, critic_temp)
 
     builder = StateGraph(AgenticJokeState)
 
-    builder.add_node("show_menu", show_menu)
-    builder.add_node("update_category", update_category)
-    builder.add_node("exit_bot", exit_bot)
-    builder.add_node("writer", make_writer_node(writer_llm))
-    builder.add_node("critic", make_critic_node(critic_llm))
+    nodes = {
+        "show_menu": show_menu,
+        "update_category": update_category,
+        "exit_bot": exit_bot,
+    }
+    if prefetch_depth > 0:
+        produce = make_joke_producer(writer_llm, critic_llm)
+        nodes.update(
+            make_prefetch_nodes(
+                lambda: JokePrefetcher(
+                    produce,
+                    depth=prefetch_depth,
+                    refill_interval=prefetch_refill_interval,
+                )
+            )
+        )
+    for name, node in nodes.items():
+        builder.add_node(name, node)
+    if num_candidates > 1:
+        # "writer" writes and judges a whole round, so it loops on itself
+        builder.add_node(
+            "writer",
+            make_parallel_writer_critic_node(writer_llm, critic_llm, num_candidates),
+        )
+    else:
+        builder.add_node("writer", make_writer_node(writer_llm))
+        builder.add_node("critic", make_critic_node(critic_llm))
     builder.add_node("show_final_joke", show_final_joke)
 
     builder.set_entry_point("show_menu")
@@ -131,34 +312,63 @@ def build_joke_graph(
         "show_menu",
         route_choice,
         {
-            "fetch_joke": "writer",
+            "fetch_joke": "prefetched_joke" if prefetch_depth > 0 else "writer",
             "update_category": "update_category",
             "exit_bot": "exit_bot",
         },
     )
+    if prefetch_depth > 0:
+        builder.add_conditional_edges(
+            "prefetched_joke",
+            prefetch_router,
+            {"writer": "writer", "show_final_joke": "show_final_joke"},
+        )
 
     builder.add_edge("update_category", "show_menu")
-    builder.add_edge("writer", "critic")
+    if num_candidates > 1:
+        judged_node = "writer"
+    else:
+        builder.add_edge("writer", "critic")
+        judged_node = "critic"
     builder.add_conditional_edges(
-        "critic",
+        judged_node,
         writer_critic_router,
         {"writer": "writer", "show_final_joke": "show_final_joke"},
     )
     builder.add_edge("show_final_joke", "show_menu")
     builder.add_edge("exit_bot", END)
 
-    return builder.compile()
+    return builder.compile(checkpointer=checkpointer)
 
 
 # ========== Entry Point ==========
 
 
-def main():
+def main(stream: bool = False, num_candidates: int = 1):
+    """Runs the joke bot.
+
+    Args:
+        stream: Show the writer's drafts token by token while they are written.
+        num_candidates: Jokes written concurrently per writer–critic round.
+    """
     print("\n🎭 Starting joke bot with writer–critic LLM loop...")
-    graph = build_joke_graph(writer_temp=0.8, critic_temp=0.1)
-    final_state = graph.invoke(
-        AgenticJokeState(category="dad developer"), config={"recursion_limit": 200}
+    prefetch_cfg = load_config().get("joke_prefetch", {})
+    graph = build_joke_graph(
+        writer_temp=0.8,
+        critic_temp=0.1,
+        writer_route="joke_writer",
+        num_candidates=num_candidates,
+        prefetch_depth=prefetch_cfg.get("depth", 0),
+        prefetch_refill_interval=prefetch_cfg.get("refill_interval_seconds", 0.0),
     )
+    state = AgenticJokeState(category="dad developer")
+    config = {"recursion_limit": 200}
+    if stream:
+        final_state = stream_graph(
+            graph, state, config, nodes={"writer"}, prefix="✍️  "
+        )
+    else:
+        final_state = graph.invoke(state, config=config)
     print("\n✅ Done. Final Joke Count:", len(final_state["jokes"]))
 
 
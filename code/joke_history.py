@@ -0,0 +1,108 @@
+"""
+Append-only joke history with O(1) appends for the joke bots' state.
+
+`Annotated[List[Joke], add]` copies the whole list on every append, so long
+sessions slow down quadratically. `JokeHistory` is appended to in place by
+the `add_jokes` reducer, can cap how many jokes it keeps in memory, and can
+spill older jokes to a JSONL file. Being a dataclass, it is serialized by
+LangGraph checkpointers as its fields, so checkpoints only hold the
+in-memory tail.
+"""
+
+import json
+import os
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Deque, Iterable, Iterator, Optional, Union
+
+from pydantic import BaseModel
+
+
+class Joke(BaseModel):
+    text: str
+    category: str
+
+
+@dataclass(eq=False)
+class JokeHistory:
+    """Jokes told in a session, oldest first.
+
+    Args:
+        recent: Jokes kept in memory.
+        total: Number of jokes ever appended, including spilled or dropped.
+        cap: Maximum jokes kept in memory; None keeps everything.
+        spill_path: JSONL file that jokes beyond `cap` are moved to. Without
+            it, jokes beyond `cap` are dropped.
+    """
+
+    recent: Deque[Joke] = field(default_factory=deque)
+    total: int = 0
+    cap: Optional[int] = None
+    spill_path: Optional[str] = None
+
+    def __post_init__(self):
+        self.recent = deque(self.recent)
+        self.total = max(self.total, len(self.recent))
+
+    def __len__(self) -> int:
+        return self.total
+
+    def __iter__(self) -> Iterator[Joke]:
+        """Yields every joke still available: spilled ones, then in memory."""
+        if self.spill_path and os.path.exists(self.spill_path):
+            with open(self.spill_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    yield Joke(**json.loads(line))
+        yield from self.recent
+
+    def __getitem__(self, index: int) -> Joke:
+        """Indexes the in-memory jokes (e.g. `history[-1]` is the latest)."""
+        return self.recent[index]
+
+    def append(self, joke: Joke) -> None:
+        self.recent.append(joke)
+        self.total += 1
+        if self.cap is not None and len(self.recent) > self.cap:
+            self._evict()
+
+    def extend(self, jokes: Iterable[Joke]) -> None:
+        for joke in jokes:
+            self.append(joke)
+
+    def copy(self) -> "JokeHistory":
+        return JokeHistory(
+            recent=deque(self.recent),
+            total=self.total,
+            cap=self.cap,
+            spill_path=self.spill_path,
+        )
+
+    def _evict(self) -> None:
+        if not self.spill_path:
+            while len(self.recent) > self.cap:
+                self.recent.popleft()
+            return
+        # Spill half the cap at once so the file is opened once per chunk
+        keep = self.cap // 2
+        os.makedirs(os.path.dirname(os.path.abspath(self.spill_path)), exist_ok=True)
+        with open(self.spill_path, "a", encoding="utf-8") as f:
+            while len(self.recent) > keep:
+                f.write(self.recent.popleft().model_dump_json() + "\n")
+
+
+def add_jokes(
+    history: Optional[JokeHistory], new: Union[JokeHistory, Iterable[Joke]]
+) -> JokeHistory:
+    """State reducer that appends jokes to the history in place.
+
+    Passing a `JokeHistory` into an empty history (as the graph input does)
+    adopts a copy of it, keeping its cap and spill settings.
+    """
+    if isinstance(new, JokeHistory):
+        if not history:
+            return new.copy()
+        new = list(new)
+    if history is None:
+        history = JokeHistory()
+    history.extend(new)
+    return history
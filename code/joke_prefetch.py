@@ -0,0 +1,163 @@
+"""
+Background prefetch buffer that keeps approved jokes ready per category.
+
+A worker thread runs the (slow) joke producer ahead of demand so that "next
+joke" can be served straight from memory. Only the active category is kept
+warm; switching category invalidates the old buffer.
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional
+
+
+class JokePrefetcher:
+    """Keeps up to `depth` jokes buffered for the active category.
+
+    Args:
+        produce: Returns one approved joke for a category, or None if none
+            could be made. Called from background threads.
+        depth: Jokes to keep buffered.
+        refill_interval: Minimum seconds between two productions by the same
+            worker, to cap the background request rate.
+        workers: Number of background threads producing jokes.
+    """
+
+    def __init__(
+        self,
+        produce: Callable[[str], Optional[str]],
+        depth: int = 3,
+        refill_interval: float = 0.0,
+        workers: int = 1,
+    ):
+        self.produce = produce
+        self.depth = depth
+        self.refill_interval = refill_interval
+        self._buffers: Dict[str, Deque[str]] = {}
+        self._active: Optional[str] = None
+        self._generation = 0
+        # generation -> productions running for it; only the active one counts
+        self._in_flight: Dict[int, int] = {}
+        self._cond = threading.Condition()
+        self._closed = threading.Event()
+        self.hits = 0
+        self.misses = 0
+        self.produced = 0
+        self.discarded = 0
+        self._threads: List[threading.Thread] = [
+            threading.Thread(target=self._run, name=f"joke-prefetch-{i}", daemon=True)
+            for i in range(workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def set_category(self, category: str) -> None:
+        """Makes `category` the one kept warm, dropping any other buffer."""
+        with self._cond:
+            if category == self._active:
+                return
+            self._buffers.pop(self._active, None)
+            self._active = category
+            # Jokes still being produced for the old category are discarded
+            self._generation += 1
+            self._buffers.setdefault(category, deque())
+            self._cond.notify_all()
+
+    def get(self, category: str, timeout: float = 0.0) -> Optional[str]:
+        """Takes a buffered joke for a category.
+
+        Args:
+            category: Joke category; becomes the active category.
+            timeout: Seconds to wait for a joke if the buffer is empty.
+
+        Returns:
+            A joke, or None on a miss.
+        """
+        self.set_category(category)
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            buffer = self._buffers[category]
+            while not buffer and not self._closed.is_set():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            if not buffer:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._cond.notify_all()  # wake a worker to refill
+            return buffer.popleft()
+
+    def buffered(self, category: str) -> int:
+        """Number of jokes currently buffered for a category."""
+        with self._cond:
+            return len(self._buffers.get(category, ()))
+
+    def stats(self) -> Dict[str, float]:
+        with self._cond:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "produced": self.produced,
+                "discarded": self.discarded,
+                "buffered": len(self._buffers.get(self._active, ())),
+            }
+
+    def print_stats(self, write: Callable[[str], None] = print) -> None:
+        stats = self.stats()
+        write(
+            f"🧺 Prefetch: {stats['hits']} hits / {stats['misses']} misses "
+            f"({stats['hit_rate']:.0%}), {stats['produced']} produced, "
+            f"{stats['discarded']} discarded, {stats['buffered']} buffered"
+        )
+
+    def close(self) -> None:
+        """Stops the workers; jokes being produced are discarded."""
+        self._closed.set()
+        with self._cond:
+            self._cond.notify_all()
+
+    def _run(self) -> None:
+        while not self._closed.is_set():
+            with self._cond:
+                while not self._closed.is_set() and (
+                    self._active is None
+                    or len(self._buffers[self._active])
+                    + self._in_flight.get(self._generation, 0)
+                    >= self.depth
+                ):
+                    self._cond.wait()
+                if self._closed.is_set():
+                    return
+                category, generation = self._active, self._generation
+                self._in_flight[generation] = self._in_flight.get(generation, 0) + 1
+
+            try:
+                joke = self.produce(category)
+            except Exception as e:
+                print(f"Prefetch failed for '{category}': {e}")
+                joke = None
+                # Back off so a failing producer doesn't spin
+                self._closed.wait(max(self.refill_interval, 1.0))
+
+            with self._cond:
+                self._in_flight[generation] -= 1
+                if not self._in_flight[generation]:
+                    del self._in_flight[generation]
+                self._cond.notify_all()
+                if joke is not None:
+                    if (
+                        generation == self._generation
+                        and len(self._buffers[category]) < self.depth
+                    ):
+                        self._buffers[category].append(joke)
+                        self.produced += 1
+                    else:
+                        self.discarded += 1
+
+            if self.refill_interval:
+                self._closed.wait(self.refill_interval)
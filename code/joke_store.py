@@ -0,0 +1,91 @@
+"""
+In-memory pyjokes index with non-repeating sampling.
+
+Each (language, category) is loaded once through the public
+`pyjokes.get_jokes` and kept as a tuple. Jokes are served by walking a
+shuffled permutation, so no joke repeats until every joke in that list has
+been told, and each draw is O(1).
+"""
+
+import random
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import pyjokes
+
+
+class _Deck:
+    """Shuffled copy of a joke list and the position of the next joke."""
+
+    __slots__ = ("jokes", "cursor")
+
+    def __init__(self, jokes: List[str]):
+        self.jokes = jokes
+        self.cursor = 0
+
+
+class JokeStore:
+    """Serves pyjokes without repeats from a pre-built index.
+
+    Args:
+        seed: Seed for the shuffles, for reproducible runs.
+    """
+
+    def __init__(self, seed: Optional[int] = None):
+        self._jokes: Dict[Tuple[str, str], Tuple[str, ...]] = {}
+        self._random = random.Random(seed)
+        self._decks: Dict[Tuple[str, str], _Deck] = {}
+        self._lock = threading.Lock()
+
+    def jokes(self, language: str = "en", category: str = "neutral") -> Tuple[str, ...]:
+        """Returns every joke for a language and category, loading them once.
+
+        Raises:
+            Whatever `pyjokes.get_jokes` raises for an unknown language or
+            category; nothing is cached in that case.
+        """
+        key = (language, category)
+        jokes = self._jokes.get(key)
+        if jokes is None:
+            jokes = self._jokes[key] = tuple(pyjokes.get_jokes(language, category))
+        return jokes
+
+    def get_joke(self, language: str = "en", category: str = "neutral") -> str:
+        """Returns the next joke, a drop-in replacement for `pyjokes.get_joke`.
+
+        Raises:
+            The same errors as `pyjokes.get_joke` for an unknown language or
+            category.
+        """
+        key = (language, category)
+        with self._lock:
+            deck = self._decks.get(key)
+            if deck is None:
+                deck = self._decks[key] = _Deck(self._shuffled(key))
+            elif deck.cursor == len(deck.jokes):
+                deck.jokes = self._shuffled(key, last=deck.jokes[-1])
+                deck.cursor = 0
+            joke = deck.jokes[deck.cursor]
+            deck.cursor += 1
+            return joke
+
+    def _shuffled(self, key: Tuple[str, str], last: Optional[str] = None) -> List[str]:
+        jokes = list(self.jokes(*key))
+        self._random.shuffle(jokes)
+        # Don't repeat the last joke across the reshuffle boundary
+        if len(jokes) > 1 and jokes[0] == last:
+            jokes[0], jokes[-1] = jokes[-1], jokes[0]
+        return jokes
+
+
+_default_store: Optional[JokeStore] = None
+_default_store_lock = threading.Lock()
+
+
+def get_joke_store() -> JokeStore:
+    """Returns the process-wide joke store, building it on first use."""
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None:
+            _default_store = JokeStore()
+        return _default_store
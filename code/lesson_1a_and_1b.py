@@ -1,26 +1,27 @@
 import sys
 from pathlib import Path
 import os
-from typing import Optional, Dict, Any
-from langchain_openai import ChatOpenAI
-from langchain_groq import ChatGroq
-from langchain_core.messages import HumanMessage
+from typing import Optional, Dict, Any, List, Union
+from langchain_core.messages import BaseMessage, HumanMessage
 
 sys.path.append(str(Path(__file__).parent.parent))
 
 from utils import load_publication, load_yaml_config, load_env, save_text_to_file
-from paths import PROMPT_CONFIG_FPATH, OUTPUTS_DIR, APP_CONFIG_FPATH
-from prompt_builder import build_prompt_from_config
+from paths import CONFIG_FILE_PATH, OUTPUTS_DIR, PROMPT_CONFIG_FILE_PATH
+from prompt_builder import build_prompt_within_budget, compile_prompt
+from llm import get_llm
 
 groq_model_str = "gemma2-9b-it"
 
 def invoke_llm(
-    prompt: str, model: str = groq_model_str, temperature: float = 0.0
+    prompt: Union[str, List[BaseMessage]],
+    model: str = groq_model_str,
+    temperature: float = 0.0,
 ) -> Optional[str]:
     """Calls the LLM with a prompt and returns the response.
 
     Args:
-        prompt: The prompt to send to the LLM.
+        prompt: The prompt to send to the LLM, as a string or message list.
         model: The LLM model to use.
         temperature: Sampling temperature.
 
@@ -28,18 +29,18 @@ def invoke_llm(
         The LLM's response content, or None if an error occurs.
     """
     try:
-        # llm = ChatOpenAI(
-        #     model_name=model,
-        #     temperature=temperature,
-        #     api_key=os.getenv("GROQ_API_KEY"),
-        # )
-        llm = ChatGroq(
-            model_name=model,
-            temperature=temperature,
-            api_key=os.getenv("GROQ_API_KEY"),
-        )
-        message = HumanMessage(content=prompt)
-        response = llm.invoke([message])
+        # Reuses a pooled client instead of building a new one per prompt
+        llm = get_llm(model, temperature, provider="groq")
+        messages = [HumanMessage(content=prompt)] if isinstance(prompt, str) else prompt
+        response = llm.invoke(messages)
+
+        usage = getattr(response, "usage_metadata", None) or {}
+        cached_tokens = (usage.get("input_token_details") or {}).get("cache_read")
+        if cached_tokens is not None:
+            print(
+                f"✓ {cached_tokens}/{usage.get('input_tokens')} input tokens "
+                "served from the provider's prompt cache"
+            )
         return response.content
     except Exception as e:
         print(f"Error calling LLM: {e}")
@@ -68,9 +69,33 @@ def run_prompt_example(
         return
 
     prompt_config = all_prompts_config[prompt_config_key]
+    # Static sections first as a system message so provider prefix caching applies
+    cache_layout = app_config.get("prompt_cache_layout", False)
 
-    # Pass app_config to build_prompt_from_config
-    prompt = build_prompt_from_config(prompt_config, publication_content, app_config)
+    # Pass app_config so the configured reasoning strategy is applied
+    if token_budget := app_config.get("prompt_token_budget"):
+        budgeted = build_prompt_within_budget(
+            prompt_config, publication_content, app_config, token_budget
+        )
+        prompt, messages = budgeted.prompt, budgeted.messages
+        prefix_hash = budgeted.prefix_hash
+        print(
+            f"✓ Prompt is {budgeted.total_tokens} tokens "
+            f"(input {budgeted.input_tokens}, budget {token_budget})"
+        )
+        if budgeted.input_truncated:
+            print("  ⚠ Input was truncated to fit the token budget")
+        if budgeted.dropped_sections:
+            print(f"  ⚠ Trimmed sections: {', '.join(budgeted.dropped_sections)}")
+    else:
+        compiled = compile_prompt(prompt_config, app_config)
+        prompt = compiled.render(input_data=publication_content)
+        messages = compiled.render_messages(input_data=publication_content)
+        prefix_hash = compiled.prefix_hash
+
+    if cache_layout:
+        print(f"✓ Using cache-friendly prompt layout (prefix {prefix_hash})")
+        prompt = "\n\n".join(f"## {m.type}\n{m.content}" for m in messages)
     save_text_to_file(
         prompt,
         os.path.join(OUTPUTS_DIR, f"{prompt_config_key}_prompt.md"),
@@ -78,7 +103,7 @@ def run_prompt_example(
     )
 
     # Get LLM response
-    llm_response = invoke_llm(prompt, model=model_name)
+    llm_response = invoke_llm(messages if cache_layout else prompt, model=model_name)
     if llm_response:
         save_text_to_file(
             llm_response,
@@ -108,13 +133,13 @@ def main(prompt_config_key: str) -> None:
         print(f"✓ Publication loaded ({len(publication_content)} characters)")
 
         print("Loading application configuration...")
-        app_config = load_yaml_config(APP_CONFIG_FPATH)
+        app_config = load_yaml_config(CONFIG_FILE_PATH)
         model_name = app_config.get("llm", groq_model_str)
         print(f"✓ Model set to: {model_name}")
 
         # Load the prompt configuration
-        print(f"Loading prompt config from: {PROMPT_CONFIG_FPATH}")
-        all_prompts_config = load_yaml_config(PROMPT_CONFIG_FPATH)
+        print(f"Loading prompt config from: {PROMPT_CONFIG_FILE_PATH}")
+        all_prompts_config = load_yaml_config(PROMPT_CONFIG_FILE_PATH)
         print(f"✓ Config loaded with prompt keys: {list(all_prompts_config.keys())}")
 
         if prompt_config_key not in all_prompts_config:
@@ -1,13 +1,33 @@
 import os
-from paths import OUTPUTS_DIR
+from typing import Iterable, List, Optional, Sequence
+from paths import OUTPUTS_DIR, PUBLICATION_FPATH
 from dotenv import load_dotenv
 from pydantic import BaseModel, Field
-from langchain_openai import ChatOpenAI
 from utils import load_publication, save_text_to_file
+from event_loop import run_sync
+from llm import DEFAULT_MAX_CONCURRENCY, abatch, get_llm
+from tokens import count_tokens
 from langchain.output_parsers.pydantic import PydanticOutputParser
+from langchain_core.runnables import Runnable
+from langchain_text_splitters import RecursiveCharacterTextSplitter
 
 load_dotenv()
 
+# Token budget for the publication inside each extraction prompt.
+PUBLICATION_TOKEN_BUDGET = 12_000
+
+# Chunk size and overlap, in tokens, for chunked (map-reduce) extraction.
+CHUNK_TOKENS = 2_000
+CHUNK_OVERLAP_TOKENS = 100
+
+ENTITY_EXTRACTION_PROMPT = """
+    Provide a list of entities mentioned in the publication. An entity is either a model or a task.
+
+    <publication>
+    {publication_content}
+    </publication>
+    """
+
 
 class Entity(BaseModel):
     type: str = Field(description="The type of the entity. Either 'model' or 'task'")
@@ -24,7 +44,7 @@ def no_structured_output(model: str = "gpt-4o-mini"):
     """
     This function demonstrates how to use the LLM without a structured output.
     """
-    publication_content = load_publication()
+    publication_content = load_publication(max_tokens=PUBLICATION_TOKEN_BUDGET)
 
     prompt = """
     Provide a list of entities mentioned in the publication. An entity is either a model or a task.
@@ -36,7 +56,7 @@ def no_structured_output(model: str = "gpt-4o-mini"):
         publication_content=publication_content
     )
 
-    llm = ChatOpenAI(model_name=model, temperature=0.0)
+    llm = get_llm(model, temperature=0.0)
 
     response = llm.invoke(prompt)
 
@@ -57,7 +77,7 @@ def with_prompting_to_structure_output(model: str = "gpt-4o-mini"):
     """
     This function demonstrates how to use the LLM with prompting to structure the output.
     """
-    publication_content = load_publication()
+    publication_content = load_publication(max_tokens=PUBLICATION_TOKEN_BUDGET)
 
     prompt = """
     Provide a list of entities mentioned in the publication. An entity is either a model or a task.
@@ -85,7 +105,7 @@ def with_prompting_to_structure_output(model: str = "gpt-4o-mini"):
         publication_content=publication_content
     )
 
-    llm = ChatOpenAI(model_name=model, temperature=0.0)
+    llm = get_llm(model, temperature=0.0)
 
     response = llm.invoke(prompt)
 
@@ -108,7 +128,7 @@ def with_output_parser(model: str = "gpt-4o-mini"):
     """
     This function demonstrates how to use the LLM with prompting to structure the output.
     """
-    publication_content = load_publication()
+    publication_content = load_publication(max_tokens=PUBLICATION_TOKEN_BUDGET)
 
     prompt = """
     Provide a list of entities mentioned in the publication. An entity is either a model or a task.
@@ -120,7 +140,7 @@ def with_output_parser(model: str = "gpt-4o-mini"):
     {format_instructions}
     """
 
-    llm = ChatOpenAI(model_name=model, temperature=0.0)
+    llm = get_llm(model, temperature=0.0)
 
     output_parser = PydanticOutputParser(pydantic_object=Entities)
 
@@ -152,7 +172,7 @@ def with_output_parser(model: str = "gpt-4o-mini"):
 
 
 def model_native_structured_output(model: str = "gpt-4o-mini"):
-    publication_content = load_publication()
+    publication_content = load_publication(max_tokens=PUBLICATION_TOKEN_BUDGET)
 
     prompt = """
     Provide a list of entities mentioned in the publication. An entity is either a model or a task.
@@ -164,7 +184,7 @@ def model_native_structured_output(model: str = "gpt-4o-mini"):
         publication_content=publication_content
     )
 
-    llm = ChatOpenAI(model_name=model, temperature=0.0).with_structured_output(Entities)
+    llm = get_llm(model, temperature=0.0).with_structured_output(Entities)
 
     response = llm.invoke(prompt)
 
@@ -180,9 +200,123 @@ def model_native_structured_output(model: str = "gpt-4o-mini"):
     )
 
 
+def split_document(
+    text: str,
+    chunk_tokens: int = CHUNK_TOKENS,
+    chunk_overlap: int = CHUNK_OVERLAP_TOKENS,
+) -> List[str]:
+    """Splits a document into overlapping chunks of at most `chunk_tokens` tokens."""
+    splitter = RecursiveCharacterTextSplitter(
+        chunk_size=chunk_tokens,
+        chunk_overlap=chunk_overlap,
+        length_function=count_tokens,
+    )
+    return splitter.split_text(text)
+
+
+def merge_entities(results: Iterable[Entities]) -> Entities:
+    """Merges per-chunk results, dropping case/whitespace-insensitive duplicates."""
+    seen = set()
+    merged = []
+    for result in results:
+        for entity in result.entities:
+            key = (entity.type.strip().lower(), " ".join(entity.name.lower().split()))
+            if key not in seen:
+                seen.add(key)
+                merged.append(entity)
+    return Entities(entities=merged)
+
+
+async def aextract_entities(
+    documents: Sequence[str],
+    llm: Runnable,
+    chunk_tokens: int = CHUNK_TOKENS,
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+) -> List[Entities]:
+    """Extracts entities from many documents with a chunked map-reduce.
+
+    Every chunk of every document is sent concurrently (bounded by
+    `max_concurrency`), then the chunk results are merged per document.
+
+    Args:
+        documents: Document texts.
+        llm: Runnable returning `Entities`, e.g. `llm.with_structured_output(Entities)`.
+        chunk_tokens: Maximum tokens of document text per request.
+        max_concurrency: Maximum number of concurrent requests.
+
+    Returns:
+        One merged `Entities` per document, in input order.
+    """
+    prompts, owners = [], []
+    for i, document in enumerate(documents):
+        for chunk in split_document(document, chunk_tokens):
+            prompts.append(ENTITY_EXTRACTION_PROMPT.format(publication_content=chunk))
+            owners.append(i)
+
+    chunk_results = await abatch(prompts, llm, max_concurrency=max_concurrency)
+
+    per_document: List[List[Entities]] = [[] for _ in documents]
+    for owner, result in zip(owners, chunk_results):
+        per_document[owner].append(result)
+    return [merge_entities(results) for results in per_document]
+
+
+def extract_entities_from_files(
+    file_paths: Sequence[str],
+    model: str = "gpt-4o-mini",
+    chunk_tokens: int = CHUNK_TOKENS,
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    llm: Optional[Runnable] = None,
+) -> List[Entities]:
+    """Runs chunked entity extraction over markdown/text files.
+
+    Args:
+        file_paths: Files to process.
+        model: Model to use when `llm` is not given.
+        chunk_tokens: Maximum tokens of document text per request.
+        max_concurrency: Maximum number of concurrent requests.
+        llm: Optional runnable returning `Entities`; overrides `model`.
+
+    Returns:
+        One merged `Entities` per file, in input order.
+    """
+    if llm is None:
+        llm = get_llm(model, temperature=0.0).with_structured_output(Entities)
+
+    documents = []
+    for file_path in file_paths:
+        with open(file_path, "r", encoding="utf-8") as f:
+            documents.append(f.read())
+
+    # The shared loop keeps the pooled async HTTP connections usable
+    return run_sync(aextract_entities(documents, llm, chunk_tokens, max_concurrency))
+
+
+def chunked_structured_output(
+    model: str = "gpt-4o-mini", file_path: str = PUBLICATION_FPATH
+):
+    """
+    This function demonstrates map-reduce extraction: the publication is split
+    into chunks that are processed concurrently and the results are merged.
+    """
+    [response] = extract_entities_from_files([file_path], model=model)
+
+    saved_text = f""" # Source: {file_path}
+    # Response:
+    {str(response.model_dump())}
+    """
+
+    save_text_to_file(
+        saved_text,
+        os.path.join(OUTPUTS_DIR, f"chunked_structured_output_llm_response.md"),
+        header=f"LLM Response With Chunked Structured Output",
+    )
+
+
 if __name__ == "__main__":
 
     # no_structured_output()
     # with_prompting_to_structure_output()
     # with_output_parser()
+    # chunked_structured_output()
     model_native_structured_output()
@@ -1,15 +1,284 @@
+import asyncio
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Sequence, Tuple
+
+import httpx
 from langchain_openai import ChatOpenAI
 from langchain_groq import ChatGroq
 from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.runnables import Runnable
 from dotenv import load_dotenv
 
+from event_loop import run_sync
+from llm_cache import get_response_cache
+from rate_limit import (
+    AsyncRateLimitedTransport,
+    RateLimiter,
+    RateLimitedTransport,
+    RetryPolicy,
+    get_rate_limiter,
+)
+from utils import load_config
+
 load_dotenv()
 
 
-def get_llm(model_name: str, temperature: float = 0.7) -> BaseChatModel:
-    if model_name == "gpt-4o-mini":
-        return ChatOpenAI(model="gpt-4o-mini", temperature=temperature)
-    elif model_name == "openai/gpt-oss-20b":
-        return ChatGroq(model="openai/gpt-oss-20b", temperature=temperature)
-    else:
-        raise ValueError(f"Unknown model name: {model_name}")
\ No newline at end of file
+# Chat model class for each provider we know how to talk to.
+PROVIDER_CLASSES = {
+    "openai": ChatOpenAI,
+    "groq": ChatGroq,
+}
+
+# Provider that serves each known model name.
+MODEL_PROVIDERS = {
+    "gpt-4o-mini": "openai",
+    "openai/gpt-oss-20b": "groq",
+}
+
+# Upper bound on the number of distinct chat model clients kept alive.
+MAX_CACHED_CLIENTS = 32
+
+# Connection pool limits for the shared per-provider HTTP transport.
+HTTP_POOL_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=20)
+HTTP_TIMEOUT = httpx.Timeout(60.0, connect=10.0)
+
+# Default number of in-flight requests for batch calls.
+DEFAULT_MAX_CONCURRENCY = 8
+
+_registry_lock = threading.RLock()
+_clients: "OrderedDict[Tuple[Hashable, ...], BaseChatModel]" = OrderedDict()
+_http_clients: Dict[Tuple[str, Optional[int]], httpx.Client] = {}
+_async_http_clients: Dict[Tuple[str, Optional[int]], httpx.AsyncClient] = {}
+
+
+def _resolve_provider(model_name: str, provider: Optional[str]) -> str:
+    """Returns the provider for a model, raising for unknown combinations."""
+    provider = provider or MODEL_PROVIDERS.get(model_name)
+    if provider is None:
+        raise ValueError(f"Unknown model name: {model_name}")
+    if provider not in PROVIDER_CLASSES:
+        raise ValueError(f"Unknown provider: {provider}")
+    return provider
+
+
+def _freeze(value: Any) -> Hashable:
+    """Converts nested kwargs into a hashable, order-independent form."""
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple, set)):
+        return tuple(_freeze(v) for v in value)
+    try:
+        hash(value)
+        return value
+    except TypeError:
+        return repr(value)
+
+
+def _provider_rate_limiter(provider: str) -> RateLimiter:
+    """Returns the shared limiter configured under `rate_limits` in config.yaml."""
+    limits = (load_config().get("rate_limits") or {}).get(provider)
+    return get_rate_limiter(provider, limits)
+
+
+def _retry_policy(retries: Optional[int]) -> Optional[RetryPolicy]:
+    return RetryPolicy(max_retries=retries) if retries is not None else None
+
+
+def get_http_client(provider: str, retries: Optional[int] = None) -> httpx.Client:
+    """Returns the pooled HTTP client shared by every chat model of a provider.
+
+    Requests through it are throttled to the provider's configured rate limits
+    and retried with backoff on 429/5xx responses.
+
+    Args:
+        provider: Provider name, e.g. 'openai' or 'groq'.
+        retries: Retries on 429/5xx responses; the `RetryPolicy` default when
+            None. Clients with different retry counts still share the
+            provider's rate limiter.
+
+    Returns:
+        A process-wide `httpx.Client` with keep-alive connection pooling.
+    """
+    with _registry_lock:
+        http_client = _http_clients.get((provider, retries))
+        if http_client is None:
+            transport = RateLimitedTransport(
+                _provider_rate_limiter(provider),
+                retry_policy=_retry_policy(retries),
+                transport=httpx.HTTPTransport(limits=HTTP_POOL_LIMITS),
+            )
+            http_client = httpx.Client(transport=transport, timeout=HTTP_TIMEOUT)
+            _http_clients[(provider, retries)] = http_client
+        return http_client
+
+
+def get_async_http_client(
+    provider: str, retries: Optional[int] = None
+) -> httpx.AsyncClient:
+    """Async counterpart of `get_http_client`, sharing the same rate limiter.
+
+    Its pooled connections belong to the event loop that first uses it, so
+    synchronous code must run async calls through `event_loop.run_sync`
+    rather than `asyncio.run`.
+    """
+    with _registry_lock:
+        http_client = _async_http_clients.get((provider, retries))
+        if http_client is None:
+            transport = AsyncRateLimitedTransport(
+                _provider_rate_limiter(provider),
+                retry_policy=_retry_policy(retries),
+                transport=httpx.AsyncHTTPTransport(limits=HTTP_POOL_LIMITS),
+            )
+            http_client = httpx.AsyncClient(transport=transport, timeout=HTTP_TIMEOUT)
+            _async_http_clients[(provider, retries)] = http_client
+        return http_client
+
+
+def get_llm(
+    model_name: str,
+    temperature: float = 0.7,
+    provider: Optional[str] = None,
+    cache: Optional[bool] = None,
+    retries: Optional[int] = None,
+    **kwargs: Any,
+) -> BaseChatModel:
+    """Returns a chat model client, reusing a cached one when possible.
+
+    Clients are memoized per (provider, model, temperature, kwargs) and all
+    clients of a provider share one pooled HTTP transport, so repeated calls
+    skip client construction and reuse warm TLS connections.
+
+    Args:
+        model_name: Name of the model to use.
+        temperature: Sampling temperature.
+        provider: Provider to use; inferred from `model_name` when omitted.
+        cache: Serve repeated prompts from the persistent response cache.
+            Defaults to on for deterministic (temperature 0) clients only.
+        retries: Transport retries on 429/5xx responses; the `RetryPolicy`
+            default when None. Callers that fail over to another model
+            themselves should pass 0.
+        **kwargs: Extra keyword arguments forwarded to the chat model class.
+
+    Returns:
+        A chat model client.
+
+    Raises:
+        ValueError: If the model or provider is unknown.
+    """
+    provider = _resolve_provider(model_name, provider)
+    if cache is None:
+        cache = temperature == 0
+    key = (provider, model_name, float(temperature), cache, retries, _freeze(kwargs))
+
+    with _registry_lock:
+        llm = _clients.get(key)
+        if llm is not None:
+            _clients.move_to_end(key)
+            return llm
+
+        if cache:
+            kwargs["cache"] = get_response_cache()
+        # Retries are handled by the rate-limited transport, not the SDK
+        kwargs.setdefault("max_retries", 0)
+        llm = PROVIDER_CLASSES[provider](
+            model=model_name,
+            temperature=temperature,
+            http_client=get_http_client(provider, retries),
+            http_async_client=get_async_http_client(provider, retries),
+            **kwargs,
+        )
+        _clients[key] = llm
+        while len(_clients) > MAX_CACHED_CLIENTS:
+            _clients.popitem(last=False)
+        return llm
+
+
+def clear_llm_cache(close_transports: bool = False) -> None:
+    """Drops all cached chat model clients.
+
+    Args:
+        close_transports: Also close the shared sync HTTP transports and drop
+            the async ones.
+    """
+    with _registry_lock:
+        _clients.clear()
+        if close_transports:
+            for http_client in _http_clients.values():
+                http_client.close()
+            _http_clients.clear()
+            _async_http_clients.clear()
+
+
+async def aget_llm(
+    model_name: str,
+    temperature: float = 0.7,
+    provider: Optional[str] = None,
+    cache: Optional[bool] = None,
+    retries: Optional[int] = None,
+    **kwargs: Any,
+) -> BaseChatModel:
+    """Async counterpart of `get_llm`; returns the same cached client."""
+    return get_llm(
+        model_name, temperature, provider=provider, cache=cache, retries=retries,
+        **kwargs,
+    )
+
+
+async def abatch(
+    inputs: Sequence[Any],
+    llm: Runnable,
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    return_exceptions: bool = False,
+) -> List[Any]:
+    """Invokes a model on many inputs concurrently.
+
+    At most `max_concurrency` requests are in flight at once, so a batch of N
+    inputs takes roughly N / max_concurrency round trips instead of N.
+
+    Args:
+        inputs: Prompts (or message lists) to send to the model.
+        llm: Chat model or runnable to invoke, e.g. from `get_llm`.
+        max_concurrency: Maximum number of concurrent requests.
+        return_exceptions: Return exceptions in place of failed results
+            instead of raising the first one.
+
+    Returns:
+        The model outputs, in the same order as `inputs`.
+
+    Raises:
+        ValueError: If `max_concurrency` is less than 1.
+    """
+    if max_concurrency < 1:
+        raise ValueError("max_concurrency must be at least 1")
+
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def run_one(item: Any) -> Any:
+        async with semaphore:
+            return await llm.ainvoke(item)
+
+    return await asyncio.gather(
+        *(run_one(item) for item in inputs), return_exceptions=return_exceptions
+    )
+
+
+def batch(
+    inputs: Sequence[Any],
+    llm: Runnable,
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    return_exceptions: bool = False,
+) -> List[Any]:
+    """Blocking wrapper around `abatch` for synchronous call sites.
+
+    Runs on the shared background loop (see `event_loop`), since the async
+    HTTP clients are bound to the loop they were first used on.
+    """
+    return run_sync(
+        abatch(
+            inputs,
+            llm,
+            max_concurrency=max_concurrency,
+            return_exceptions=return_exceptions,
+        )
+    )
@@ -0,0 +1,194 @@
+"""
+Two-tier, content-addressed cache for deterministic LLM responses.
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from langchain_core.caches import RETURN_VAL_TYPE, BaseCache
+from langchain_core.load import dumps, loads
+
+from paths import LLM_CACHE_FPATH
+
+
+class ResponseCache(BaseCache):
+    """LangChain cache with an in-memory LRU tier backed by SQLite.
+
+    Entries are keyed by a hash of the model's `llm_string` (model name and
+    call parameters) and the prompt, expire after `ttl_seconds`, and are
+    evicted least-recently-used once a tier exceeds its size bound.
+    """
+
+    # Run the (comparatively expensive) disk size check every N writes.
+    _EVICT_EVERY = 64
+
+    def __init__(
+        self,
+        db_path: Optional[str] = LLM_CACHE_FPATH,
+        max_memory_entries: int = 1024,
+        max_disk_entries: int = 100_000,
+        ttl_seconds: Optional[float] = 7 * 24 * 3600,
+    ):
+        """Creates the cache.
+
+        Args:
+            db_path: SQLite file for the disk tier, or None for memory only.
+            max_memory_entries: Maximum entries kept in the memory tier.
+            max_disk_entries: Maximum entries kept in the disk tier.
+            ttl_seconds: Entry lifetime in seconds, or None to never expire.
+        """
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_entries = max_disk_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.RLock()
+        self._memory: "OrderedDict[str, Tuple[float, RETURN_VAL_TYPE]]" = OrderedDict()
+        self._writes = 0
+        self._conn: Optional[sqlite3.Connection] = None
+
+        if db_path:
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+            self._conn = sqlite3.connect(db_path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " key TEXT PRIMARY KEY,"
+                " value TEXT NOT NULL,"
+                " created_at REAL NOT NULL,"
+                " accessed_at REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS responses_accessed_at"
+                " ON responses (accessed_at)"
+            )
+            self._conn.commit()
+
+    @staticmethod
+    def make_key(prompt: str, llm_string: str) -> str:
+        """Returns the content address for a prompt and model configuration."""
+        return hashlib.sha256(f"{llm_string}\0{prompt}".encode("utf-8")).hexdigest()
+
+    def _expired(self, created_at: float, now: float) -> bool:
+        return self.ttl_seconds is not None and now - created_at > self.ttl_seconds
+
+    def _remember(self, key: str, created_at: float, value: RETURN_VAL_TYPE) -> None:
+        self._memory[key] = (created_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        """Returns cached generations for a prompt, or None on a miss."""
+        key = self.make_key(prompt, llm_string)
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                created_at, value = entry
+                if not self._expired(created_at, now):
+                    self._memory.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._memory[key]
+
+            if self._conn is not None:
+                row = self._conn.execute(
+                    "SELECT value, created_at FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    value_json, created_at = row
+                    if not self._expired(created_at, now):
+                        self._conn.execute(
+                            "UPDATE responses SET accessed_at = ? WHERE key = ?",
+                            (now, key),
+                        )
+                        self._conn.commit()
+                        value = loads(value_json)
+                        self._remember(key, created_at, value)
+                        self.hits += 1
+                        return value
+                    self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    self._conn.commit()
+
+            self.misses += 1
+            return None
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        """Stores generations for a prompt in both tiers."""
+        key = self.make_key(prompt, llm_string)
+        now = time.time()
+        with self._lock:
+            self._remember(key, now, return_val)
+            if self._conn is None:
+                return
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, created_at, accessed_at)"
+                " VALUES (?, ?, ?, ?)",
+                (key, dumps(return_val), now, now),
+            )
+            self._writes += 1
+            if self._writes % self._EVICT_EVERY == 0:
+                self._evict_disk(now)
+            self._conn.commit()
+
+    def _evict_disk(self, now: float) -> None:
+        """Drops expired rows, then least-recently-used rows over the bound."""
+        if self.ttl_seconds is not None:
+            self._conn.execute(
+                "DELETE FROM responses WHERE created_at < ?", (now - self.ttl_seconds,)
+            )
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()
+        excess = count - self.max_disk_entries
+        if excess > 0:
+            self._conn.execute(
+                "DELETE FROM responses WHERE key IN ("
+                " SELECT key FROM responses ORDER BY accessed_at ASC LIMIT ?)",
+                (excess,),
+            )
+
+    def clear(self, **kwargs: Any) -> None:
+        """Empties both tiers and resets the counters."""
+        with self._lock:
+            self._memory.clear()
+            self.hits = 0
+            self.misses = 0
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM responses")
+                self._conn.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns hit/miss counters and tier sizes."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            disk_entries = None
+            if self._conn is not None:
+                (disk_entries,) = self._conn.execute(
+                    "SELECT COUNT(*) FROM responses"
+                ).fetchone()
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "memory_entries": len(self._memory),
+                "disk_entries": disk_entries,
+            }
+
+
+_default_cache: Optional[ResponseCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> ResponseCache:
+    """Returns the process-wide response cache, creating it on first use."""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = ResponseCache()
+        return _default_cache
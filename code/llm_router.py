@@ -0,0 +1,191 @@
+"""
+Multi-provider routing with failover and optional hedged requests.
+"""
+
+import asyncio
+import contextvars
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Dict, List, Optional
+
+from langchain_core.runnables import Runnable, RunnableConfig
+
+from llm import get_llm
+from utils import load_config
+
+
+class AllProvidersFailedError(RuntimeError):
+    """Raised when every model in a route failed."""
+
+    def __init__(self, errors: List[BaseException]):
+        super().__init__(
+            f"All {len(errors)} provider attempts failed; last error: {errors[-1]!r}"
+        )
+        self.errors = errors
+
+
+# Shared pool for sync hedged calls; losing requests finish in the background.
+# Calls run in a copy of the caller's context so the callbacks of an enclosing
+# run (e.g. LangGraph's token streaming) still see the model's output.
+_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="llm-router")
+
+
+class RoutedLLM(Runnable):
+    """Invokes a ranked list of chat models, failing over on errors.
+
+    In hedged mode, if the current request has not answered within
+    `hedge_after` seconds, the next model in the ranking is started as well
+    and whichever answers first wins. With a single model, the hedge is a
+    duplicate request to that same model.
+    """
+
+    def __init__(self, llms: List[Runnable], hedge_after: Optional[float] = None):
+        """Creates the router.
+
+        Args:
+            llms: Chat models in preference order.
+            hedge_after: Seconds to wait before sending a hedged request, or
+                None to only fail over on errors.
+
+        Raises:
+            ValueError: If `llms` is empty.
+        """
+        if not llms:
+            raise ValueError("RoutedLLM needs at least one model")
+        self.llms = list(llms)
+        self.hedge_after = hedge_after
+
+    def _candidates(self) -> List[Runnable]:
+        if self.hedge_after is not None and len(self.llms) == 1:
+            return self.llms * 2
+        return self.llms
+
+    def invoke(
+        self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any
+    ) -> Any:
+        candidates = iter(self._candidates())
+        pending: set[Future] = set()
+        errors: List[BaseException] = []
+
+        def launch_next() -> bool:
+            llm = next(candidates, None)
+            if llm is None:
+                return False
+            context = contextvars.copy_context()
+            pending.add(
+                _executor.submit(context.run, llm.invoke, input, config, **kwargs)
+            )
+            return True
+
+        launch_next()
+        can_hedge = self.hedge_after is not None
+        while pending:
+            done, _ = wait(
+                pending,
+                timeout=self.hedge_after if can_hedge else None,
+                return_when=FIRST_COMPLETED,
+            )
+            if not done:
+                can_hedge = launch_next()
+                continue
+            for future in done:
+                pending.discard(future)
+                try:
+                    return future.result()
+                except Exception as e:
+                    errors.append(e)
+            if not pending:
+                launch_next()
+        raise AllProvidersFailedError(errors)
+
+    async def ainvoke(
+        self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any
+    ) -> Any:
+        candidates = iter(self._candidates())
+        pending: set[asyncio.Task] = set()
+        errors: List[BaseException] = []
+
+        def launch_next() -> bool:
+            llm = next(candidates, None)
+            if llm is None:
+                return False
+            pending.add(asyncio.create_task(llm.ainvoke(input, config, **kwargs)))
+            return True
+
+        launch_next()
+        can_hedge = self.hedge_after is not None
+        try:
+            while pending:
+                done, _ = await asyncio.wait(
+                    pending,
+                    timeout=self.hedge_after if can_hedge else None,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                if not done:
+                    can_hedge = launch_next()
+                    continue
+                for task in done:
+                    pending.discard(task)
+                    try:
+                        return task.result()
+                    except Exception as e:
+                        errors.append(e)
+                if not pending:
+                    launch_next()
+        finally:
+            for task in pending:
+                task.cancel()
+        raise AllProvidersFailedError(errors)
+
+
+def get_routed_llm(
+    route: str,
+    temperature: float = 0.7,
+    hedge: Optional[bool] = None,
+    app_config: Optional[Dict[str, Any]] = None,
+) -> RoutedLLM:
+    """Builds a `RoutedLLM` from a route under `llm_routes` in config.yaml.
+
+    Args:
+        route: Name of the route, e.g. 'joke_writer'.
+        temperature: Sampling temperature for every model in the route.
+        hedge: Force hedging on or off; defaults to on when the route sets
+            `hedge_after_seconds`.
+        app_config: Application config; loaded from config.yaml when omitted.
+
+    Each model's client makes `transport_retries` (default 0) retries on
+    429/5xx responses itself, so `timeout_seconds` bounds how long one model
+    can hold a request before the next one is tried.
+
+    Returns:
+        A runnable that fails over (and optionally hedges) across the route.
+
+    Raises:
+        ValueError: If the route is not configured or has no models.
+    """
+    app_config = app_config if app_config is not None else load_config()
+    route_cfg = (app_config.get("llm_routes") or {}).get(route)
+    if not route_cfg or not route_cfg.get("models"):
+        raise ValueError(f"Unknown or empty LLM route: {route}")
+
+    # The router owns failover: a rate-limited or failing model should hand
+    # over to the next one at once, not back off inside its transport first
+    client_kwargs = {"retries": route_cfg.get("transport_retries", 0)}
+    if timeout := route_cfg.get("timeout_seconds"):
+        client_kwargs["timeout"] = timeout
+
+    llms = [
+        get_llm(
+            entry["model"],
+            temperature,
+            provider=entry.get("provider"),
+            **client_kwargs,
+        )
+        for entry in route_cfg["models"]
+    ]
+
+    hedge_after = route_cfg.get("hedge_after_seconds")
+    if hedge is False:
+        hedge_after = None
+    elif hedge and hedge_after is None:
+        raise ValueError(f"Route '{route}' has no hedge_after_seconds configured")
+    return RoutedLLM(llms, hedge_after=hedge_after)
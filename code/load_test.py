@@ -0,0 +1,158 @@
+"""
+Load test that runs many headless joke-bot sessions against one compiled graph.
+
+Each session gets its own thread_id on a shared checkpointer and answers the
+menu from a script, so the run measures graph overhead, sessions per second
+and memory retained per session rather than user think time.
+"""
+
+import argparse
+import contextlib
+import io
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import List, Optional
+
+from langgraph.checkpoint.memory import InMemorySaver
+from langgraph.graph.state import CompiledStateGraph
+
+from joke_bot import JokeState, build_joke_graph
+from joke_store import get_joke_store
+from session_io import ScriptedIO
+
+
+@dataclass
+class LoadTestReport:
+    """Summary of a load test run."""
+
+    sessions: int
+    failed: int
+    elapsed_seconds: float
+    steps_per_session: int
+    memory_bytes: Optional[int] = None
+
+    @property
+    def sessions_per_second(self) -> float:
+        if not self.elapsed_seconds:
+            return 0.0
+        return (self.sessions - self.failed) / self.elapsed_seconds
+
+    @property
+    def memory_per_session(self) -> Optional[float]:
+        if self.memory_bytes is None or not self.sessions:
+            return None
+        return self.memory_bytes / self.sessions
+
+    def print_summary(self) -> None:
+        print("=" * 60)
+        print(
+            f"{self.sessions} sessions ({self.failed} failed), "
+            f"{self.steps_per_session} menu answers each, "
+            f"in {self.elapsed_seconds:.2f}s"
+        )
+        print(f"Throughput: {self.sessions_per_second:.1f} sessions/s")
+        if self.memory_per_session is not None:
+            print(f"Memory retained: {self.memory_per_session / 1024:.1f} KiB/session")
+        print("=" * 60)
+
+
+def make_script(jokes: int, change_category_every: int = 0) -> List[str]:
+    """Menu answers asking for `jokes` jokes, then quitting.
+
+    Args:
+        jokes: Number of "next joke" answers.
+        change_category_every: Switch category after this many jokes; 0 never.
+
+    Returns:
+        The answers, in order.
+    """
+    answers = []
+    for i in range(1, jokes + 1):
+        answers.append("n")
+        if change_category_every and i % change_category_every == 0:
+            answers += ["c", str(i // change_category_every % 3)]
+    return answers + ["q"]
+
+
+def run_sessions(
+    num_sessions: int = 100,
+    script: Optional[List[str]] = None,
+    max_workers: int = 16,
+    graph: Optional[CompiledStateGraph] = None,
+    measure_memory: bool = True,
+) -> LoadTestReport:
+    """Runs scripted sessions concurrently against one compiled graph.
+
+    Args:
+        num_sessions: Number of sessions to run.
+        script: Menu answers for every session; `make_script(20, 5)` if None.
+        max_workers: Sessions run at the same time.
+        graph: Compiled graph with a checkpointer; the plain joke bot with an
+            in-memory checkpointer and the pre-indexed joke store if None.
+        measure_memory: Trace allocations to report memory retained per
+            session (slows the run down).
+
+    Returns:
+        A `LoadTestReport`.
+    """
+    script = script if script is not None else make_script(20, 5)
+    if graph is None:
+        graph = build_joke_graph(
+            checkpointer=InMemorySaver(), joke_source=get_joke_store().get_joke
+        )
+    recursion_limit = 3 * len(script) + 10
+
+    def run_session(i: int) -> None:
+        config = {
+            "configurable": {"thread_id": f"session-{i}", "io": ScriptedIO(script)},
+            "recursion_limit": recursion_limit,
+        }
+        graph.invoke(JokeState(), config=config)
+
+    if measure_memory:
+        tracemalloc.start()
+    errors = []
+    start = time.perf_counter()
+    # Nodes also print outside the injected IO (e.g. tokenizer notices)
+    with contextlib.redirect_stdout(io.StringIO()), ThreadPoolExecutor(
+        max_workers=max_workers
+    ) as executor:
+        for future in [executor.submit(run_session, i) for i in range(num_sessions)]:
+            try:
+                future.result()
+            except Exception as e:
+                errors.append(e)
+    elapsed = time.perf_counter() - start
+    for e in errors[:5]:
+        print(f"✗ session failed: {e}")
+    memory = None
+    if measure_memory:
+        memory = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+
+    return LoadTestReport(
+        sessions=num_sessions,
+        failed=len(errors),
+        elapsed_seconds=elapsed,
+        steps_per_session=len(script),
+        memory_bytes=memory,
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=100)
+    parser.add_argument("--jokes", type=int, default=20, help="Jokes per session")
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--no-memory", action="store_true")
+    args = parser.parse_args()
+
+    report = run_sessions(
+        num_sessions=args.sessions,
+        script=make_script(args.jokes, change_category_every=5),
+        max_workers=args.workers,
+        measure_memory=not args.no_memory,
+    )
+    report.print_summary()
@@ -18,4 +18,10 @@ PUBLICATION_FPATH = os.path.join(DATA_DIR, "publication.md")
 
 CONFIG_DIR = os.path.join(ROOT_DIR, "config")
 CONFIG_FILE_PATH = os.path.join(CONFIG_DIR, "config.yaml")
-PROMPT_CONFIG_FILE_PATH = os.path.join(CONFIG_DIR, "prompt_config.yaml")
\ No newline at end of file
+PROMPT_CONFIG_FILE_PATH = os.path.join(CONFIG_DIR, "prompt_config.yaml")
+
+
+CACHE_DIR = os.path.join(ROOT_DIR, ".cache")
+LLM_CACHE_FPATH = os.path.join(CACHE_DIR, "llm_responses.sqlite")
+TOOL_CACHE_FPATH = os.path.join(CACHE_DIR, "tool_results.sqlite")
+REPO_CACHE_DIR = os.path.join(CACHE_DIR, "repos")
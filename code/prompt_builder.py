@@ -2,7 +2,15 @@
 Prompt template construction functions for building modular prompts.
 """
 
-from typing import Union, List, Optional, Dict, Any
+import hashlib
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Union, List, Optional, Dict, Any, Tuple
+
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
+
+from tokens import count_tokens, truncate_to_tokens
 
 
 def lowercase_first_char(text: str) -> str:
@@ -34,82 +42,384 @@ def format_prompt_section(lead_in: str, value: Union[str, List[str]]) -> str:
     return f"{lead_in}\n{formatted_value}"
 
 
-def build_prompt_from_config(
-    config: Dict[str, Any],
-    input_data: str = "",
-    app_config: Optional[Dict[str, Any]] = None,
-) -> str:
-    """Builds a complete prompt string based on a config dictionary.
+# Closing line that ends every prompt.
+CLOSING_INSTRUCTION = "Now perform the task as instructed above."
+
+
+class CompiledPrompt:
+    """A prompt whose static sections have been assembled ahead of time.
+
+    Only the content block and any extra variables are joined in at render
+    time, so rendering the same config repeatedly skips re-walking it.
+    """
+
+    def __init__(self, prefix: str, reasoning: str = ""):
+        """Creates a compiled prompt.
+
+        Args:
+            prefix: Pre-joined sections that come before the content block.
+            reasoning: Reasoning strategy text, if the config selects one.
+        """
+        self.prefix = prefix
+        self.reasoning = reasoning
+        self.suffix = "\n\n".join(filter(None, [reasoning, CLOSING_INSTRUCTION]))
+        # Everything that does not vary between calls, for the system message
+        self.system_prompt = "\n\n".join(filter(None, [prefix, reasoning]))
+        self.prefix_hash = hashlib.sha256(
+            self.system_prompt.encode("utf-8")
+        ).hexdigest()[:16]
+
+    def render(self, input_data: str = "", **variables: Any) -> str:
+        """Renders the prompt for one call.
+
+        Args:
+            input_data: Content to be summarized or processed.
+            **variables: Extra values added after the content as
+                "The <name> is: <value>" lines, e.g. `category="dad developer"`.
+
+        Returns:
+            The fully constructed prompt.
+        """
+        parts = [self.prefix, *_variable_sections(input_data, variables), self.suffix]
+        return "\n\n".join(parts)
+
+    def render_messages(
+        self, input_data: str = "", **variables: Any
+    ) -> List[BaseMessage]:
+        """Renders the prompt as a stable system message plus a human message.
+
+        All static sections, including the reasoning strategy, go first in the
+        system message so providers can reuse their prompt-prefix cache across
+        calls; only the content and variables change in the human message.
+
+        Args:
+            input_data: Content to be summarized or processed.
+            **variables: Extra values, as in `render`.
+
+        Returns:
+            `[SystemMessage, HumanMessage]`.
+        """
+        parts = [*_variable_sections(input_data, variables), CLOSING_INSTRUCTION]
+        return [
+            SystemMessage(content=self.system_prompt),
+            HumanMessage(content="\n\n".join(parts)),
+        ]
+
+
+def _variable_sections(input_data: str, variables: Dict[str, Any]) -> List[str]:
+    """The per-call sections, in the same order for every render."""
+    parts = []
+    if input_data:
+        parts.append(format_input_section(input_data))
+    for name, value in variables.items():
+        parts.append(f"The {name} is: {value}")
+    return parts
+
+
+def format_input_section(input_data: str) -> str:
+    """Wraps the content to work on in delimiters.
 
     Args:
-        config: Dictionary specifying prompt components.
         input_data: Content to be summarized or processed.
-        app_config: Optional app-wide configuration (e.g., reasoning strategies).
 
     Returns:
-        A fully constructed prompt as a string.
+        The formatted content section.
+    """
+    return (
+        "Here is the content you need to work with:\n"
+        "<<<BEGIN CONTENT>>>\n"
+        "```\n" + input_data.strip() + "\n```\n<<<END CONTENT>>>"
+    )
 
-    Raises:
-        ValueError: If the required 'instruction' field is missing.
+
+def _build_static_sections(config: Dict[str, Any]) -> List[Tuple[str, str]]:
+    """Builds the config-derived sections that precede the content block.
+
+    Returns:
+        (config field, section text) pairs in prompt order.
     """
     prompt_parts = []
 
     if role := config.get("role"):
-        prompt_parts.append(f"You are {lowercase_first_char(role.strip())}.")
+        prompt_parts.append(("role", f"You are {lowercase_first_char(role.strip())}."))
 
     instruction = config.get("instruction")
     if not instruction:
         raise ValueError("Missing required field: 'instruction'")
-    prompt_parts.append(format_prompt_section("Your task is as follows:", instruction))
+    prompt_parts.append(
+        ("instruction", format_prompt_section("Your task is as follows:", instruction))
+    )
 
     if context := config.get("context"):
-        prompt_parts.append(f"Here’s some background that may help you:\n{context}")
+        prompt_parts.append(
+            ("context", f"Here’s some background that may help you:\n{context}")
+        )
 
     if constraints := config.get("output_constraints"):
         prompt_parts.append(
-            format_prompt_section(
-                "Ensure your response follows these rules:", constraints
+            (
+                "output_constraints",
+                format_prompt_section(
+                    "Ensure your response follows these rules:", constraints
+                ),
             )
         )
 
     if tone := config.get("style_or_tone"):
         prompt_parts.append(
-            format_prompt_section(
-                "Follow these style and tone guidelines in your response:", tone
+            (
+                "style_or_tone",
+                format_prompt_section(
+                    "Follow these style and tone guidelines in your response:", tone
+                ),
             )
         )
 
     if format_ := config.get("output_format"):
         prompt_parts.append(
-            format_prompt_section("Structure your response as follows:", format_)
+            (
+                "output_format",
+                format_prompt_section("Structure your response as follows:", format_),
+            )
         )
 
     if examples := config.get("examples"):
-        prompt_parts.append("Here are some examples to guide your response:")
+        prompt_parts.append(
+            ("examples", "Here are some examples to guide your response:")
+        )
         if isinstance(examples, list):
             for i, example in enumerate(examples, 1):
-                prompt_parts.append(f"Example {i}:\n{example}")
+                prompt_parts.append(("examples", f"Example {i}:\n{example}"))
         else:
-            prompt_parts.append(str(examples))
+            prompt_parts.append(("examples", str(examples)))
 
     if goal := config.get("goal"):
-        prompt_parts.append(f"Your goal is to achieve the following outcome:\n{goal}")
-
-    if input_data:
         prompt_parts.append(
-            "Here is the content you need to work with:\n"
-            "<<<BEGIN CONTENT>>>\n"
-            "```\n" + input_data.strip() + "\n```\n<<<END CONTENT>>>"
+            ("goal", f"Your goal is to achieve the following outcome:\n{goal}")
         )
 
+    return prompt_parts
+
+
+def _get_reasoning_strategy(
+    config: Dict[str, Any], app_config: Optional[Dict[str, Any]]
+) -> Optional[str]:
+    """Returns the reasoning strategy text selected by the config, if any."""
     reasoning_strategy = config.get("reasoning_strategy")
     if reasoning_strategy and reasoning_strategy != "None" and app_config:
         strategies = app_config.get("reasoning_strategies", {})
         if strategy_text := strategies.get(reasoning_strategy):
-            prompt_parts.append(strategy_text.strip())
+            return strategy_text.strip()
+    return None
+
+
+def _compile(
+    config: Dict[str, Any], app_config: Optional[Dict[str, Any]]
+) -> CompiledPrompt:
+    """Assembles the static sections of a prompt config."""
+    return CompiledPrompt(
+        prefix="\n\n".join(text for _, text in _build_static_sections(config)),
+        reasoning=_get_reasoning_strategy(config, app_config) or "",
+    )
+
+
+# Upper bound on the number of memoized compiled prompts.
+MAX_COMPILED_PROMPTS = 128
+
+# (id(config), id(app_config)) -> (config, app_config, compiled). The config
+# objects are kept alive so their ids cannot be reused while cached.
+_compiled_prompts: "OrderedDict[tuple, tuple]" = OrderedDict()
+_compiled_prompts_lock = threading.Lock()
+
+
+def compile_prompt(
+    config: Dict[str, Any], app_config: Optional[Dict[str, Any]] = None
+) -> CompiledPrompt:
+    """Compiles a prompt config into a reusable `CompiledPrompt`.
+
+    Results are memoized by config identity, so configs must not be mutated
+    after they are compiled (configs loaded from YAML never are).
+
+    Args:
+        config: Dictionary specifying prompt components.
+        app_config: Optional app-wide configuration (e.g., reasoning strategies).
+
+    Returns:
+        A compiled prompt; call `.render(input_data=...)` to build the text.
+
+    Raises:
+        ValueError: If the required 'instruction' field is missing.
+    """
+    key = (id(config), id(app_config))
+    with _compiled_prompts_lock:
+        entry = _compiled_prompts.get(key)
+        if entry is not None:
+            _compiled_prompts.move_to_end(key)
+            return entry[2]
+
+    compiled = _compile(config, app_config)
+    with _compiled_prompts_lock:
+        _compiled_prompts[key] = (config, app_config, compiled)
+        while len(_compiled_prompts) > MAX_COMPILED_PROMPTS:
+            _compiled_prompts.popitem(last=False)
+    return compiled
+
+
+def build_prompt_from_config(
+    config: Dict[str, Any],
+    input_data: str = "",
+    app_config: Optional[Dict[str, Any]] = None,
+) -> str:
+    """Builds a complete prompt string based on a config dictionary.
+
+    Args:
+        config: Dictionary specifying prompt components.
+        input_data: Content to be summarized or processed.
+        app_config: Optional app-wide configuration (e.g., reasoning strategies).
+
+    Returns:
+        A fully constructed prompt as a string.
+
+    Raises:
+        ValueError: If the required 'instruction' field is missing.
+    """
+    return _compile(config, app_config).render(input_data=input_data)
+
+
+def build_prompt_messages(
+    config: Dict[str, Any],
+    input_data: str = "",
+    app_config: Optional[Dict[str, Any]] = None,
+) -> List[BaseMessage]:
+    """Builds a prompt laid out for provider-side prefix caching.
+
+    The static sections form a system message that is byte-identical across
+    calls with the same config; the content goes in a trailing human message.
+    Use `compile_prompt(config, app_config).prefix_hash` to track reuse.
+
+    Args:
+        config: Dictionary specifying prompt components.
+        input_data: Content to be summarized or processed.
+        app_config: Optional app-wide configuration (e.g., reasoning strategies).
+
+    Returns:
+        `[SystemMessage, HumanMessage]`.
+
+    Raises:
+        ValueError: If the required 'instruction' field is missing.
+    """
+    return compile_prompt(config, app_config).render_messages(input_data=input_data)
+
+
+# Sections trimmed, in this order, when a prompt does not fit its budget.
+TRIMMABLE_SECTIONS = ("examples", "context", "style_or_tone", "output_format")
+
+
+@dataclass
+class BudgetedPrompt:
+    """A prompt assembled to fit a token budget, plus its token accounting."""
+
+    prompt: str
+    total_tokens: int
+    input_tokens: int
+    input_truncated: bool
+    section_tokens: Dict[str, int] = field(default_factory=dict)
+    dropped_sections: List[str] = field(default_factory=list)
+    messages: List[BaseMessage] = field(default_factory=list)
+    prefix_hash: str = ""
+
+
+def build_prompt_within_budget(
+    config: Dict[str, Any],
+    input_data: str = "",
+    app_config: Optional[Dict[str, Any]] = None,
+    max_prompt_tokens: int = 16_000,
+    min_input_tokens: int = 0,
+) -> BudgetedPrompt:
+    """Builds a prompt that fits in `max_prompt_tokens` tokens.
+
+    Optional sections are trimmed in `TRIMMABLE_SECTIONS` order (examples are
+    dropped last-first) until the fixed part of the prompt fits alongside
+    `min_input_tokens` of input, then the input is packed into whatever budget
+    remains, truncated with a marker if it does not fit.
+
+    Args:
+        config: Dictionary specifying prompt components.
+        input_data: Content to be summarized or processed.
+        app_config: Optional app-wide configuration (e.g., reasoning strategies).
+        max_prompt_tokens: Token budget for the whole prompt, i.e. the model's
+            context window minus the tokens reserved for its answer.
+        min_input_tokens: Input tokens to make room for before trimming stops.
+
+    Returns:
+        The prompt (also as cache-friendly messages) along with per-section
+        and total token counts.
+
+    Raises:
+        ValueError: If 'instruction' is missing or the required sections
+            alone exceed the budget.
+    """
+    sections = _build_static_sections(config)
+    reasoning = _get_reasoning_strategy(config, app_config) or ""
+    suffix = "\n\n".join(filter(None, [reasoning, CLOSING_INSTRUCTION]))
+    input_data = input_data.strip()
+    wrapper_tokens = count_tokens(format_input_section(" ")) + 1 if input_data else 0
+
+    def fixed_tokens() -> int:
+        fixed = "\n\n".join([text for _, text in sections] + [suffix])
+        return count_tokens(fixed) + wrapper_tokens
+
+    input_tokens = count_tokens(input_data)
+    target = max_prompt_tokens - min(min_input_tokens, input_tokens)
+    dropped_sections = []
+    for name in TRIMMABLE_SECTIONS:
+        while fixed_tokens() > target:
+            indices = [i for i, (section, _) in enumerate(sections) if section == name]
+            if not indices:
+                break
+            del sections[indices[-1]]
+            if name not in dropped_sections:
+                dropped_sections.append(name)
+
+    remaining = max_prompt_tokens - fixed_tokens()
+    if remaining < 0:
+        raise ValueError(
+            f"Required prompt sections need {max_prompt_tokens - remaining} tokens, "
+            f"over the budget of {max_prompt_tokens}"
+        )
+
+    compiled = CompiledPrompt(
+        prefix="\n\n".join(text for _, text in sections), reasoning=reasoning
+    )
+    # Token counts are not strictly additive across joins, so shrink the
+    # input by any overshoot until the whole prompt fits.
+    while True:
+        packed_input = input_data
+        if input_tokens > remaining:
+            packed_input = truncate_to_tokens(input_data, remaining)
+        prompt = compiled.render(input_data=packed_input)
+        total_tokens = count_tokens(prompt)
+        if total_tokens <= max_prompt_tokens or remaining <= 0:
+            break
+        remaining -= total_tokens - max_prompt_tokens
+
+    section_tokens: Dict[str, int] = {}
+    for name, text in sections:
+        section_tokens[name] = section_tokens.get(name, 0) + count_tokens(text)
+    packed_tokens = count_tokens(packed_input)
+    section_tokens["input"] = packed_tokens
+    section_tokens["suffix"] = count_tokens(suffix)
 
-    prompt_parts.append("Now perform the task as instructed above.")
-    return "\n\n".join(prompt_parts)
+    return BudgetedPrompt(
+        prompt=prompt,
+        total_tokens=total_tokens,
+        input_tokens=packed_tokens,
+        input_truncated=packed_input != input_data,
+        section_tokens=section_tokens,
+        dropped_sections=dropped_sections,
+        messages=compiled.render_messages(input_data=packed_input),
+        prefix_hash=compiled.prefix_hash,
+    )
 
 
 def print_prompt_preview(prompt: str, max_length: int = 500) -> None:
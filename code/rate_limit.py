@@ -0,0 +1,250 @@
+"""
+Client-side rate limiting and retry scheduling for LLM provider HTTP traffic.
+
+The transports here wrap an `httpx` transport, so every chat model client
+built on top of them (see `llm.get_llm`) is throttled to the provider's
+requests-per-minute and tokens-per-minute budget and retries 429/5xx
+responses with jittered exponential backoff, honouring `Retry-After`.
+"""
+
+import asyncio
+import email.utils
+import json
+import math
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, FrozenSet, Optional
+
+import httpx
+
+
+# Rough characters-per-token ratio used to estimate request size.
+CHARS_PER_TOKEN = 4
+
+
+class TokenBucket:
+    """Thread-safe token bucket refilled continuously at `per_minute / 60`."""
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60.0
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._updated
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+        self._updated = now
+
+    def reserve(self, amount: float = 1.0) -> float:
+        """Takes `amount` tokens and returns how long to wait before using them.
+
+        The bucket may go negative, which queues later callers behind this one
+        instead of letting them race for the same refill.
+        """
+        amount = min(amount, self.capacity)
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens -= amount
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+
+class RateLimiter:
+    """Requests-per-minute and tokens-per-minute budget for one provider."""
+
+    def __init__(self, rpm: Optional[float] = None, tpm: Optional[float] = None):
+        self.requests = TokenBucket(rpm) if rpm else None
+        self.tokens = TokenBucket(tpm) if tpm else None
+
+    def reserve(self, tokens: int) -> float:
+        """Reserves one request and `tokens` tokens; returns the wait in seconds."""
+        wait = 0.0
+        if self.requests is not None:
+            wait = max(wait, self.requests.reserve(1))
+        if self.tokens is not None and tokens:
+            wait = max(wait, self.tokens.reserve(tokens))
+        return wait
+
+    def acquire(self, tokens: int = 0) -> None:
+        """Blocks until the request fits in the budget."""
+        wait = self.reserve(tokens)
+        if wait > 0:
+            time.sleep(wait)
+
+    async def aacquire(self, tokens: int = 0) -> None:
+        """Async counterpart of `acquire`."""
+        wait = self.reserve(tokens)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+@dataclass
+class RetryPolicy:
+    """When and how long to back off before retrying a request."""
+
+    max_retries: int = 5
+    base_delay: float = 0.5
+    max_delay: float = 60.0
+    retry_statuses: FrozenSet[int] = field(
+        default_factory=lambda: frozenset({408, 409, 429, 500, 502, 503, 504})
+    )
+
+    def should_retry(self, response: httpx.Response, attempt: int) -> bool:
+        """Whether a response is retryable and retries remain."""
+        return (
+            response.status_code in self.retry_statuses
+            and attempt < self.max_retries
+        )
+
+    def backoff(self, attempt: int, response: Optional[httpx.Response] = None) -> float:
+        """Returns the delay before retry number `attempt` (0-based).
+
+        A server-supplied `Retry-After` wins; otherwise uses full-jitter
+        exponential backoff capped at `max_delay`.
+        """
+        if response is not None:
+            retry_after = parse_retry_after(response.headers)
+            if retry_after is not None:
+                return min(retry_after, self.max_delay)
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2**attempt))
+
+
+def parse_retry_after(headers: httpx.Headers) -> Optional[float]:
+    """Parses `retry-after-ms` / `Retry-After` (seconds or HTTP date) headers."""
+    if (value := headers.get("retry-after-ms")) is not None:
+        try:
+            return max(0.0, float(value) / 1000.0)
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+def estimate_request_tokens(request: httpx.Request) -> int:
+    """Estimates prompt plus completion tokens for a chat completion request."""
+    try:
+        body = request.content
+    except httpx.RequestNotRead:
+        return 0
+    tokens = math.ceil(len(body) / CHARS_PER_TOKEN)
+    try:
+        payload = json.loads(body) if body else {}
+    except ValueError:
+        return tokens
+    if isinstance(payload, dict):
+        max_tokens = payload.get("max_completion_tokens") or payload.get("max_tokens")
+        if isinstance(max_tokens, int):
+            tokens += max_tokens
+    return tokens
+
+
+class RateLimitedTransport(httpx.BaseTransport):
+    """Sync `httpx` transport that throttles and retries requests."""
+
+    def __init__(
+        self,
+        limiter: RateLimiter,
+        retry_policy: Optional[RetryPolicy] = None,
+        transport: Optional[httpx.BaseTransport] = None,
+    ):
+        self.limiter = limiter
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.transport = transport or httpx.HTTPTransport()
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        tokens = estimate_request_tokens(request)
+        policy = self.retry_policy
+        attempt = 0
+        while True:
+            self.limiter.acquire(tokens)
+            try:
+                response = self.transport.handle_request(request)
+            except httpx.TransportError:
+                if attempt >= policy.max_retries:
+                    raise
+                delay = policy.backoff(attempt)
+            else:
+                if not policy.should_retry(response, attempt):
+                    return response
+                delay = policy.backoff(attempt, response)
+                response.close()
+            attempt += 1
+            time.sleep(delay)
+
+    def close(self) -> None:
+        self.transport.close()
+
+
+class AsyncRateLimitedTransport(httpx.AsyncBaseTransport):
+    """Async `httpx` transport that throttles and retries requests."""
+
+    def __init__(
+        self,
+        limiter: RateLimiter,
+        retry_policy: Optional[RetryPolicy] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.limiter = limiter
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.transport = transport or httpx.AsyncHTTPTransport()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        tokens = estimate_request_tokens(request)
+        policy = self.retry_policy
+        attempt = 0
+        while True:
+            await self.limiter.aacquire(tokens)
+            try:
+                response = await self.transport.handle_async_request(request)
+            except httpx.TransportError:
+                if attempt >= policy.max_retries:
+                    raise
+                delay = policy.backoff(attempt)
+            else:
+                if not policy.should_retry(response, attempt):
+                    return response
+                delay = policy.backoff(attempt, response)
+                await response.aclose()
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
+
+
+_limiters: Dict[str, RateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(
+    provider: str, limits: Optional[Dict[str, float]] = None
+) -> RateLimiter:
+    """Returns the process-wide limiter for a provider.
+
+    Args:
+        provider: Provider name, e.g. 'openai' or 'groq'.
+        limits: Optional `{"rpm": ..., "tpm": ...}` used on first creation.
+
+    Returns:
+        The shared `RateLimiter`; unlimited when no limits are configured.
+    """
+    with _limiters_lock:
+        limiter = _limiters.get(provider)
+        if limiter is None:
+            limits = limits or {}
+            limiter = RateLimiter(rpm=limits.get("rpm"), tpm=limits.get("tpm"))
+            _limiters[provider] = limiter
+        return limiter
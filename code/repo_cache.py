@@ -0,0 +1,308 @@
+"""
+Content-addressed cache of extracted repositories.
+
+Each (repo URL, branch, ETag) is extracted once into its own directory under
+`.cache/repos`, so many repositories (and new versions of one) live side by
+side. A cached repo is served straight from disk while fresh, and otherwise
+revalidated with If-None-Match: an unchanged repo costs one 304 response
+instead of a full download. A branch that 404s is remembered as missing for
+as long as a cached repo stays fresh, and the branch that last resolved is
+tried first, so a repo on `master` does not cost a round trip to `main` on
+every call. The least-recently-used repos are evicted once the cache exceeds
+its size bound.
+"""
+
+import hashlib
+import os
+import shutil
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+
+import requests
+
+from paths import REPO_CACHE_DIR
+from repo_download import (
+    DEFAULT_BRANCHES,
+    RepoNotFound,
+    archive_url,
+    download_file,
+    download_path,
+    extract_archive,
+    normalize_repo_url,
+)
+
+
+class RepoCache:
+    """Extracted repositories keyed by URL, branch and ETag.
+
+    Args:
+        root: Directory holding the extracted repos and the SQLite index.
+        max_bytes: Total extracted size kept before LRU eviction.
+        revalidate_after: Seconds a cached repo is served without asking the
+            server whether it changed, and a missing branch is not retried.
+        session: HTTP session; the shared pooled session when None.
+    """
+
+    def __init__(
+        self,
+        root: str = REPO_CACHE_DIR,
+        max_bytes: int = 2 * 1024**3,
+        revalidate_after: float = 300,
+        session: Optional[requests.Session] = None,
+    ):
+        self.root = os.path.abspath(root)
+        self.max_bytes = max_bytes
+        self.revalidate_after = revalidate_after
+        self.session = session
+        self.hits = 0
+        self.revalidated = 0
+        self.downloads = 0
+
+        os.makedirs(self.root, exist_ok=True)
+        self._lock = threading.RLock()
+        # One lock per (repo, branch) so concurrent calls download it once
+        self._fetch_locks: Dict[str, threading.Lock] = defaultdict(threading.Lock)
+        self._conn = sqlite3.connect(
+            os.path.join(self.root, "index.sqlite"), check_same_thread=False
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS repos ("
+            " key TEXT PRIMARY KEY,"
+            " repo_url TEXT NOT NULL,"
+            " branch TEXT NOT NULL,"
+            " etag TEXT,"
+            " path TEXT NOT NULL,"
+            " size_bytes INTEGER NOT NULL,"
+            " validated_at REAL NOT NULL,"
+            " accessed_at REAL NOT NULL)"
+        )
+        # Negative cache: (repo, branch) keys that answered 404
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS missing ("
+            " key TEXT PRIMARY KEY,"
+            " checked_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(repo_url: str, branch: str) -> str:
+        return hashlib.sha256(f"{repo_url}\0{branch}".encode("utf-8")).hexdigest()
+
+    def _content_dir(self, repo_url: str, branch: str, etag: Optional[str]) -> str:
+        """Directory for one version of a repo; a new ETag gets a new one."""
+        # Without an ETag the content can't be identified, so use the time
+        version = etag if etag is not None else f"t{time.time_ns()}"
+        digest = hashlib.sha256(
+            f"{repo_url}\0{branch}\0{version}".encode("utf-8")
+        ).hexdigest()
+        name = repo_url.rstrip("/").rsplit("/", 1)[-1]
+        return os.path.join(self.root, f"{name}-{branch}-{digest[:16]}")
+
+    def _row(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT etag, path, validated_at FROM repos WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        etag, path, validated_at = row
+        if not os.path.isdir(path):
+            return None
+        return {"etag": etag, "path": path, "validated_at": validated_at}
+
+    def _touch(self, key: str, validated: bool = False) -> None:
+        now = time.time()
+        with self._lock:
+            if validated:
+                self._conn.execute(
+                    "UPDATE repos SET accessed_at = ?, validated_at = ? WHERE key = ?",
+                    (now, now, key),
+                )
+            else:
+                self._conn.execute(
+                    "UPDATE repos SET accessed_at = ? WHERE key = ?", (now, key)
+                )
+            self._conn.commit()
+
+    def get(self, repo_url: str, branches: List[str] = DEFAULT_BRANCHES) -> str:
+        """Returns a local directory holding the repository's files.
+
+        Args:
+            repo_url: Repository URL, e.g. https://github.com/user/repo.
+            branches: Branches to try, in order; a 404 moves on to the next.
+
+        Returns:
+            Path to the extracted repository.
+
+        Raises:
+            RepoNotFound: No branch archive exists.
+            requests.RequestException: The download failed and no cached
+                copy exists.
+            zipfile.BadZipFile: The archive is corrupt.
+            zip_extract.ArchiveTooLarge: The archive exceeds the size limit.
+        """
+        repo_url = normalize_repo_url(repo_url)
+        for branch in self._branch_order(repo_url, branches):
+            path = self._get_branch(repo_url, branch)
+            if path is not None:
+                return path
+        raise RepoNotFound(f"No archive found for {repo_url} on {', '.join(branches)}")
+
+    def _branch_order(self, repo_url: str, branches: List[str]) -> List[str]:
+        """`branches` with the most recently used cached branch first."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT branch FROM repos WHERE repo_url = ?"
+                " ORDER BY accessed_at DESC LIMIT 1",
+                (repo_url,),
+            ).fetchone()
+        if row is None or row[0] not in branches:
+            return list(branches)
+        return [row[0]] + [branch for branch in branches if branch != row[0]]
+
+    def _known_missing(self, key: str) -> bool:
+        """Whether the branch answered 404 within `revalidate_after`."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT checked_at FROM missing WHERE key = ?", (key,)
+            ).fetchone()
+        return row is not None and time.time() - row[0] < self.revalidate_after
+
+    def _mark_missing(self, key: str, cached: Optional[Dict[str, Any]]) -> None:
+        """Records a 404 and drops any copy of the branch cached before it."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO missing (key, checked_at) VALUES (?, ?)",
+                (key, time.time()),
+            )
+            self._conn.execute("DELETE FROM repos WHERE key = ?", (key,))
+            self._conn.commit()
+        if cached is not None:
+            shutil.rmtree(cached["path"], ignore_errors=True)
+
+    def _get_branch(self, repo_url: str, branch: str) -> Optional[str]:
+        """Returns the cached or fetched repo for one branch, None on a 404."""
+        key = self.make_key(repo_url, branch)
+        with self._lock:
+            fetch_lock = self._fetch_locks[key]
+
+        with fetch_lock:
+            cached = self._row(key)
+            fresh = (
+                cached is not None
+                and time.time() - cached["validated_at"] < self.revalidate_after
+            )
+            if fresh:
+                self._touch(key)
+                with self._lock:
+                    self.hits += 1
+                return cached["path"]
+            if self._known_missing(key):
+                return None
+
+            url = archive_url(repo_url, branch)
+            zip_path = download_path(url)
+            try:
+                download = download_file(
+                    url,
+                    zip_path,
+                    session=self.session,
+                    if_none_match=cached["etag"] if cached else None,
+                )
+            except requests.RequestException as e:
+                response = getattr(e, "response", None)
+                if response is not None and response.status_code == 404:
+                    self._mark_missing(key, cached)
+                    return None
+                if cached is None:
+                    raise
+                print(f"Revalidation of {url} failed ({e}); using cached copy")
+                self._touch(key)
+                return cached["path"]
+
+            if not download.modified:
+                self._touch(key, validated=True)
+                with self._lock:
+                    self.revalidated += 1
+                return cached["path"]
+
+            print(f"Downloaded repository from {url}")
+            path = self._content_dir(repo_url, branch, download.etag)
+            try:
+                size_bytes = extract_archive(zip_path, path)
+            finally:
+                os.remove(zip_path)
+
+            now = time.time()
+            with self._lock:
+                self.downloads += 1
+                self._conn.execute("DELETE FROM missing WHERE key = ?", (key,))
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO repos (key, repo_url, branch, etag, path,"
+                    " size_bytes, validated_at, accessed_at)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (key, repo_url, branch, download.etag, path, size_bytes, now, now),
+                )
+                self._conn.commit()
+            if cached is not None and cached["path"] != path:
+                shutil.rmtree(cached["path"], ignore_errors=True)
+            self._evict(keep=key)
+            return path
+
+    def _evict(self, keep: str) -> None:
+        """Removes least-recently-used repos until the cache fits `max_bytes`."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT key, path, size_bytes FROM repos ORDER BY accessed_at ASC"
+            ).fetchall()
+            total = sum(size for _, _, size in rows)
+            for key, path, size in rows:
+                if total <= self.max_bytes:
+                    break
+                if key == keep:
+                    continue
+                print(f"Evicting cached repository {path}")
+                shutil.rmtree(path, ignore_errors=True)
+                self._conn.execute("DELETE FROM repos WHERE key = ?", (key,))
+                total -= size
+            self._conn.commit()
+
+    def clear(self) -> None:
+        """Removes every cached repository and forgets missing branches."""
+        with self._lock:
+            for (path,) in self._conn.execute("SELECT path FROM repos").fetchall():
+                shutil.rmtree(path, ignore_errors=True)
+            self._conn.execute("DELETE FROM repos")
+            self._conn.execute("DELETE FROM missing")
+            self._conn.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns hit/revalidation/download counters and the cache size."""
+        with self._lock:
+            count, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size_bytes), 0) FROM repos"
+            ).fetchone()
+            return {
+                "hits": self.hits,
+                "revalidated": self.revalidated,
+                "downloads": self.downloads,
+                "repos": count,
+                "size_bytes": size,
+            }
+
+
+_default_cache: Optional[RepoCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def get_repo_cache() -> RepoCache:
+    """Returns the process-wide repo cache, creating it on first use."""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = RepoCache()
+        return _default_cache
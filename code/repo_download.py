@@ -0,0 +1,249 @@
+"""
+Streaming, resumable download of repository archives, extracted in place.
+
+The archive is streamed once to a `.part` file over a pooled
+`requests.Session`, resuming with an HTTP Range request if the connection
+drops. Members are then written once, in parallel (see `zip_extract`),
+straight to their final relative paths with the archive's top-level
+directory stripped, into a staging directory that is renamed over the
+target when complete. Readers of the target therefore never see a
+half-extracted repository.
+"""
+
+import os
+import shutil
+import threading
+from functools import lru_cache
+from typing import List, NamedTuple, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from paths import CACHE_DIR
+from zip_extract import extract_zip
+
+DOWNLOADS_DIR = os.path.join(CACHE_DIR, "downloads")
+
+# Branches tried, in order, when the URL does not name one.
+DEFAULT_BRANCHES = ("main", "master")
+
+DOWNLOAD_CHUNK_SIZE = 1 << 16
+DOWNLOAD_TIMEOUT = (10, 60)  # connect, read (seconds)
+
+
+class RepoNotFound(Exception):
+    """None of the candidate archive URLs exist."""
+
+
+class Download(NamedTuple):
+    """Outcome of `download_file`."""
+
+    path: str
+    # ETag of the downloaded file, or None if the server sent none
+    etag: Optional[str]
+    # False when the server answered 304 to If-None-Match; nothing was written
+    modified: bool = True
+
+
+@lru_cache(maxsize=None)
+def get_http_session() -> requests.Session:
+    """Returns the process-wide session, reusing connections across downloads."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def normalize_repo_url(repo_url: str) -> str:
+    """Strips whitespace, a trailing `/` and a `.git` suffix from a repo URL."""
+    repo_url = repo_url.strip().rstrip("/")
+    if repo_url.endswith(".git"):
+        repo_url = repo_url[:-4]
+    return repo_url.rstrip("/")
+
+
+def archive_url(repo_url: str, branch: str) -> str:
+    """GitHub-style zip archive URL of a branch."""
+    return f"{normalize_repo_url(repo_url)}/archive/refs/heads/{branch}.zip"
+
+
+def download_file(
+    url: str,
+    dest_path: str,
+    session: Optional[requests.Session] = None,
+    max_attempts: int = 3,
+    chunk_size: int = DOWNLOAD_CHUNK_SIZE,
+    if_none_match: Optional[str] = None,
+) -> Download:
+    """Streams a URL to a file, resuming a partial download where possible.
+
+    Bytes go to `dest_path + ".part"`, which is renamed to `dest_path` once
+    complete. A `.part` left by an earlier attempt or process is resumed with
+    a Range request guarded by If-Range, so a changed file starts over.
+
+    Args:
+        url: URL to download.
+        dest_path: Where to write the file.
+        session: HTTP session; the shared pooled session when None.
+        max_attempts: Attempts before a connection error is re-raised.
+        chunk_size: Bytes read from the socket at a time.
+        if_none_match: ETag of a copy the caller already has; the download
+            is skipped if the server reports it unchanged.
+
+    Returns:
+        The downloaded file's path and ETag, or `modified=False` if the
+        caller's copy is current.
+
+    Raises:
+        requests.HTTPError: The server answered with an error status.
+        requests.RequestException: Every attempt failed to connect or read.
+    """
+    session = session or get_http_session()
+    part_path = dest_path + ".part"
+    etag_path = part_path + ".etag"
+    os.makedirs(os.path.dirname(os.path.abspath(dest_path)), exist_ok=True)
+
+    for attempt in range(1, max_attempts + 1):
+        offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+        headers = {"If-None-Match": if_none_match} if if_none_match else {}
+        if offset and os.path.exists(etag_path):
+            with open(etag_path, "r") as f:
+                headers.update({"Range": f"bytes={offset}-", "If-Range": f.read()})
+        try:
+            with session.get(
+                url, headers=headers, stream=True, timeout=DOWNLOAD_TIMEOUT
+            ) as response:
+                if response.status_code == 304:
+                    return Download(dest_path, if_none_match, modified=False)
+                if response.status_code == 416:
+                    # Our partial file is not a prefix of the current one
+                    os.remove(part_path)
+                    continue
+                response.raise_for_status()
+                if response.status_code == 206:
+                    mode = "ab"
+                    print(f"Resuming download at byte {offset}")
+                else:
+                    mode = "wb"
+                    etag = response.headers.get("ETag")
+                    if etag:
+                        with open(etag_path, "w") as f:
+                            f.write(etag)
+                    elif os.path.exists(etag_path):
+                        os.remove(etag_path)
+                with open(part_path, mode) as f:
+                    for chunk in response.iter_content(chunk_size=chunk_size):
+                        f.write(chunk)
+            break
+        except (
+            requests.ConnectionError,
+            requests.Timeout,
+            requests.exceptions.ChunkedEncodingError,
+        ) as e:
+            if attempt == max_attempts:
+                raise
+            print(f"Download interrupted ({e}); retrying")
+    else:
+        raise requests.ConnectionError(f"Gave up downloading {url}")
+
+    os.replace(part_path, dest_path)
+    etag = None
+    if os.path.exists(etag_path):
+        with open(etag_path, "r") as f:
+            etag = f.read()
+        os.remove(etag_path)
+    return Download(dest_path, etag)
+
+
+def extract_archive(zip_path: str, dest_dir: str, **extract_options) -> int:
+    """Extracts a repository archive to `dest_dir`, replacing it atomically.
+
+    Members are written once, directly to their final relative paths, into a
+    staging directory next to `dest_dir` that is then renamed over it.
+
+    Args:
+        zip_path: Archive whose members share one top-level directory.
+        dest_dir: Directory that ends up holding the repository files.
+        **extract_options: Filters, limits and worker count passed to
+            `zip_extract.extract_zip`.
+
+    Returns:
+        Number of bytes extracted.
+    """
+    dest_dir = os.path.abspath(dest_dir)
+    staging = f"{dest_dir}.staging-{os.getpid()}-{threading.get_ident()}"
+    if os.path.exists(staging):
+        shutil.rmtree(staging)
+    os.makedirs(staging)
+    try:
+        written = extract_zip(zip_path, staging, **extract_options)
+        replace_dir(staging, dest_dir)
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    return written
+
+
+def replace_dir(src_dir: str, dest_dir: str) -> None:
+    """Moves `src_dir` to `dest_dir`, swapping out any existing `dest_dir`."""
+    if not os.path.exists(dest_dir):
+        os.replace(src_dir, dest_dir)
+        return
+    retired = f"{dest_dir}.old-{os.getpid()}-{threading.get_ident()}"
+    os.replace(dest_dir, retired)
+    os.replace(src_dir, dest_dir)
+    shutil.rmtree(retired, ignore_errors=True)
+
+
+def download_path(url: str, downloads_dir: str = DOWNLOADS_DIR) -> str:
+    """Where an archive URL is downloaded to.
+
+    One file per URL, so an interrupted download of it can be resumed.
+    """
+    return os.path.join(downloads_dir, url.split("://", 1)[-1].replace("/", "_"))
+
+
+def fetch_repo(
+    repo_url: str,
+    dest_dir: str,
+    branches: List[str] = DEFAULT_BRANCHES,
+    session: Optional[requests.Session] = None,
+    downloads_dir: str = DOWNLOADS_DIR,
+) -> str:
+    """Downloads a repository's zip archive and extracts it to `dest_dir`.
+
+    Args:
+        repo_url: Repository URL, e.g. https://github.com/user/repo.
+        dest_dir: Directory that ends up holding the repository files.
+        branches: Branches to try, in order; a 404 moves on to the next.
+        session: HTTP session; the shared pooled session when None.
+        downloads_dir: Where archives (and resumable partials) are kept
+            while downloading.
+
+    Returns:
+        `dest_dir`.
+
+    Raises:
+        RepoNotFound: No branch archive exists.
+        requests.RequestException: The download failed.
+        zipfile.BadZipFile: The archive is corrupt.
+        zip_extract.ArchiveTooLarge: The archive exceeds the size limit.
+    """
+    repo_url = normalize_repo_url(repo_url)
+    for branch in branches:
+        url = archive_url(repo_url, branch)
+        zip_path = download_path(url, downloads_dir)
+        print(f"Downloading repository from {url}")
+        try:
+            download_file(url, zip_path, session=session)
+        except requests.HTTPError as e:
+            if e.response is not None and e.response.status_code == 404:
+                continue
+            raise
+        try:
+            extract_archive(zip_path, dest_dir)
+        finally:
+            os.remove(zip_path)
+        return dest_dir
+    raise RepoNotFound(f"No archive found for {repo_url} on {', '.join(branches)}")
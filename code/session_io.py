@@ -0,0 +1,94 @@
+"""
+Pluggable input/output for the interactive joke graphs.
+
+Nodes read the user's answers and write their output through the `SessionIO`
+passed in the run config (`config["configurable"]["io"]`), falling back to
+the console. A scripted or queue-backed IO lets the same compiled graph run
+headless, including many concurrent sessions, each with its own thread_id.
+"""
+
+import queue
+from typing import Any, Dict, Iterable, List, Optional
+
+
+class SessionIO:
+    """Console input/output; subclasses override `read` and `write`."""
+
+    def read(self, prompt: str) -> str:
+        return input(prompt)
+
+    def write(self, text: str = "") -> None:
+        print(text)
+
+
+class ScriptedIO(SessionIO):
+    """Answers prompts from a fixed sequence.
+
+    Args:
+        answers: Answers returned in order.
+        default: Answer once the script runs out (e.g. "q" to quit).
+        capture: Keep written output in `self.output`; otherwise discard it.
+    """
+
+    def __init__(
+        self, answers: Iterable[str], default: str = "q", capture: bool = False
+    ):
+        self._answers = iter(answers)
+        self.default = default
+        self.capture = capture
+        self.output: List[str] = []
+
+    def read(self, prompt: str) -> str:
+        self.write(prompt)
+        return next(self._answers, self.default)
+
+    def write(self, text: str = "") -> None:
+        if self.capture:
+            self.output.append(text)
+
+
+class QueueIO(SessionIO):
+    """Reads answers from one queue and writes output to another.
+
+    Works with `queue.Queue` from threads, and from asyncio drivers through
+    `loop.run_in_executor(None, inbox.put, answer)`.
+
+    Args:
+        inbox: Queue the answers are taken from.
+        outbox: Queue the output is put on; output is discarded when None.
+        timeout: Seconds to wait for an answer before using `default`.
+        default: Answer used on timeout.
+    """
+
+    def __init__(
+        self,
+        inbox: "queue.Queue[str]",
+        outbox: Optional["queue.Queue[str]"] = None,
+        timeout: Optional[float] = None,
+        default: str = "q",
+    ):
+        self.inbox = inbox
+        self.outbox = outbox
+        self.timeout = timeout
+        self.default = default
+
+    def read(self, prompt: str) -> str:
+        self.write(prompt)
+        try:
+            return self.inbox.get(timeout=self.timeout)
+        except queue.Empty:
+            return self.default
+
+    def write(self, text: str = "") -> None:
+        if self.outbox is not None:
+            self.outbox.put(text)
+
+
+CONSOLE_IO = SessionIO()
+
+
+def get_session_io(config: Optional[Dict[str, Any]] = None) -> SessionIO:
+    """Returns the IO configured for a graph run, defaulting to the console."""
+    if not config:
+        return CONSOLE_IO
+    return config.get("configurable", {}).get("io") or CONSOLE_IO
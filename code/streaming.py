@@ -0,0 +1,109 @@
+"""
+Helpers for streaming LLM tokens out of LangGraph graphs as they arrive.
+"""
+
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from langchain_core.messages import AIMessage
+from langgraph.graph.state import CompiledStateGraph
+
+
+STREAM_MODES = ["messages", "values"]
+
+
+class TokenPrinter:
+    """Prints streamed message tokens, one line per message."""
+
+    def __init__(self, nodes: Optional[Iterable[str]] = None, prefix: str = ""):
+        """Creates the printer.
+
+        Args:
+            nodes: Only print tokens produced inside these graph nodes; all
+                nodes when None.
+            prefix: Text printed before the first token of each message.
+        """
+        self.nodes = set(nodes) if nodes is not None else None
+        self.prefix = prefix
+        self._message_id = None
+
+    def on_message(self, chunk: Tuple[Any, Dict[str, Any]]) -> None:
+        """Handles one `(message_chunk, metadata)` item from the messages stream."""
+        message, metadata = chunk
+        if self.nodes is not None and metadata.get("langgraph_node") not in self.nodes:
+            return
+        if not isinstance(message, AIMessage) or not isinstance(message.content, str):
+            return
+        if not message.content:
+            return
+        if message.id != self._message_id:
+            self.finish()
+            print(self.prefix, end="", flush=True)
+            self._message_id = message.id
+        print(message.content, end="", flush=True)
+
+    def finish(self) -> None:
+        """Ends the line of the message currently being printed, if any."""
+        if self._message_id is not None:
+            print(flush=True)
+            self._message_id = None
+
+
+def stream_graph(
+    graph: CompiledStateGraph,
+    state: Any,
+    config: Optional[Dict[str, Any]] = None,
+    nodes: Optional[Iterable[str]] = None,
+    prefix: str = "",
+) -> Dict[str, Any]:
+    """Runs a graph, printing LLM tokens as they arrive.
+
+    Args:
+        graph: Compiled graph to run.
+        state: Initial state.
+        config: Optional run config (recursion limit, thread id, ...).
+        nodes: Only stream tokens from these nodes; all nodes when None.
+        prefix: Text printed before each streamed message.
+
+    Returns:
+        The final graph state, as `graph.invoke` would return it.
+    """
+    printer = TokenPrinter(nodes, prefix)
+    final_state: Dict[str, Any] = {}
+    try:
+        for mode, chunk in graph.stream(
+            state, config=config, stream_mode=STREAM_MODES
+        ):
+            if mode == "messages":
+                printer.on_message(chunk)
+            else:
+                # A new state snapshot means the node finished streaming
+                printer.finish()
+                final_state = chunk
+    finally:
+        printer.finish()
+    return final_state
+
+
+async def astream_graph(
+    graph: CompiledStateGraph,
+    state: Any,
+    config: Optional[Dict[str, Any]] = None,
+    nodes: Optional[Iterable[str]] = None,
+    prefix: str = "",
+) -> Dict[str, Any]:
+    """Async counterpart of `stream_graph`."""
+    printer = TokenPrinter(nodes, prefix)
+    final_state: Dict[str, Any] = {}
+    try:
+        async for mode, chunk in graph.astream(
+            state, config=config, stream_mode=STREAM_MODES
+        ):
+            if mode == "messages":
+                printer.on_message(chunk)
+            else:
+                # A new state snapshot means the node finished streaming
+                printer.finish()
+                final_state = chunk
+    finally:
+        printer.finish()
+    return final_state
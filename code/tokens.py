@@ -0,0 +1,121 @@
+"""
+Local token counting used to keep prompts within a model's context budget.
+"""
+
+import os
+import threading
+from functools import lru_cache
+from typing import List
+
+from paths import CACHE_DIR
+
+# Encoding used by gpt-4o-mini and the gpt-oss models.
+DEFAULT_ENCODING = "o200k_base"
+
+# Where tiktoken caches its BPE files, unless TIKTOKEN_CACHE_DIR is set.
+TIKTOKEN_CACHE_DIR = os.path.join(CACHE_DIR, "tiktoken")
+
+# Rough characters-per-token ratio used when no tokenizer is available.
+CHARS_PER_TOKEN = 4
+
+TRUNCATION_MARKER = "\n[... truncated {dropped} tokens ...]"
+
+
+class _HeuristicEncoding:
+    """Stand-in for a tiktoken encoding that splits text into fixed-size runs."""
+
+    def encode(self, text: str) -> List[str]:
+        return [
+            text[i : i + CHARS_PER_TOKEN] for i in range(0, len(text), CHARS_PER_TOKEN)
+        ]
+
+    def decode(self, tokens: List[str]) -> str:
+        return "".join(tokens)
+
+
+_encoding_lock = threading.Lock()
+
+
+@lru_cache(maxsize=None)
+def _load_encoding(name: str):
+    # tiktoken reads the cache location from the environment; point it at
+    # .cache/tiktoken for this load only, and respect a user-set location
+    set_cache_dir = "TIKTOKEN_CACHE_DIR" not in os.environ
+    if set_cache_dir:
+        os.environ["TIKTOKEN_CACHE_DIR"] = TIKTOKEN_CACHE_DIR
+    try:
+        import tiktoken
+
+        return tiktoken.get_encoding(name)
+    except Exception as e:
+        print(
+            f"Tokenizer '{name}' unavailable ({type(e).__name__}); "
+            "estimating token counts."
+        )
+        return _HeuristicEncoding()
+    finally:
+        if set_cache_dir:
+            os.environ.pop("TIKTOKEN_CACHE_DIR", None)
+
+
+def get_encoding(name: str = DEFAULT_ENCODING):
+    """Loads a tokenizer once per process.
+
+    Uses `tiktoken`. The encoding's BPE file is downloaded on first use, which
+    needs network access, and then cached under `.cache/tiktoken` (or
+    `TIKTOKEN_CACHE_DIR` if set), so later runs load it from disk. Falls back
+    to a character heuristic when `tiktoken` is not installed or the encoding
+    cannot be loaded, e.g. offline before the first download.
+
+    Args:
+        name: tiktoken encoding name.
+
+    Returns:
+        An object with `encode(text)` and `decode(tokens)` methods.
+    """
+    # Serialize the first load so concurrent callers don't all fetch the file
+    with _encoding_lock:
+        return _load_encoding(name)
+
+
+def count_tokens(text: str, encoding_name: str = DEFAULT_ENCODING) -> int:
+    """Counts the tokens in a string.
+
+    Args:
+        text: Text to count.
+        encoding_name: tiktoken encoding name.
+
+    Returns:
+        Number of tokens.
+    """
+    if not text:
+        return 0
+    return len(get_encoding(encoding_name).encode(text))
+
+
+def truncate_to_tokens(
+    text: str, max_tokens: int, encoding_name: str = DEFAULT_ENCODING
+) -> str:
+    """Cuts text down to at most `max_tokens` tokens, marking the cut.
+
+    Args:
+        text: Text to truncate.
+        max_tokens: Token budget for the result, including the marker.
+        encoding_name: tiktoken encoding name.
+
+    Returns:
+        The text unchanged if it fits, otherwise its head plus a marker (the
+        marker is omitted when the budget is too small to hold it).
+    """
+    encoding = get_encoding(encoding_name)
+    tokens = encoding.encode(text)
+    if len(tokens) <= max_tokens:
+        return text
+    marker = TRUNCATION_MARKER.format(dropped=len(tokens))
+    marker_tokens = len(encoding.encode(marker))
+    if marker_tokens > max_tokens:
+        # No room for the marker; a bare cut is the best we can do
+        return encoding.decode(tokens[: max(0, max_tokens)])
+    keep = max_tokens - marker_tokens
+    marker = TRUNCATION_MARKER.format(dropped=len(tokens) - keep)
+    return encoding.decode(tokens[:keep]) + marker
@@ -0,0 +1,267 @@
+"""
+Result cache for idempotent tool calls.
+
+Tools opt in by declaring a `CachePolicy` next to their definition with the
+`cache_policy` decorator. Results are keyed by tool name and arguments, kept
+in an in-memory LRU backed by SQLite (unless the policy opts out of
+persistence), and expire per the tool's TTL.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from langchain_core.tools import BaseTool
+
+from paths import TOOL_CACHE_FPATH
+
+_MISSING = object()
+
+
+@dataclass(frozen=True)
+class CachePolicy:
+    """How results of one tool may be reused.
+
+    Args:
+        cacheable: Whether results may be reused at all.
+        ttl_seconds: Result lifetime in seconds, or None to never expire.
+        key: Maps the call arguments to a cache key; canonical JSON of the
+            arguments when None.
+        validate: Called with (args, result) before a result is stored and on
+            every hit; returning False skips or discards the entry, e.g. for
+            a failed call or a returned path that no longer exists.
+        persist: Whether results may be written to the on-disk tier. Tools
+            that return file contents (which may hold secrets) must set this
+            to False or not be cacheable at all.
+    """
+
+    cacheable: bool = True
+    ttl_seconds: Optional[float] = 3600
+    key: Optional[Callable[[Dict[str, Any]], str]] = None
+    validate: Optional[Callable[[Dict[str, Any], Any], bool]] = None
+    persist: bool = True
+
+
+NO_CACHE = CachePolicy(cacheable=False)
+
+
+def cache_policy(**policy_kwargs) -> Callable[[BaseTool], BaseTool]:
+    """Declares a tool's `CachePolicy`; apply on top of `@tool`."""
+    policy = CachePolicy(**policy_kwargs)
+
+    def decorate(tool: BaseTool) -> BaseTool:
+        tool.metadata = {**(tool.metadata or {}), "cache_policy": policy}
+        return tool
+
+    return decorate
+
+
+def get_cache_policy(tool: BaseTool) -> CachePolicy:
+    """Returns the policy declared on a tool; tools are uncached by default."""
+    return (tool.metadata or {}).get("cache_policy", NO_CACHE)
+
+
+class ToolResultCache:
+    """In-memory LRU of tool results backed by a SQLite table.
+
+    Only JSON-serializable results reach the disk tier.
+    """
+
+    # Run the disk size check every N writes.
+    _EVICT_EVERY = 64
+
+    def __init__(
+        self,
+        db_path: Optional[str] = TOOL_CACHE_FPATH,
+        max_memory_entries: int = 256,
+        max_disk_entries: int = 10_000,
+    ):
+        """Creates the cache.
+
+        Args:
+            db_path: SQLite file for the disk tier, or None for memory only.
+            max_memory_entries: Maximum entries kept in the memory tier.
+            max_disk_entries: Maximum entries kept in the disk tier.
+        """
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_entries = max_disk_entries
+        self.hits: Dict[str, int] = defaultdict(int)
+        self.misses: Dict[str, int] = defaultdict(int)
+
+        self._lock = threading.RLock()
+        # key -> (expires_at, result); expires_at is None for no expiry
+        self._memory: "OrderedDict[str, Tuple[Optional[float], Any]]" = OrderedDict()
+        self._writes = 0
+        self._conn: Optional[sqlite3.Connection] = None
+
+        if db_path:
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+            self._conn = sqlite3.connect(db_path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS tool_results ("
+                " key TEXT PRIMARY KEY,"
+                " tool TEXT NOT NULL,"
+                " value TEXT NOT NULL,"
+                " expires_at REAL,"
+                " accessed_at REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS tool_results_accessed_at"
+                " ON tool_results (accessed_at)"
+            )
+            self._conn.commit()
+
+    @staticmethod
+    def make_key(tool_name: str, args: Dict[str, Any], policy: CachePolicy) -> str:
+        """Returns the content address for a tool call."""
+        if policy.key is not None:
+            args_key = policy.key(args)
+        else:
+            args_key = json.dumps(args, sort_keys=True, default=str)
+        return hashlib.sha256(f"{tool_name}\0{args_key}".encode("utf-8")).hexdigest()
+
+    def _remember(self, key: str, expires_at: Optional[float], value: Any) -> None:
+        self._memory[key] = (expires_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def _forget(self, key: str) -> None:
+        self._memory.pop(key, None)
+        if self._conn is not None:
+            self._conn.execute("DELETE FROM tool_results WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def lookup(self, tool_name: str, args: Dict[str, Any], policy: CachePolicy) -> Any:
+        """Returns the cached result of a call, or `_MISSING` on a miss."""
+        key = self.make_key(tool_name, args, policy)
+        now = time.time()
+        with self._lock:
+            value = _MISSING
+            entry = self._memory.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                self._memory.move_to_end(key)
+            elif self._conn is not None and policy.persist:
+                row = self._conn.execute(
+                    "SELECT value, expires_at FROM tool_results WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    value_json, expires_at = row
+                    value = json.loads(value_json)
+                    self._conn.execute(
+                        "UPDATE tool_results SET accessed_at = ? WHERE key = ?",
+                        (now, key),
+                    )
+                    self._conn.commit()
+                    self._remember(key, expires_at, value)
+
+            if value is not _MISSING:
+                expired = expires_at is not None and now > expires_at
+                if expired or (
+                    policy.validate is not None and not policy.validate(args, value)
+                ):
+                    self._forget(key)
+                    value = _MISSING
+
+            if value is _MISSING:
+                self.misses[tool_name] += 1
+            else:
+                self.hits[tool_name] += 1
+            return value
+
+    def update(
+        self, tool_name: str, args: Dict[str, Any], policy: CachePolicy, value: Any
+    ) -> None:
+        """Stores the result of a call in both tiers."""
+        key = self.make_key(tool_name, args, policy)
+        now = time.time()
+        expires_at = now + policy.ttl_seconds if policy.ttl_seconds is not None else None
+        with self._lock:
+            self._remember(key, expires_at, value)
+            if self._conn is None or not policy.persist:
+                return
+            try:
+                value_json = json.dumps(value)
+            except (TypeError, ValueError):
+                return  # memory tier only
+            self._conn.execute(
+                "INSERT OR REPLACE INTO tool_results"
+                " (key, tool, value, expires_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (key, tool_name, value_json, expires_at, now),
+            )
+            self._writes += 1
+            if self._writes % self._EVICT_EVERY == 0:
+                self._evict_disk(now)
+            self._conn.commit()
+
+    def _evict_disk(self, now: float) -> None:
+        """Drops expired rows, then least-recently-used rows over the bound."""
+        self._conn.execute("DELETE FROM tool_results WHERE expires_at < ?", (now,))
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM tool_results").fetchone()
+        excess = count - self.max_disk_entries
+        if excess > 0:
+            self._conn.execute(
+                "DELETE FROM tool_results WHERE key IN ("
+                " SELECT key FROM tool_results ORDER BY accessed_at ASC LIMIT ?)",
+                (excess,),
+            )
+
+    def clear(self) -> None:
+        """Empties both tiers and resets the counters."""
+        with self._lock:
+            self._memory.clear()
+            self.hits.clear()
+            self.misses.clear()
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM tool_results")
+                self._conn.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns overall and per-tool hit/miss counters."""
+        with self._lock:
+            hits = sum(self.hits.values())
+            misses = sum(self.misses.values())
+            return {
+                "hits": hits,
+                "misses": misses,
+                "hit_rate": hits / (hits + misses) if hits + misses else 0.0,
+                "memory_entries": len(self._memory),
+                "per_tool": {
+                    tool: {"hits": self.hits[tool], "misses": self.misses[tool]}
+                    for tool in sorted(set(self.hits) | set(self.misses))
+                },
+            }
+
+    def call(self, tool: BaseTool, args: Dict[str, Any]) -> Any:
+        """Invokes a tool, reusing a cached result when its policy allows."""
+        policy = get_cache_policy(tool)
+        if not policy.cacheable:
+            return tool.invoke(args)
+        cached = self.lookup(tool.name, args, policy)
+        if cached is not _MISSING:
+            return cached
+        result = tool.invoke(args)
+        if policy.validate is None or policy.validate(args, result):
+            self.update(tool.name, args, policy, result)
+        return result
+
+
+_default_cache: Optional[ToolResultCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def get_tool_cache() -> ToolResultCache:
+    """Returns the process-wide tool result cache, creating it on first use."""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = ToolResultCache()
+        return _default_cache
@@ -0,0 +1,241 @@
+"""
+Tools, their JSON schemas, registry and tool-bound models, built once, plus
+concurrent execution of a model's tool calls and size-capped results.
+
+Converting tools to JSON schemas for `bind_tools` takes milliseconds, which
+the tool-calling graphs used to pay on every LLM step. A `ToolSet` does the
+conversion once and memoizes the bound model per chat model; `get_toolset`
+returns the same `ToolSet` for as long as the tool set itself is unchanged.
+"""
+
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from langchain_core.runnables import Runnable
+from langchain_core.tools import BaseTool
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+# Distinct tool sets kept alive at once.
+MAX_CACHED_TOOLSETS = 8
+
+# Tool calls from one model turn run concurrently on a bounded pool.
+DEFAULT_TOOL_WORKERS = 8
+DEFAULT_TOOL_TIMEOUT = 120.0
+
+# Longest tool result, in characters, put into a ToolMessage.
+DEFAULT_MAX_RESULT_CHARS = 20_000
+
+RESULT_TRUNCATION_MARKER = "\n[... truncated {dropped} characters of tool output ...]"
+
+
+class ToolSet:
+    """A fixed set of tools with everything the graphs need precomputed.
+
+    Args:
+        tools: Tools to expose to the model.
+    """
+
+    def __init__(self, tools: Sequence[BaseTool]):
+        self.tools: Tuple[BaseTool, ...] = tuple(tools)
+        self.registry: Dict[str, BaseTool] = {tool.name: tool for tool in self.tools}
+        self.schemas: List[Dict[str, Any]] = [
+            convert_to_openai_tool(tool) for tool in self.tools
+        ]
+        self.fingerprint = toolset_fingerprint(self.tools)
+        self._bound: Dict[int, Tuple[Runnable, Runnable]] = {}
+        self._lock = threading.Lock()
+
+    def bind(self, llm: Runnable) -> Runnable:
+        """Returns `llm` bound to these tools, binding once per model."""
+        with self._lock:
+            cached = self._bound.get(id(llm))
+            # The model is kept alongside so its id can't be reused
+            if cached is None or cached[0] is not llm:
+                cached = self._bound[id(llm)] = (llm, llm.bind_tools(self.schemas))
+            return cached[1]
+
+    def describe(self) -> str:
+        """One "- name: description" line per tool, for system prompts."""
+        return "\n".join(
+            f"- {name}: {tool.description}" for name, tool in self.registry.items()
+        )
+
+
+def toolset_fingerprint(tools: Sequence[BaseTool]) -> Tuple:
+    """Identifies a tool set by its tool objects and their schema inputs."""
+    return tuple((tool.name, id(tool), tool.description) for tool in tools)
+
+
+_toolsets: "OrderedDict[Tuple, ToolSet]" = OrderedDict()
+_toolsets_lock = threading.Lock()
+
+
+def get_toolset(tools: Sequence[BaseTool]) -> ToolSet:
+    """Returns the cached `ToolSet` for these tools, building it if new.
+
+    Args:
+        tools: Tools to expose to the model.
+
+    Returns:
+        A `ToolSet` that is rebuilt only when the tools change.
+    """
+    fingerprint = toolset_fingerprint(tools)
+    with _toolsets_lock:
+        toolset = _toolsets.get(fingerprint)
+        if toolset is not None:
+            _toolsets.move_to_end(fingerprint)
+            return toolset
+    toolset = ToolSet(tools)
+    with _toolsets_lock:
+        _toolsets[fingerprint] = toolset
+        while len(_toolsets) > MAX_CACHED_TOOLSETS:
+            _toolsets.popitem(last=False)
+    return toolset
+
+
+class ToolFuture(Future):
+    """Future of one tool call, recording when the call started running."""
+
+    def __init__(self):
+        super().__init__()
+        self.started = threading.Event()
+        self.started_at: Optional[float] = None
+        self.abandoned = False
+
+
+class ToolExecutor:
+    """Runs tool calls on daemon threads, at most `max_workers` at a time.
+
+    A running thread can't be stopped, so a thread pool loses a worker for
+    good to every hung tool and later calls queue behind it. Here a call
+    given up on with `abandon` stops counting against `max_workers` at once;
+    its thread is left to finish (or hang) on its own.
+
+    Args:
+        max_workers: Calls running at once, not counting abandoned ones.
+    """
+
+    def __init__(self, max_workers: int = DEFAULT_TOOL_WORKERS):
+        self.max_workers = max_workers
+        self._running = 0
+        self._queue: "deque[Tuple[ToolFuture, Callable, Tuple]]" = deque()
+        self._lock = threading.Lock()
+
+    def submit(self, fn: Callable, *args: Any) -> ToolFuture:
+        """Schedules `fn(*args)`; it starts as soon as a slot is free."""
+        future = ToolFuture()
+        with self._lock:
+            self._queue.append((future, fn, args))
+            self._start_queued()
+        return future
+
+    def abandon(self, future: ToolFuture) -> None:
+        """Gives up on a call: cancels it if queued, frees its slot if running."""
+        with self._lock:
+            if future.cancel() or future.done() or future.abandoned:
+                return
+            future.abandoned = True
+            self._running -= 1
+            self._start_queued()
+
+    def _start_queued(self) -> None:
+        # Called with the lock held
+        while self._queue and self._running < self.max_workers:
+            future, fn, args = self._queue.popleft()
+            if not future.set_running_or_notify_cancel():
+                continue
+            self._running += 1
+            future.started_at = time.monotonic()
+            future.started.set()
+            threading.Thread(
+                target=self._run, args=(future, fn, args), name="tool", daemon=True
+            ).start()
+
+    def _run(self, future: ToolFuture, fn: Callable, args: Tuple) -> None:
+        try:
+            result = fn(*args)
+        except BaseException as e:
+            future.set_exception(e)
+        else:
+            future.set_result(result)
+        with self._lock:
+            if not future.abandoned:
+                self._running -= 1
+                self._start_queued()
+
+
+@lru_cache(maxsize=None)
+def get_tool_executor(max_workers: int = DEFAULT_TOOL_WORKERS) -> ToolExecutor:
+    """Returns the shared executor that runs tool calls, one per size."""
+    return ToolExecutor(max_workers)
+
+
+def run_tool_calls(
+    tool_calls: Sequence[Dict[str, Any]],
+    execute: Callable[[Dict[str, Any]], Any],
+    timeout: float = DEFAULT_TOOL_TIMEOUT,
+    timeouts: Optional[Dict[str, float]] = None,
+    max_workers: int = DEFAULT_TOOL_WORKERS,
+) -> List[Any]:
+    """Runs independent tool calls concurrently.
+
+    A failing or timed-out call yields an error string in its slot instead
+    of failing the batch, so the model still sees every other result. A
+    timeout only abandons the call: Python can't stop a running thread, so
+    the tool keeps running in the background and its result is dropped, but
+    it no longer holds one of the `max_workers` slots.
+
+    Args:
+        tool_calls: Tool calls from an AI message.
+        execute: Runs one tool call and returns its result.
+        timeout: Seconds each call may run, counted from when it starts.
+        timeouts: Per-tool overrides of `timeout`, by tool name.
+        max_workers: Size of the pool the calls run on.
+
+    Returns:
+        One result per tool call, in `tool_calls` order.
+    """
+    timeouts = timeouts or {}
+    executor = get_tool_executor(max_workers)
+    futures = [executor.submit(execute, tool_call) for tool_call in tool_calls]
+
+    results = []
+    for tool_call, future in zip(tool_calls, futures):
+        name = tool_call["name"]
+        limit = timeouts.get(name, timeout)
+        try:
+            # Starts once running calls finish or are abandoned at their limit
+            future.started.wait()
+            remaining = max(0.0, future.started_at + limit - time.monotonic())
+            results.append(future.result(timeout=remaining))
+        except FuturesTimeoutError:
+            executor.abandon(future)
+            print(f"Tool '{name}' timed out after {limit:g}s")
+            results.append(f"Error: Tool '{name}' timed out after {limit:g}s")
+        except Exception as e:
+            print(f"Tool '{name}' failed: {e}")
+            results.append(f"Error: Tool '{name}' failed: {e}")
+    return results
+
+
+def format_tool_result(result: Any, max_chars: int = DEFAULT_MAX_RESULT_CHARS) -> str:
+    """Renders a tool result for a ToolMessage, capped at `max_chars`.
+
+    Args:
+        result: Whatever the tool returned.
+        max_chars: Characters kept before the rest is replaced by a marker.
+
+    Returns:
+        The result as a string of at most about `max_chars` characters.
+    """
+    text = str(result)
+    if len(text) <= max_chars:
+        return text
+    return text[:max_chars] + RESULT_TRUNCATION_MARKER.format(
+        dropped=len(text) - max_chars
+    )
@@ -6,11 +6,15 @@ from typing import Union, Optional
 import yaml
 
 from paths import PUBLICATION_FPATH, ENV_FPATH, CONFIG_FILE_PATH
+from tokens import truncate_to_tokens
 
 
-def load_publication():
+def load_publication(max_tokens: Optional[int] = None):
     """Loads the publication markdown file.
 
+    Args:
+        max_tokens: Optional token budget; longer publications are truncated.
+
     Returns:
         Content of the publication as a string.
 
@@ -27,10 +31,14 @@ def load_publication():
     # Read and return the file content
     try:
         with open(file_path, "r", encoding="utf-8") as file:
-            return file.read()
+            content = file.read()
     except IOError as e:
         raise IOError(f"Error reading publication file: {e}") from e
 
+    if max_tokens is not None:
+        content = truncate_to_tokens(content, max_tokens)
+    return content
+
 
 def load_yaml_config(file_path: Union[str, Path]) -> dict:
     """Loads a YAML configuration file.
@@ -4,56 +4,85 @@ from langgraph.graph import StateGraph, END
 from langgraph.graph.message import add_messages
 from langchain_core.messages import HumanMessage, SystemMessage, ToolMessage
 from langchain_community.tools.tavily_search import TavilySearchResults
-from langchain_groq import ChatGroq
+from llm import get_llm
+from streaming import stream_graph
+from toolset import (
+    DEFAULT_MAX_RESULT_CHARS,
+    DEFAULT_TOOL_TIMEOUT,
+    DEFAULT_TOOL_WORKERS,
+    ToolSet,
+    format_tool_result,
+    get_toolset,
+    run_tool_calls,
+)
+from utils import load_config
 
 from dotenv import load_dotenv
 load_dotenv()
 
 # Set up your LLM - the brain of your agent
-llm = ChatGroq(model="openai/gpt-oss-20b", temperature=0)
+# (pooled, rate-limited and retried through the shared provider transport)
+llm = get_llm("openai/gpt-oss-20b", temperature=0)
 
 # Define your agent's state - this is your agent's memory
 class State(TypedDict):
     messages: Annotated[list, add_messages]
 
-# Create your tools - your agent's capabilities
+# Create your tools - your agent's capabilities (built once, then reused)
+_tools = None
+
 def get_tools():
-    return [
-        TavilySearchResults(max_results=3, search_depth="advanced")
-    ]
+    global _tools
+    if _tools is None:
+        _tools = [
+            TavilySearchResults(max_results=3, search_depth="advanced")
+        ]
+    return _tools
 
 
 # The LLM node - where your agent thinks and decides
-def llm_node(state: State):
-    """Your agent's brain - decides whether to use tools or respond."""
-    tools = get_tools()
-    llm_with_tools = llm.bind_tools(tools)  # Give your agent access to tools
-    
-    response = llm_with_tools.invoke(state["messages"])
-    return {"messages": [response]}
+def make_llm_node(toolset: ToolSet):
+    llm_with_tools = toolset.bind(llm)  # Give your agent access to tools
+
+    def llm_node(state: State):
+        """Your agent's brain - decides whether to use tools or respond."""
+        response = llm_with_tools.invoke(state["messages"])
+        return {"messages": [response]}
+
+    return llm_node
 
 
 # The tools node - where your agent takes action
-def tools_node(state: State):
-    """Your agent's hands - executes the chosen tools."""
-    tools = get_tools()
-    tool_registry = {tool.name: tool for tool in tools}
-    
-    last_message = state["messages"][-1]
-    tool_messages = []
-    
-    # Execute each tool the agent requested
-    for tool_call in last_message.tool_calls:
-        tool = tool_registry[tool_call["name"]]
-        result = tool.invoke(tool_call["args"])
+def make_tools_node(toolset: ToolSet):
+    tool_registry = toolset.registry
+    # Timeouts, pool size and result cap come from `tool_execution` in config.yaml
+    execution_cfg = load_config().get("tool_execution", {})
+    max_result_chars = execution_cfg.get("max_result_chars", DEFAULT_MAX_RESULT_CHARS)
+
+    def tools_node(state: State):
+        """Your agent's hands - executes the chosen tools."""
+        last_message = state["messages"][-1]
+        tool_messages = []
         
-        # Send the result back to the agent
-        tool_messages.append(ToolMessage(
-            content=str(result),
-            tool_call_id=tool_call["id"]
-        ))
-    
-    return {"messages": tool_messages}
+        # Execute the tools the agent requested at the same time; a failing
+        # or slow tool turns into an error message instead of a crash
+        results = run_tool_calls(
+            last_message.tool_calls,
+            lambda tool_call: tool_registry[tool_call["name"]].invoke(tool_call["args"]),
+            timeout=execution_cfg.get("timeout_seconds", DEFAULT_TOOL_TIMEOUT),
+            timeouts=execution_cfg.get("timeouts"),
+            max_workers=execution_cfg.get("max_workers", DEFAULT_TOOL_WORKERS),
+        )
+        for tool_call, result in zip(last_message.tool_calls, results):
+            # Send the result back to the agent
+            tool_messages.append(ToolMessage(
+                content=format_tool_result(result, max_result_chars),
+                tool_call_id=tool_call["id"]
+            ))
+        
+        return {"messages": tool_messages}
+
+    return tools_node
 
 # Decision function - should we use tools or finish?
 def should_continue(state: State):
@@ -68,11 +97,13 @@ def should_continue(state: State):
 
 # Build the complete workflow
 def create_agent():
+    # Tool schemas, the bound model and the registry are built once here
+    toolset = get_toolset(get_tools())
     graph = StateGraph(State)
     
     # Add the nodes
-    graph.add_node("llm", llm_node)
-    graph.add_node("tools", tools_node)
+    graph.add_node("llm", make_llm_node(toolset))
+    graph.add_node("tools", make_tools_node(toolset))
     
     # Set the starting point
     graph.set_entry_point("llm")
@@ -95,5 +126,5 @@ initial_state = {
     ]
 }
 
-result = agent.invoke(initial_state)
-print(result["messages"][-1].content)
\ No newline at end of file
+# Stream the answer token by token instead of waiting for the full completion
+result = stream_graph(agent, initial_state, nodes={"llm"})
\ No newline at end of file
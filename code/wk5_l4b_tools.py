@@ -1,13 +1,29 @@
-from typing import Dict, Any, Annotated
+from typing import Dict, Any, Annotated, Optional
 from typing_extensions import TypedDict
 from langchain.schema import HumanMessage, SystemMessage
 from langgraph.graph import StateGraph, END
-from langgraph.graph.message import add_messages
 from dotenv import load_dotenv
+from conversation_memory import (
+    ConversationMemory,
+    MemoryPolicy,
+    make_llm_summarizer,
+    merge_messages,
+)
 from custom_tools import get_all_tools
 from langchain_core.messages import ToolMessage
 from langchain_core.runnables.graph import MermaidDrawMethod
 from llm import get_llm
+from streaming import stream_graph
+from tool_cache import ToolResultCache, get_tool_cache
+from toolset import (
+    DEFAULT_MAX_RESULT_CHARS,
+    DEFAULT_TOOL_TIMEOUT,
+    DEFAULT_TOOL_WORKERS,
+    ToolSet,
+    format_tool_result,
+    get_toolset,
+    run_tool_calls,
+)
 from utils import load_config
 
 
@@ -18,39 +34,80 @@ llm = get_llm(config["llm"])
 
 
 class State(TypedDict):
-    messages: Annotated[list, add_messages]
+    messages: Annotated[list, merge_messages]
 
 
-def llm_node(state: State):
-    """Node that handles LLM invocation."""
-    # Get tools and create LLM with tools
-    tools = get_all_tools()
-    llm_with_tools = llm.bind_tools(tools)
+def create_memory() -> ConversationMemory:
+    """Builds the history window configured under `conversation_memory`."""
+    policy = MemoryPolicy(**config.get("conversation_memory", {}))
+    return ConversationMemory(
+        policy, make_llm_summarizer(llm, policy.summary_max_tokens)
+    )
 
-    # Invoke the LLM
-    response = llm_with_tools.invoke(state["messages"])
-    return {"messages": [response]}
 
+def make_memory_node(memory: ConversationMemory):
+    """Creates the node that windows and summarizes the history before a model call."""
 
-def tools_node(state: State):
-    """Node that handles tool execution."""
-    tool_registry = create_tool_registry()
+    def memory_node(state: State):
+        """Node that keeps the history within the memory policy."""
+        return {"messages": memory.compact(state["messages"])}
 
-    # Get the last message (should be from LLM with tool calls)
-    last_message = state["messages"][-1]
+    return memory_node
 
-    tool_messages = []
-    if hasattr(last_message, "tool_calls") and last_message.tool_calls:
-        # Execute all tool calls
-        for tool_call in last_message.tool_calls:
-            result = execute_tool_call(tool_call, tool_registry)
-            # Create tool message
-            tool_message = ToolMessage(
-                content=str(result), tool_call_id=tool_call["id"]
+
+def make_llm_node(llm_with_tools):
+    """Creates the node that invokes an LLM already bound to the tools."""
+
+    def llm_node(state: State):
+        """Node that handles LLM invocation."""
+        response = llm_with_tools.invoke(state["messages"])
+        return {"messages": [response]}
+
+    return llm_node
+
+
+def make_tools_node(
+    tool_registry: Dict[str, Any],
+    cache: Optional[ToolResultCache] = None,
+    max_result_chars: int = DEFAULT_MAX_RESULT_CHARS,
+    **execution_options,
+):
+    """Creates the node that executes tool calls from a prebuilt registry.
+
+    Args:
+        tool_registry: Tools by name.
+        cache: Result cache for tools that declare a cache policy, or None
+            to always run them.
+        max_result_chars: Tool results longer than this are truncated
+            before they reach the model.
+        **execution_options: `timeout`, `timeouts` and `max_workers` passed
+            to `run_tool_calls`.
+    """
+
+    def tools_node(state: State):
+        """Node that handles tool execution."""
+        # Get the last message (should be from LLM with tool calls)
+        last_message = state["messages"][-1]
+
+        tool_messages = []
+        if hasattr(last_message, "tool_calls") and last_message.tool_calls:
+            # Execute all tool calls concurrently; results keep call order
+            results = run_tool_calls(
+                last_message.tool_calls,
+                lambda tool_call: execute_tool_call(tool_call, tool_registry, cache),
+                **execution_options,
             )
-            tool_messages.append(tool_message)
+            for tool_call, result in zip(last_message.tool_calls, results):
+                # Create tool message
+                tool_message = ToolMessage(
+                    content=format_tool_result(result, max_result_chars),
+                    tool_call_id=tool_call["id"],
+                )
+                tool_messages.append(tool_message)
 
-    return {"messages": tool_messages}
+        return {"messages": tool_messages}
+
+    return tools_node
 
 
 
@@ -65,23 +122,52 @@ def should_continue(state: State):
     return END
 
 
-def create_graph():
-    """Create and configure the LangGraph workflow."""
+def create_graph(
+    toolset: Optional[ToolSet] = None, memory: Optional[ConversationMemory] = None
+):
+    """Create and configure the LangGraph workflow.
+
+    Tool schemas, the tool-bound model and the registry are built here once
+    per compile rather than on every step.
+
+    Args:
+        toolset: Tools to expose; `get_all_tools()` when None.
+        memory: History window applied before every model call;
+            `create_memory()` when None.
+    """
+    toolset = toolset or get_toolset(get_all_tools())
+    memory = memory or create_memory()
+
     # Create the graph
     graph = StateGraph(State)
 
     # Add nodes
-    graph.add_node("llm", llm_node)
-    graph.add_node("tools", tools_node)
+    graph.add_node("memory", make_memory_node(memory))
+    graph.add_node("llm", make_llm_node(toolset.bind(llm)))
+    execution_cfg = config.get("tool_execution", {})
+    graph.add_node(
+        "tools",
+        make_tools_node(
+            toolset.registry,
+            cache=get_tool_cache() if config.get("tool_cache", True) else None,
+            max_result_chars=execution_cfg.get(
+                "max_result_chars", DEFAULT_MAX_RESULT_CHARS
+            ),
+            timeout=execution_cfg.get("timeout_seconds", DEFAULT_TOOL_TIMEOUT),
+            timeouts=execution_cfg.get("timeouts"),
+            max_workers=execution_cfg.get("max_workers", DEFAULT_TOOL_WORKERS),
+        ),
+    )
 
     # Set entry point
-    graph.set_entry_point("llm")
+    graph.set_entry_point("memory")
+    graph.add_edge("memory", "llm")
 
     # Add conditional edges
     graph.add_conditional_edges("llm", should_continue, {"tools": "tools", END: END})
 
     # After tools, always go back to LLM
-    graph.add_edge("tools", "llm")
+    graph.add_edge("tools", "memory")
 
     return graph.compile()
 
@@ -95,19 +181,29 @@ def visualize_graph(graph: StateGraph, save_path: str):
 
 def create_tool_registry() -> Dict[str, Any]:
     """Create a registry mapping tool names to their functions."""
-    tools = get_all_tools()
-    return {tool.name: tool for tool in tools}
+    return get_toolset(get_all_tools()).registry
+
 
 
+def execute_tool_call(
+    tool_call: Dict[str, Any],
+    tool_registry: Dict[str, Any],
+    cache: Optional[ToolResultCache] = None,
+) -> Any:
+    """Execute a single tool call and return the result.
 
-def execute_tool_call(tool_call: Dict[str, Any], tool_registry: Dict[str, Any]) -> Any:
-    """Execute a single tool call and return the result."""
+    With a `cache`, a repeated call to a tool whose cache policy allows it is
+    answered from the cache instead of running the tool again.
+    """
     tool_name = tool_call["name"]
     tool_args = tool_call["args"]
 
     if tool_name in tool_registry:
         tool_function = tool_registry[tool_name]
-        result = tool_function.invoke(tool_args)
+        if cache is not None:
+            result = cache.call(tool_function, tool_args)
+        else:
+            result = tool_function.invoke(tool_args)
         print(f"🔧 Tool used: {tool_name} with args {tool_args} → Result: {result}")
         return result
     else:
@@ -116,22 +212,26 @@ def execute_tool_call(tool_call: Dict[str, Any], tool_registry: Dict[str, Any])
 
 
 
-def main():
+def main(stream: bool = True):
+    """Runs the interactive chatbot.
+
+    Args:
+        stream: Print the bot's reply token by token as it is generated.
+    """
 
     print("LangGraph Chatbot with Custom Tools")
     print("Type 'exit' or 'quit' to end the session.")
 
     # Create the graph
-    app = create_graph()
+    toolset = get_toolset(get_all_tools())
+    memory = create_memory()
+    app = create_graph(toolset, memory)
 
     # Display available tools
-    tool_registry = create_tool_registry()
-    print(f"Available tools: {', '.join(tool_registry.keys())}\n")
+    print(f"Available tools: {', '.join(toolset.registry)}\n")
 
     # System message with dynamic tool information
-    tool_descriptions = "\n".join(
-        [f"- {name}: {tool.description}" for name, tool in tool_registry.items()]
-    )
+    tool_descriptions = toolset.describe()
     system_content = f"""You are a helpful AI assistant. Remember the previous messages in this conversation. 
 
 You have access to the following tools:
@@ -153,19 +253,36 @@ Use these tools when appropriate to help answer questions."""
             initial_state["messages"].append(HumanMessage(content=user_input))
 
             # Run the graph
-            result = app.invoke(initial_state)
+            if stream:
+                result = stream_graph(app, initial_state, nodes={"llm"}, prefix="Bot: ")
+                print()
+            else:
+                result = app.invoke(initial_state)
 
             # Update state with results
             initial_state["messages"] = result["messages"]
 
             # Display the final response
             last_message = result["messages"][-1]
-            if hasattr(last_message, "content") and last_message.content:
+            if not stream and hasattr(last_message, "content") and last_message.content:
                 print(f"Bot: {last_message.content}\n")
 
+            memory_stats = memory.stats()
+            print(
+                f"[context: {memory_stats['context_tokens']} tokens, "
+                f"{memory_stats['evicted_turns']} turns summarized]\n"
+            )
+
     except KeyboardInterrupt:
         print("\n👋 Session terminated.")
 
+    if config.get("tool_cache", True):
+        stats = get_tool_cache().stats()
+        print(
+            f"Tool cache: {stats['hits']} hits, {stats['misses']} misses "
+            f"({stats['hit_rate']:.0%} hit rate)"
+        )
+
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
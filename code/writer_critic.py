@@ -0,0 +1,72 @@
+"""
+Parallel-candidate writer–critic step shared by the LLM joke bots.
+
+Instead of the serial write → judge → rewrite loop, K candidates are written
+concurrently, each is judged as soon as it is written, and the first approved
+candidate wins; every other in-flight call is cancelled.
+"""
+
+import asyncio
+from typing import Awaitable, Callable, Optional, Tuple
+
+from langchain_core.runnables import RunnableLambda
+
+from event_loop import run_sync
+
+
+async def race_candidates(
+    write: Callable[[], Awaitable[str]],
+    judge: Callable[[str], Awaitable[bool]],
+    num_candidates: int,
+) -> Tuple[Optional[str], bool]:
+    """Writes and judges candidates concurrently, returning the first approved.
+
+    Args:
+        write: Produces one candidate.
+        judge: Returns True if a candidate is approved.
+        num_candidates: Number of candidates to write concurrently.
+
+    Returns:
+        `(candidate, approved)`. If nothing is approved, the first candidate
+        that was judged is returned with `approved=False` (None if every
+        call failed).
+    """
+
+    async def write_and_judge() -> Tuple[str, bool]:
+        candidate = await write()
+        return candidate, await judge(candidate)
+
+    tasks = [asyncio.create_task(write_and_judge()) for _ in range(num_candidates)]
+    fallback = None
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            try:
+                candidate, approved = await next_done
+            except Exception as e:
+                print(f"Candidate failed: {e}")
+                continue
+            if approved:
+                return candidate, True
+            if fallback is None:
+                fallback = candidate
+    finally:
+        # Short-circuit: stop the remaining writer/critic calls
+        for task in tasks:
+            task.cancel()
+    return fallback, False
+
+
+def make_parallel_node(
+    afunc: Callable[..., Awaitable[dict]],
+) -> RunnableLambda:
+    """Wraps an async node so it also runs under a synchronous `graph.invoke`.
+
+    The synchronous path runs on the shared background loop rather than a
+    fresh `asyncio.run` loop, so the pooled async HTTP connections stay valid
+    across calls.
+    """
+
+    def func(state) -> dict:
+        return run_sync(afunc(state))
+
+    return RunnableLambda(func, afunc=afunc, name=afunc.__name__)
@@ -0,0 +1,212 @@
+"""
+Parallel extraction of large zip archives.
+
+Members are sharded across a thread pool. The central directory is parsed
+once and shared: `ZipFile.open` gives every member its own read position and
+only holds the archive's lock for the raw read, while zlib decompression and
+file writes release the GIL. Threads therefore scale without each worker
+re-parsing the directory (which is GIL-bound and costs ~25 µs per member) or
+members being pickled to processes.
+
+Unwanted paths (VCS metadata, binaries) are filtered out before anything is
+written, members that would escape the target directory are skipped, and
+size limits are checked against the central directory before extraction
+starts. Permission bits and
+modification times are restored from the archive.
+"""
+
+import os
+import shutil
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import Collection, List, Optional, Tuple
+
+EXTRACT_BUFFER_SIZE = 1 << 20
+
+# Archives with fewer members than this are extracted on the calling thread.
+MIN_PARALLEL_MEMBERS = 256
+
+DEFAULT_WORKERS = min(8, os.cpu_count() or 1)
+
+# Directory names whose contents are never extracted.
+DEFAULT_SKIP_DIRS = frozenset({".git", ".hg", ".svn", "__pycache__"})
+
+# File extensions treated as binaries and not extracted.
+DEFAULT_SKIP_EXTENSIONS = frozenset(
+    {
+        ".7z", ".a", ".bin", ".bmp", ".class", ".dll", ".dylib", ".exe", ".gif",
+        ".gz", ".ico", ".jar", ".jpeg", ".jpg", ".mp3", ".mp4", ".o", ".pdf",
+        ".png", ".pyc", ".pyo", ".so", ".tar", ".webp", ".whl", ".zip",
+    }
+)
+
+DEFAULT_MAX_MEMBER_BYTES = 50 * 1024**2
+DEFAULT_MAX_TOTAL_BYTES = 2 * 1024**3
+
+
+class ArchiveTooLarge(ValueError):
+    """The extracted archive would exceed the total size limit."""
+
+
+def member_target(name: str, root: str, strip_components: int = 1) -> Optional[str]:
+    """Final path of an archive member with leading directories stripped.
+
+    Returns None for the stripped directories themselves and for members that
+    would land outside `root` (absolute paths or `..` components).
+    """
+    parts = name.replace("\\", "/").split("/")[strip_components:]
+    relative = "/".join(part for part in parts if part)
+    if not relative:
+        return None
+    target = os.path.normpath(os.path.join(root, relative))
+    if not target.startswith(os.path.join(root, "")):
+        print(f"Skipping unsafe archive member: {name}")
+        return None
+    return target
+
+
+def is_wanted(
+    relative_path: str,
+    skip_dirs: Collection[str] = DEFAULT_SKIP_DIRS,
+    skip_extensions: Collection[str] = DEFAULT_SKIP_EXTENSIONS,
+) -> bool:
+    """Whether a member path passes the directory and extension filters."""
+    parts = relative_path.split(os.sep)
+    if any(part in skip_dirs for part in parts):
+        return False
+    return os.path.splitext(parts[-1])[1].lower() not in skip_extensions
+
+
+def plan_extraction(
+    archive: zipfile.ZipFile,
+    dest_dir: str,
+    strip_components: int = 1,
+    skip_dirs: Collection[str] = DEFAULT_SKIP_DIRS,
+    skip_extensions: Collection[str] = DEFAULT_SKIP_EXTENSIONS,
+    max_member_bytes: Optional[int] = DEFAULT_MAX_MEMBER_BYTES,
+    max_total_bytes: Optional[int] = DEFAULT_MAX_TOTAL_BYTES,
+) -> Tuple[List[Tuple[zipfile.ZipInfo, str]], List[Tuple[zipfile.ZipInfo, str]]]:
+    """Selects the members to extract and where they go.
+
+    Returns:
+        (files, directories) as (member, target path) pairs.
+
+    Raises:
+        ArchiveTooLarge: The selected files exceed `max_total_bytes`.
+    """
+    files, dirs = [], []
+    total = 0
+    for info in archive.infolist():
+        target = member_target(info.filename, dest_dir, strip_components)
+        if target is None:
+            continue
+        relative = target[len(dest_dir) + 1 :]
+        if not is_wanted(relative, skip_dirs, skip_extensions):
+            continue
+        if info.is_dir():
+            dirs.append((info, target))
+            continue
+        if max_member_bytes is not None and info.file_size > max_member_bytes:
+            print(f"Skipping {info.filename}: {info.file_size:,} bytes is over the limit")
+            continue
+        total += info.file_size
+        files.append((info, target))
+    if max_total_bytes is not None and total > max_total_bytes:
+        raise ArchiveTooLarge(
+            f"Archive expands to {total:,} bytes, "
+            f"over the {max_total_bytes:,} byte limit"
+        )
+    return files, dirs
+
+
+def _date_time_to_epoch(info: zipfile.ZipInfo) -> float:
+    return time.mktime(info.date_time + (0, 0, -1))
+
+
+def _restore_metadata(info: zipfile.ZipInfo, target: str) -> None:
+    mode = (info.external_attr >> 16) & 0o777
+    if mode:
+        os.chmod(target, mode)
+    mtime = _date_time_to_epoch(info)
+    os.utime(target, (mtime, mtime))
+
+
+def _extract_shard(
+    archive: zipfile.ZipFile, shard: List[Tuple[zipfile.ZipInfo, str]]
+) -> int:
+    """Writes one shard of members, each read through its own member handle."""
+    written = 0
+    for info, target in shard:
+        with archive.open(info) as src, open(target, "wb") as dst:
+            shutil.copyfileobj(src, dst, EXTRACT_BUFFER_SIZE)
+        _restore_metadata(info, target)
+        written += info.file_size
+    return written
+
+
+def extract_zip(
+    zip_path: str,
+    dest_dir: str,
+    workers: int = DEFAULT_WORKERS,
+    strip_components: int = 1,
+    skip_dirs: Collection[str] = DEFAULT_SKIP_DIRS,
+    skip_extensions: Collection[str] = DEFAULT_SKIP_EXTENSIONS,
+    max_member_bytes: Optional[int] = DEFAULT_MAX_MEMBER_BYTES,
+    max_total_bytes: Optional[int] = DEFAULT_MAX_TOTAL_BYTES,
+) -> int:
+    """Extracts an archive into an existing directory using a thread pool.
+
+    Args:
+        zip_path: Archive to extract.
+        dest_dir: Directory the members are written under.
+        workers: Threads extracting concurrently.
+        strip_components: Leading path components removed from member names
+            (1 drops GitHub's `repo-branch/` directory).
+        skip_dirs: Directory names whose contents are not extracted.
+        skip_extensions: File extensions (lowercase, with dot) not extracted.
+        max_member_bytes: Larger members are skipped; None for no limit.
+        max_total_bytes: Extraction is refused if the selected members add
+            up to more; None for no limit.
+
+    Returns:
+        Number of bytes written.
+
+    Raises:
+        ArchiveTooLarge: The archive exceeds `max_total_bytes`.
+        zipfile.BadZipFile: The archive is corrupt.
+    """
+    dest_dir = os.path.abspath(dest_dir)
+    with zipfile.ZipFile(zip_path) as archive:
+        files, dirs = plan_extraction(
+            archive,
+            dest_dir,
+            strip_components,
+            skip_dirs,
+            skip_extensions,
+            max_member_bytes,
+            max_total_bytes,
+        )
+
+        # Create every directory up front so workers only ever write files
+        for parent in sorted({os.path.dirname(target) for _, target in files}):
+            os.makedirs(parent, exist_ok=True)
+        for _, target in dirs:
+            os.makedirs(target, exist_ok=True)
+
+        if workers <= 1 or len(files) < MIN_PARALLEL_MEMBERS:
+            written = _extract_shard(archive, files)
+        else:
+            # Strided shards spread large and small members evenly
+            shards = [files[i::workers] for i in range(workers)]
+            with ThreadPoolExecutor(
+                max_workers=workers, thread_name_prefix="unzip"
+            ) as pool:
+                written = sum(
+                    pool.map(lambda shard: _extract_shard(archive, shard), shards)
+                )
+
+    # Directory times last, since writing their files updated them
+    for info, target in dirs:
+        _restore_metadata(info, target)
+    return written
@@ -0,0 +1,111 @@
+from typing import Annotated
+
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage
+from langgraph.graph import END, StateGraph
+from typing_extensions import TypedDict
+
+from conversation_memory import (
+    SUMMARY_MESSAGE_ID,
+    ConversationMemory,
+    MemoryPolicy,
+    merge_messages,
+)
+
+
+class State(TypedDict):
+    messages: Annotated[list, merge_messages]
+
+
+def make_graph(memory):
+    """memory -> echo, like the tool chatbot's memory -> llm step."""
+
+    def memory_node(state):
+        return {"messages": memory.compact(state["messages"])}
+
+    def echo_node(state):
+        question = state["messages"][-1].content
+        return {"messages": [AIMessage(content="reply " + question)]}
+
+    graph = StateGraph(State)
+    graph.add_node("memory", memory_node)
+    graph.add_node("echo", echo_node)
+    graph.set_entry_point("memory")
+    graph.add_edge("memory", "echo")
+    graph.add_edge("echo", END)
+    return graph.compile()
+
+
+def test_reducer_only_merges():
+    first = merge_messages(
+        [], [SystemMessage(content="sys"), HumanMessage(content="a" * 5000)]
+    )
+    merged = merge_messages(first, [AIMessage(content="b")])
+
+    assert [m.content for m in merged] == ["sys", "a" * 5000, "b"]
+
+
+def test_old_turns_are_summarized_in_the_node():
+    summaries = []
+
+    def summarizer(previous, messages):
+        summaries.append((previous, [m.content for m in messages]))
+        return f"summary {len(summaries)}"
+
+    memory = ConversationMemory(
+        MemoryPolicy(max_tokens=60, tool_result_max_tokens=None), summarizer
+    )
+    app = make_graph(memory)
+
+    state = {"messages": [SystemMessage(content="sys")]}
+    for i in range(4):
+        state["messages"].append(HumanMessage(content=f"question {i} " + "word " * 10))
+        state = app.invoke(state)
+
+    messages = state["messages"]
+    assert messages[0].content == "sys"
+    assert messages[1].id == SUMMARY_MESSAGE_ID
+    assert messages[1].content.endswith(f"summary {len(summaries)}")
+    assert messages[-1].content.startswith("reply question 3")
+    # Each turn is summarized once, and never kept alongside its summary
+    folded = [content for _, batch in summaries for content in batch]
+    assert len(folded) == len(set(folded))
+    assert not any(m.content in folded for m in messages)
+    assert memory.stats()["evicted_turns"] == len(folded) // 2
+
+
+def test_failed_summary_still_evicts():
+    def summarizer(previous, messages):
+        raise RuntimeError("model down")
+
+    memory = ConversationMemory(
+        MemoryPolicy(max_tokens=30, tool_result_max_tokens=None), summarizer
+    )
+    app = make_graph(memory)
+
+    state = {"messages": [HumanMessage(content="first " + "word " * 20)]}
+    state = app.invoke(state)
+    state["messages"].append(HumanMessage(content="second"))
+    state = app.invoke(state)
+
+    assert [m.content for m in state["messages"]] == ["second", "reply second"]
+
+
+def test_older_tool_results_are_truncated():
+    memory = ConversationMemory(
+        MemoryPolicy(max_tokens=None, tool_result_max_tokens=5, summarize=False)
+    )
+    history = merge_messages(
+        [],
+        [
+            HumanMessage(content="q1"),
+            AIMessage(content="", tool_calls=[{"name": "t", "args": {}, "id": "1"}]),
+            ToolMessage(content="x " * 100, tool_call_id="1"),
+            AIMessage(content="a1"),
+            HumanMessage(content="q2"),
+        ],
+    )
+
+    updated = merge_messages(history, memory.compact(history))
+
+    assert len(updated) == len(history)
+    assert len(updated[2].content) < len(history[2].content)
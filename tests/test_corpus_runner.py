@@ -0,0 +1,95 @@
+import json
+
+from langchain_core.language_models import FakeListChatModel
+
+from corpus_runner import MANIFEST_FILENAME, load_manifest, run_corpus
+
+CONFIG_KEYS = ["joke_writer_cfg", "joke_critic_cfg"]
+
+
+def make_corpus(root):
+    corpus = root / "corpus"
+    (corpus / "nested").mkdir(parents=True)
+    (corpus / "a.md").write_text("First document.", encoding="utf-8")
+    (corpus / "nested" / "b.md").write_text("Second document.", encoding="utf-8")
+    return corpus
+
+
+def run(corpus, output_dir, **kwargs):
+    return run_corpus(
+        corpus,
+        prompt_config_keys=CONFIG_KEYS,
+        output_dir=output_dir,
+        max_workers=4,
+        llm=FakeListChatModel(responses=["fake response"]),
+        app_config={},
+        **kwargs,
+    )
+
+
+def read_manifest(output_dir):
+    lines = (output_dir / MANIFEST_FILENAME).read_text(encoding="utf-8").splitlines()
+    return [json.loads(line) for line in lines]
+
+
+def test_every_pair_is_written_and_recorded(tmp_path):
+    corpus = make_corpus(tmp_path)
+    output_dir = tmp_path / "out"
+
+    report = run(corpus, output_dir)
+
+    assert (report.completed, report.skipped, report.failed) == (4, 0, 0)
+    assert report.configs == 2
+    assert report.input_tokens > 0 and report.output_tokens > 0
+    for key in CONFIG_KEYS:
+        for doc in ("a.md", "nested/b.md"):
+            output = output_dir / key / f"{doc}.response.md"
+            assert output.read_text(encoding="utf-8").endswith("fake response")
+
+    entries = read_manifest(output_dir)
+    assert {(e["doc"], e["config"]) for e in entries} == {
+        (doc, key) for doc in ("a.md", "nested/b.md") for key in CONFIG_KEYS
+    }
+    assert all(e["output"] == f"{e['config']}/{e['doc']}.response.md" for e in entries)
+    assert sum(e["input_tokens"] for e in entries) == report.input_tokens
+
+
+def test_rerun_skips_finished_pairs(tmp_path):
+    corpus = make_corpus(tmp_path)
+    output_dir = tmp_path / "out"
+    run(corpus, output_dir)
+
+    (corpus / "c.md").write_text("Third document.", encoding="utf-8")
+    report = run(corpus, output_dir)
+
+    assert (report.completed, report.skipped, report.failed) == (2, 4, 0)
+    assert len(read_manifest(output_dir)) == 6
+
+
+def test_failing_document_does_not_stop_the_batch(tmp_path):
+    corpus = make_corpus(tmp_path)
+    output_dir = tmp_path / "out"
+    # Not UTF-8, so reading it fails
+    (corpus / "broken.md").write_bytes(b"\xff\xfe\xfa")
+
+    report = run(corpus, output_dir)
+
+    assert (report.completed, report.skipped, report.failed) == (4, 0, 2)
+    assert ("broken.md", "joke_writer_cfg") not in load_manifest(
+        output_dir / MANIFEST_FILENAME
+    )
+
+    # Failed pairs are not recorded, so the next run retries them
+    (corpus / "broken.md").write_text("Fixed document.", encoding="utf-8")
+    report = run(corpus, output_dir)
+    assert (report.completed, report.skipped, report.failed) == (2, 4, 0)
+
+
+def test_torn_manifest_line_is_ignored(tmp_path):
+    manifest = tmp_path / MANIFEST_FILENAME
+    manifest.write_text(
+        json.dumps({"doc": "a.md", "config": "joke_writer_cfg"}) + "\n{\"doc\": ",
+        encoding="utf-8",
+    )
+
+    assert load_manifest(manifest) == {("a.md", "joke_writer_cfg")}
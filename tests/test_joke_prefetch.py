@@ -0,0 +1,78 @@
+import threading
+
+from joke_bot_llm2 import AgenticJokeState, make_prefetch_nodes
+from joke_prefetch import JokePrefetcher
+from session_io import ScriptedIO
+
+
+def test_switching_category_is_not_stalled_by_old_work():
+    release_old = threading.Event()
+    old_started = threading.Event()
+
+    def produce(category):
+        if category == "old":
+            old_started.set()
+            release_old.wait(5)
+        return f"{category} joke"
+
+    prefetcher = JokePrefetcher(produce, depth=1, workers=2)
+    try:
+        prefetcher.set_category("old")
+        assert old_started.wait(5)
+
+        # The old production is still running; the new category must not wait
+        assert prefetcher.get("new", timeout=2) == "new joke"
+    finally:
+        release_old.set()
+        prefetcher.close()
+
+
+def test_jokes_for_a_previous_category_are_discarded():
+    release_old = threading.Event()
+    old_started = threading.Event()
+
+    def produce(category):
+        if category == "old":
+            old_started.set()
+            release_old.wait(5)
+        return f"{category} joke"
+
+    prefetcher = JokePrefetcher(produce, depth=1, workers=2)
+    try:
+        prefetcher.set_category("old")
+        assert old_started.wait(5)
+        assert prefetcher.get("new", timeout=2) == "new joke"
+        release_old.set()
+
+        assert prefetcher.get("new", timeout=2) == "new joke"
+    finally:
+        prefetcher.close()
+    assert prefetcher.buffered("old") == 0
+
+
+def test_one_session_exiting_keeps_other_sessions_prefetching():
+    created = []
+
+    def new_prefetcher():
+        prefetcher = JokePrefetcher(lambda category: f"{category} joke", depth=1)
+        created.append(prefetcher)
+        return prefetcher
+
+    nodes = make_prefetch_nodes(new_prefetcher)
+    state = AgenticJokeState(category="general")
+
+    def config(thread_id):
+        return {"configurable": {"thread_id": thread_id, "io": ScriptedIO([])}}
+
+    try:
+        for thread_id in ("a", "b"):
+            nodes["show_menu"](state, config(thread_id))
+        nodes["exit_bot"](state, config("a"))
+
+        assert len(created) == 2
+        assert created[0]._closed.is_set()
+        assert not created[1]._closed.is_set()
+        assert created[1].get("general", timeout=2) == "general joke"
+    finally:
+        for prefetcher in created:
+            prefetcher.close()
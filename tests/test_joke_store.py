@@ -0,0 +1,24 @@
+import pyjokes
+import pytest
+
+from joke_store import JokeStore
+
+
+def test_no_repeats_until_every_joke_is_told():
+    store = JokeStore(seed=0)
+    jokes = pyjokes.get_jokes("en", "neutral")
+
+    first_round = [store.get_joke("en", "neutral") for _ in jokes]
+    next_joke = store.get_joke("en", "neutral")
+
+    assert sorted(first_round) == sorted(jokes)
+    assert next_joke != first_round[-1]
+
+
+def test_unknown_language_raises_like_pyjokes():
+    store = JokeStore()
+
+    with pytest.raises(Exception, match="No such language"):
+        store.get_joke("xx", "neutral")
+    with pytest.raises(Exception, match="No such category"):
+        store.get_joke("en", "nonexistent")
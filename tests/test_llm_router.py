@@ -0,0 +1,125 @@
+import time
+from typing import Annotated
+
+import httpx
+import pytest
+from langchain_core.language_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langgraph.graph import END, StateGraph
+from langgraph.graph.message import add_messages
+from typing_extensions import TypedDict
+
+import llm
+from llm_router import RoutedLLM, get_routed_llm
+from rate_limit import RateLimitedTransport, RateLimiter
+
+ROUTE_CONFIG = {
+    "llm_routes": {
+        "writer": {
+            "timeout_seconds": 5,
+            "models": [
+                {"provider": "groq", "model": "openai/gpt-oss-20b"},
+                {"provider": "openai", "model": "gpt-4o-mini"},
+            ],
+        }
+    }
+}
+
+
+def completion(content):
+    return {
+        "id": "chatcmpl-1",
+        "object": "chat.completion",
+        "created": 0,
+        "model": "gpt-4o-mini",
+        "choices": [
+            {
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }
+        ],
+        "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+    }
+
+
+@pytest.fixture
+def providers(monkeypatch):
+    """Scripted providers: groq is rate limited for a minute, openai answers."""
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    monkeypatch.setenv("GROQ_API_KEY", "test")
+    requests = []
+
+    def handler(request):
+        requests.append(request.url.host)
+        if "groq" in request.url.host:
+            return httpx.Response(429, headers={"Retry-After": "60"})
+        return httpx.Response(200, json=completion("from openai"))
+
+    def client_for(retries):
+        transport = RateLimitedTransport(
+            RateLimiter(),
+            retry_policy=llm._retry_policy(retries),
+            transport=httpx.MockTransport(handler),
+        )
+        return httpx.Client(transport=transport)
+
+    llm.clear_llm_cache()
+    # Seed the pooled clients get_llm would build for a retries=0 route
+    for provider in ("groq", "openai"):
+        monkeypatch.setitem(llm._http_clients, (provider, 0), client_for(0))
+    yield requests
+    llm.clear_llm_cache()
+
+
+def test_route_uses_clients_without_transport_retries(providers):
+    router = get_routed_llm("writer", app_config=ROUTE_CONFIG)
+
+    assert [model.http_client for model in router.llms] == [
+        llm._http_clients[("groq", 0)],
+        llm._http_clients[("openai", 0)],
+    ]
+
+
+def test_rate_limited_primary_fails_over_without_backoff(providers):
+    router = get_routed_llm("writer", hedge=False, app_config=ROUTE_CONFIG)
+
+    start = time.monotonic()
+    reply = router.invoke("hi")
+
+    assert reply.content == "from openai"
+    assert providers == ["api.groq.com", "api.openai.com"]
+    # Retry-After: 60 was not waited out before failing over
+    assert time.monotonic() - start < 5
+
+
+class MessagesState(TypedDict):
+    messages: Annotated[list, add_messages]
+
+
+def test_routed_model_tokens_reach_graph_streaming():
+    model = GenericFakeChatModel(
+        messages=iter([AIMessage(content="why did the router cross the road")])
+    )
+    router = RoutedLLM([model])
+
+    def writer(state):
+        return {"messages": [router.invoke(state["messages"])]}
+
+    graph = StateGraph(MessagesState)
+    graph.add_node("writer", writer)
+    graph.set_entry_point("writer")
+    graph.add_edge("writer", END)
+
+    chunks = [
+        message
+        for message, _ in graph.compile().stream(
+            {"messages": [("user", "tell me a joke")]}, stream_mode="messages"
+        )
+        if isinstance(message, AIMessageChunk)
+    ]
+
+    assert len(chunks) > 1
+    assert "".join(chunk.content for chunk in chunks) == (
+        "why did the router cross the road"
+    )
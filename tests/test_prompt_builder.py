@@ -0,0 +1,25 @@
+from prompt_builder import CLOSING_INSTRUCTION, compile_prompt
+
+CONFIG = {
+    "role": "A comedian",
+    "instruction": "Write a joke.",
+    "reasoning_strategy": "CoT",
+}
+APP_CONFIG = {"reasoning_strategies": {"CoT": "Think step by step."}}
+
+
+def test_render_and_render_messages_use_the_same_order():
+    compiled = compile_prompt(CONFIG, APP_CONFIG)
+
+    text = compiled.render(input_data="some content", category="puns")
+    system, human = compiled.render_messages(input_data="some content", category="puns")
+
+    assert text.endswith(CLOSING_INSTRUCTION)
+    assert human.content.endswith(CLOSING_INSTRUCTION)
+    assert text.index("some content") < text.index("The category is: puns")
+    assert human.content.index("some content") < human.content.index(
+        "The category is: puns"
+    )
+    # The reasoning strategy is static, so it sits in the system message
+    assert "Think step by step." in system.content
+    assert "Think step by step." not in human.content
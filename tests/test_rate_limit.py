@@ -0,0 +1,236 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+
+import rate_limit
+from rate_limit import (
+    AsyncRateLimitedTransport,
+    RateLimitedTransport,
+    RateLimiter,
+    RetryPolicy,
+    TokenBucket,
+    estimate_request_tokens,
+    parse_retry_after,
+)
+
+
+class FakeClock:
+    """Replaces monotonic time and sleeping; a sleep advances the clock."""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+    async def async_sleep(self, seconds):
+        self.sleep(seconds)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limit.time, "monotonic", clock.monotonic)
+    monkeypatch.setattr(rate_limit.time, "sleep", clock.sleep)
+    monkeypatch.setattr(rate_limit.asyncio, "sleep", clock.async_sleep)
+    # Full jitter always picks its upper bound
+    monkeypatch.setattr(rate_limit.random, "uniform", lambda low, high: high)
+    return clock
+
+
+def scripted(*responses):
+    """A mock transport answering with the given responses in order."""
+    remaining = list(responses)
+    seen = []
+
+    def handler(request):
+        seen.append(request)
+        response = remaining.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    transport = httpx.MockTransport(handler)
+    transport.seen = seen
+    return transport
+
+
+def chat_request(max_tokens=None, prompt="x" * 400):
+    payload = {"messages": [{"role": "user", "content": prompt}]}
+    if max_tokens is not None:
+        payload["max_tokens"] = max_tokens
+    return httpx.Request(
+        "POST", "https://api.example.com/v1/chat/completions", json=payload
+    )
+
+
+def test_retry_after_is_honoured(clock):
+    inner = scripted(
+        httpx.Response(429, headers={"Retry-After": "2"}),
+        httpx.Response(503, headers={"retry-after-ms": "1500"}),
+        httpx.Response(200),
+    )
+    transport = RateLimitedTransport(RateLimiter(), transport=inner)
+
+    response = transport.handle_request(chat_request())
+
+    assert response.status_code == 200
+    assert clock.sleeps == [2.0, 1.5]
+    assert len(inner.seen) == 3
+
+
+def test_exponential_backoff_is_capped(clock):
+    policy = RetryPolicy(max_retries=5, base_delay=0.5, max_delay=3.0)
+    inner = scripted(*[httpx.Response(500)] * 5, httpx.Response(200))
+    transport = RateLimitedTransport(RateLimiter(), policy, transport=inner)
+
+    assert transport.handle_request(chat_request()).status_code == 200
+    assert clock.sleeps == [0.5, 1.0, 2.0, 3.0, 3.0]
+
+
+def test_retry_after_is_capped_by_max_delay(clock):
+    policy = RetryPolicy(max_retries=1, max_delay=10.0)
+    inner = scripted(
+        httpx.Response(429, headers={"Retry-After": "600"}), httpx.Response(200)
+    )
+    transport = RateLimitedTransport(RateLimiter(), policy, transport=inner)
+
+    transport.handle_request(chat_request())
+
+    assert clock.sleeps == [10.0]
+
+
+def test_gives_up_after_max_retries(clock):
+    policy = RetryPolicy(max_retries=2)
+    inner = scripted(*[httpx.Response(429, headers={"Retry-After": "1"})] * 3)
+    transport = RateLimitedTransport(RateLimiter(), policy, transport=inner)
+
+    response = transport.handle_request(chat_request())
+
+    assert response.status_code == 429
+    assert clock.sleeps == [1.0, 1.0]
+    assert len(inner.seen) == 3
+
+
+def test_non_retryable_status_is_returned_at_once(clock):
+    inner = scripted(httpx.Response(400))
+    transport = RateLimitedTransport(RateLimiter(), transport=inner)
+
+    assert transport.handle_request(chat_request()).status_code == 400
+    assert clock.sleeps == []
+
+
+def test_transport_errors_are_retried_then_raised(clock):
+    policy = RetryPolicy(max_retries=1, base_delay=0.5)
+    error = httpx.ConnectError("refused")
+    transport = RateLimitedTransport(
+        RateLimiter(), policy, transport=scripted(error, error)
+    )
+
+    with pytest.raises(httpx.ConnectError):
+        transport.handle_request(chat_request())
+    assert clock.sleeps == [0.5]
+
+
+def test_request_bucket_spaces_requests_beyond_rpm(clock):
+    limiter = RateLimiter(rpm=60)
+
+    waits = [limiter.reserve(0) for _ in range(62)]
+
+    # A full minute's burst is free, then one request per second
+    assert waits[:60] == [0.0] * 60
+    assert waits[60:] == pytest.approx([1.0, 2.0])
+    clock.now += 2.0
+    assert limiter.reserve(0) == pytest.approx(1.0)
+
+
+def test_token_bucket_counts_prompt_and_completion_tokens(clock):
+    request = chat_request(max_tokens=500)
+    tokens = estimate_request_tokens(request)
+    assert tokens == len(request.content) // rate_limit.CHARS_PER_TOKEN + 500
+
+    limiter = RateLimiter(tpm=6000)
+    limiter.acquire(tokens)
+    limiter.acquire(6000 - tokens)
+    assert clock.sleeps == []
+
+    # The bucket is empty; 100 tokens refill at 100 per second
+    limiter.acquire(100)
+    assert clock.sleeps == pytest.approx([1.0])
+
+
+def test_oversized_request_waits_for_at_most_a_full_bucket(clock):
+    bucket = TokenBucket(per_minute=600)
+    bucket.reserve(600)
+
+    assert bucket.reserve(10_000) == pytest.approx(60.0)
+
+
+def test_transport_charges_the_limiter_per_attempt(clock):
+    limiter = RateLimiter(rpm=60, tpm=60_000)
+    inner = scripted(
+        httpx.Response(429, headers={"Retry-After": "0"}), httpx.Response(200)
+    )
+    transport = RateLimitedTransport(limiter, transport=inner)
+    request = chat_request(max_tokens=100)
+
+    transport.handle_request(request)
+
+    assert limiter.requests._tokens == pytest.approx(58)
+    assert limiter.tokens._tokens == pytest.approx(
+        60_000 - 2 * estimate_request_tokens(request)
+    )
+
+
+def test_async_transport_backs_off_like_the_sync_one(clock):
+    responses = [
+        httpx.Response(429, headers={"Retry-After": "3"}),
+        httpx.Response(502),
+        httpx.Response(200, json={"ok": True}),
+    ]
+
+    async def handler(request):
+        return responses.pop(0)
+
+    transport = AsyncRateLimitedTransport(
+        RateLimiter(),
+        RetryPolicy(base_delay=0.5),
+        transport=httpx.MockTransport(handler),
+    )
+
+    async def send():
+        async with httpx.AsyncClient(transport=transport) as client:
+            return await client.post("https://api.example.com/v1/chat/completions")
+
+    response = asyncio.run(send())
+
+    assert json.loads(response.content) == {"ok": True}
+    assert clock.sleeps == [3.0, 1.0]
+
+
+@pytest.mark.parametrize(
+    "headers, expected",
+    [
+        ({"retry-after-ms": "250"}, 0.25),
+        ({"Retry-After": "7"}, 7.0),
+        ({"Retry-After": "-3"}, 0.0),
+        ({"Retry-After": "soon"}, None),
+        ({}, None),
+    ],
+)
+def test_parse_retry_after(headers, expected):
+    assert parse_retry_after(httpx.Headers(headers)) == expected
+
+
+def test_parse_retry_after_http_date(monkeypatch):
+    monkeypatch.setattr(rate_limit.time, "time", lambda: 784111777.0)
+    headers = httpx.Headers({"Retry-After": "Sun, 06 Nov 1994 08:49:47 GMT"})
+
+    assert parse_retry_after(headers) == pytest.approx(10.0)
@@ -0,0 +1,73 @@
+import os
+
+import pytest
+import requests
+
+from archive_server import make_repo_archive, serve_archives
+from repo_cache import RepoCache
+
+
+def branch_archive(srv_root, branch):
+    return os.path.join(srv_root, "owner/repo/archive/refs/heads", f"{branch}.zip")
+
+
+def publish(srv_root, branch):
+    make_repo_archive(
+        branch_archive(srv_root, branch), num_files=5, top_dir=f"repo-{branch}"
+    )
+
+
+@pytest.fixture
+def server(tmp_path):
+    with serve_archives(str(tmp_path / "srv")) as server:
+        server.root = str(tmp_path / "srv")
+        yield server
+
+
+@pytest.fixture
+def requested():
+    """A session that records the path of every response it receives."""
+    session = requests.Session()
+    paths = []
+    session.hooks["response"].append(
+        lambda response, *args, **kwargs: paths.append(
+            (response.status_code, response.url.rsplit("/", 1)[-1])
+        )
+    )
+    session.paths = paths
+    return session
+
+
+def test_missing_main_is_not_requested_again(server, requested, tmp_path):
+    publish(server.root, "master")
+    cache = RepoCache(str(tmp_path / "cache"), revalidate_after=300, session=requested)
+    repo_url = f"{server.base_url}/owner/repo"
+
+    path = cache.get(repo_url)
+    assert requested.paths == [(404, "main.zip"), (200, "master.zip")]
+
+    requested.paths.clear()
+    assert cache.get(repo_url) == path
+    assert requested.paths == []
+
+    # Past revalidate_after, only the branch that resolved is revalidated
+    cache.revalidate_after = 0
+    assert cache.get(repo_url) == path
+    assert requested.paths == [(304, "master.zip")]
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["revalidated"] == 1
+
+
+def test_branch_that_disappears_is_dropped(server, requested, tmp_path):
+    publish(server.root, "main")
+    cache = RepoCache(str(tmp_path / "cache"), revalidate_after=0, session=requested)
+    repo_url = f"{server.base_url}/owner/repo"
+    main_path = cache.get(repo_url)
+
+    os.remove(branch_archive(server.root, "main"))
+    publish(server.root, "master")
+    master_path = cache.get(repo_url)
+
+    assert master_path != main_path
+    assert not os.path.exists(main_path)
+    assert cache.stats()["repos"] == 1
@@ -0,0 +1,25 @@
+import os
+
+import tokens
+
+
+def test_loading_the_tokenizer_leaves_the_environment_alone(monkeypatch):
+    tokens._load_encoding.cache_clear()
+    monkeypatch.delenv("TIKTOKEN_CACHE_DIR", raising=False)
+    try:
+        tokens.get_encoding()
+        assert "TIKTOKEN_CACHE_DIR" not in os.environ
+
+        tokens._load_encoding.cache_clear()
+        monkeypatch.setenv("TIKTOKEN_CACHE_DIR", "/somewhere/else")
+        tokens.get_encoding()
+        assert os.environ["TIKTOKEN_CACHE_DIR"] == "/somewhere/else"
+    finally:
+        tokens._load_encoding.cache_clear()
+
+
+def test_truncate_to_tokens_keeps_short_text():
+    text = "short text"
+
+    assert tokens.truncate_to_tokens(text, 100) is text
+    assert tokens.count_tokens(text) > 0
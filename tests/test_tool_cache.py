@@ -0,0 +1,58 @@
+import sqlite3
+
+from langchain_core.tools import tool
+
+from custom_tools import env_content
+from tool_cache import ToolResultCache, cache_policy, get_cache_policy
+
+
+def make_counting_tool(**policy_kwargs):
+    calls = []
+
+    @cache_policy(**policy_kwargs)
+    @tool
+    def echo(text: str) -> str:
+        """Echoes its input."""
+        calls.append(text)
+        return text
+
+    return echo, calls
+
+
+def disk_rows(db_path):
+    with sqlite3.connect(db_path) as conn:
+        return conn.execute("SELECT tool, value FROM tool_results").fetchall()
+
+
+def test_repeated_call_is_served_from_cache(tmp_path):
+    cache = ToolResultCache(db_path=str(tmp_path / "tools.sqlite"))
+    echo, calls = make_counting_tool(ttl_seconds=60)
+
+    assert cache.call(echo, {"text": "hi"}) == "hi"
+    assert cache.call(echo, {"text": "hi"}) == "hi"
+
+    assert calls == ["hi"]
+    assert cache.stats()["per_tool"]["echo"] == {"hits": 1, "misses": 1}
+    assert disk_rows(tmp_path / "tools.sqlite") == [("echo", '"hi"')]
+
+
+def test_non_persistent_results_never_reach_disk(tmp_path):
+    cache = ToolResultCache(db_path=str(tmp_path / "tools.sqlite"))
+    echo, calls = make_counting_tool(ttl_seconds=60, persist=False)
+
+    cache.call(echo, {"text": "SECRET=1"})
+    cache.call(echo, {"text": "SECRET=1"})
+
+    assert calls == ["SECRET=1"]
+    assert disk_rows(tmp_path / "tools.sqlite") == []
+
+
+def test_env_content_is_not_cached(tmp_path):
+    assert not get_cache_policy(env_content).cacheable
+
+    (tmp_path / ".env").write_text("KEY=old\n")
+    cache = ToolResultCache(db_path=str(tmp_path / "tools.sqlite"))
+    assert cache.call(env_content, {"dir_path": str(tmp_path)}) == "KEY=old\n"
+    (tmp_path / ".env").write_text("KEY=new\n")
+    assert cache.call(env_content, {"dir_path": str(tmp_path)}) == "KEY=new\n"
+    assert disk_rows(tmp_path / "tools.sqlite") == []
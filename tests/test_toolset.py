@@ -0,0 +1,76 @@
+import threading
+import time
+
+from toolset import ToolExecutor, format_tool_result, run_tool_calls
+
+
+def call(name, seconds=0.0):
+    return {"name": name, "args": {"seconds": seconds}, "id": name}
+
+
+def test_hung_tool_does_not_block_later_batches():
+    release = threading.Event()
+
+    def execute(tool_call):
+        if tool_call["name"] == "hang":
+            release.wait(10)
+        return tool_call["name"]
+
+    try:
+        # One worker: the hung call would hold it for good in a thread pool
+        first = run_tool_calls([call("hang")], execute, timeout=0.2, max_workers=1)
+        second = run_tool_calls([call("quick")], execute, timeout=1, max_workers=1)
+    finally:
+        release.set()
+
+    assert first == ["Error: Tool 'hang' timed out after 0.2s"]
+    assert second == ["quick"]
+
+
+def test_timeout_counts_from_when_the_call_starts():
+    def execute(tool_call):
+        time.sleep(tool_call["args"]["seconds"])
+        return tool_call["name"]
+
+    # The second call waits for the first, then has its own full 0.5 s
+    results = run_tool_calls(
+        [call("first", 0.4), call("second", 0.2)], execute, timeout=0.5, max_workers=1
+    )
+
+    assert results == ["first", "second"]
+
+
+def test_executor_limits_concurrency():
+    executor = ToolExecutor(max_workers=2)
+    lock = threading.Lock()
+    running, peak = [0], [0]
+
+    def work():
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        time.sleep(0.05)
+        with lock:
+            running[0] -= 1
+
+    futures = [executor.submit(work) for _ in range(6)]
+    for future in futures:
+        future.result(timeout=5)
+
+    assert peak[0] == 2
+
+
+def test_failures_become_error_results():
+    def execute(tool_call):
+        raise ValueError("bad args")
+
+    assert run_tool_calls([call("broken")], execute) == [
+        "Error: Tool 'broken' failed: bad args"
+    ]
+
+
+def test_format_tool_result_truncates_long_output():
+    text = format_tool_result("x" * 50, max_chars=10)
+
+    assert text.startswith("x" * 10)
+    assert "truncated 40 characters" in text
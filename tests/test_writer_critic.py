@@ -0,0 +1,59 @@
+import http.server
+import threading
+
+import httpx
+import pytest
+
+from writer_critic import make_parallel_node, race_candidates
+
+
+class _OkHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, so connections are pooled
+
+    def do_GET(self):
+        body = b"approved"
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server_url():
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), _OkHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_parallel_node_reuses_shared_async_client_across_calls(server_url):
+    # Like llm.get_async_http_client: one pooled client for the whole process
+    client = httpx.AsyncClient()
+    errors = []
+
+    async def get():
+        try:
+            return (await client.get(server_url)).text
+        except Exception as e:
+            errors.append(e)
+            raise
+
+    async def write():
+        return await get()
+
+    async def judge(candidate):
+        return await get() == candidate
+
+    async def writer_critic(state):
+        joke, approved = await race_candidates(write, judge, num_candidates=3)
+        return {"joke": joke, "approved": approved}
+
+    node = make_parallel_node(writer_critic)
+    for _ in range(3):
+        assert node.invoke({}) == {"joke": "approved", "approved": True}
+    assert errors == []